@@ -2,6 +2,7 @@
 Interfaz de administración para gestionar trabajos
 """
 import streamlit as st
+import pandas as pd
 import sys
 import os
 
@@ -9,8 +10,12 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
 
 from database import WorksDatabase
-from config import APP_CONFIG, WORK_STATUS, CATEGORIES
+from config import APP_CONFIG, WORK_STATUS, CATEGORIES, STATIC_CATALOG_CONFIG
 from utils import generate_work_id, format_date, show_success_message, show_error_message
+from publisher import enable_publish_on_write
+from index_stats import get_statistics
+from bulk_import import run_import
+from images import ImageStore
 
 # Configuración de la página
 st.set_page_config(
@@ -41,11 +46,20 @@ def main():
     """Función principal de administración"""
     check_admin_access()
     
+    # Republicar el catálogo estático del frontend tras cada escritura
+    if STATIC_CATALOG_CONFIG["publish_on_write"]:
+        try:
+            enable_publish_on_write()
+        except Exception as e:
+            print(f"⚠️  No se pudo habilitar la publicación del catálogo estático: {e}")
+    
     st.title("⚙️ Administración - Data Science Index")
     st.divider()
     
     # Tabs para diferentes funciones
-    tab1, tab2, tab3, tab4 = st.tabs(["📊 Ver Trabajos", "➕ Agregar Trabajo", "✏️ Editar Trabajo", "📈 Estadísticas"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
+        "📊 Ver Trabajos", "➕ Agregar Trabajo", "✏️ Editar Trabajo", "📥 Importar", "📈 Estadísticas"
+    ])
     
     with tab1:
         show_works_list()
@@ -57,17 +71,15 @@ def main():
         show_edit_work_form()
     
     with tab4:
+        show_bulk_import()
+    
+    with tab5:
         show_statistics()
 
 def show_works_list():
-    """Mostrar lista de todos los trabajos"""
+    """Mostrar lista de todos los trabajos (incluye archivados)"""
     try:
         db = WorksDatabase()
-        works_df = db.get_all_works()
-        
-        if works_df.empty:
-            st.info("No hay trabajos registrados.")
-            return
         
         st.subheader("📋 Lista de Trabajos")
         
@@ -78,16 +90,20 @@ def show_works_list():
         with col2:
             status_filter = st.selectbox("Filtrar por estado:", ["Todos"] + list(WORK_STATUS.values()))
         
-        # Aplicar filtros
-        filtered_df = works_df.copy()
-        if category_filter != "Todas":
-            filtered_df = filtered_df[filtered_df['category'] == category_filter]
-        if status_filter != "Todos":
-            filtered_df = filtered_df[filtered_df['status'] == status_filter]
+        # Filtros aplicados en BigQuery: solo viajan las filas y columnas del listado
+        works_df = db.find_works(
+            category=None if category_filter == "Todas" else category_filter,
+            status=None if status_filter == "Todos" else status_filter,
+            columns=['work_name', 'category', 'status', 'version', 'created_date']
+        )
+        
+        if works_df.empty:
+            st.info("No hay trabajos registrados con esos filtros.")
+            return
         
         # Mostrar tabla
         st.dataframe(
-            filtered_df[['work_name', 'category', 'status', 'version', 'created_date']],
+            works_df,
             use_container_width=True
         )
         
@@ -110,7 +126,7 @@ def show_add_work_form():
         with col2:
             status = st.selectbox("Estado *", list(WORK_STATUS.values()))
             streamlit_page = st.text_input("Archivo Streamlit *", placeholder="categories/calls_analysis/individual_companies.py")
-            image_file = st.file_uploader("Imagen preview", type=['jpg', 'jpeg', 'png', 'gif'])
+            image_file = st.file_uploader("Imagen preview", type=['jpg', 'jpeg', 'png', 'gif', 'webp'])
         
         description = st.text_area("Descripción")
         short_description = st.text_area("Descripción corta (para el índice)")
@@ -123,6 +139,9 @@ def show_add_work_form():
                 st.error("Por favor complete todos los campos obligatorios (*)")
             else:
                 try:
+                    # Miniaturas de la imagen preview (se valida antes de crear el trabajo)
+                    image_preview_url = store_preview_image(image_file) if image_file else ""
+                    
                     # Generar ID único
                     work_id = generate_work_id(work_name)
                     work_slug = work_id  # Por ahora usar el mismo ID como slug
@@ -139,6 +158,7 @@ def show_add_work_form():
                         "is_latest": True,
                         "description": description,
                         "short_description": short_description,
+                        "image_preview_url": image_preview_url,
                         "streamlit_page": streamlit_page,
                         "notes": notes,
                         "tags": []
@@ -155,27 +175,58 @@ def show_add_work_form():
                 except Exception as e:
                     st.error(f"Error al crear trabajo: {str(e)}")
 
+def store_preview_image(image_file) -> str:
+    """Generar las miniaturas de una imagen subida y retornar su image_preview_url
+    
+    Lanza ValueError si el archivo no es una imagen válida.
+    """
+    return ImageStore().store(image_file)["image_preview_url"]
+
 def show_edit_work_form():
     """Formulario para editar trabajo existente"""
     st.subheader("✏️ Editar Trabajo Existente")
     
     try:
         db = WorksDatabase()
-        works_df = db.get_all_works()
         
-        if works_df.empty:
+        # Si ya hay un trabajo seleccionado (session_state), cargar índice y trabajo en paralelo
+        # El índice solo trae id/nombre/estado/versión; el registro completo, solo el elegido
+        requested_work_id = st.session_state.get("edit_work_selector")
+        if requested_work_id:
+            results = db.fetch_concurrently(
+                works=db.get_work_index,
+                work=lambda: db.get_work_by_id(requested_work_id)
+            )
+            works_index = results["works"]
+        else:
+            works_index = db.get_work_index()
+        
+        if works_index.empty:
             st.info("No hay trabajos para editar.")
             return
         
-        # Selector de trabajo
-        work_options = {f"{row['work_name']} (v{row['version']})": row['work_id'] 
-                       for _, row in works_df.iterrows()}
+        # Selector de trabajo (los archivados se marcan en la etiqueta)
+        work_labels = {
+            work_id: f"{name} (v{version})" + (" · archivado" if status == WORK_STATUS["ARCHIVED"] else "")
+            for work_id, name, version, status in zip(
+                works_index['work_id'], works_index['work_name'], works_index['version'], works_index['status']
+            )
+        }
+        if requested_work_id not in work_labels:
+            st.session_state.pop("edit_work_selector", None)
         
-        selected_work_name = st.selectbox("Seleccionar trabajo a editar:", list(work_options.keys()))
-        selected_work_id = work_options[selected_work_name]
+        selected_work_id = st.selectbox(
+            "Seleccionar trabajo a editar:",
+            list(work_labels.keys()),
+            format_func=lambda work_id: work_labels[work_id],
+            key="edit_work_selector"
+        )
         
-        # Obtener datos del trabajo seleccionado
-        work_data = db.get_work_by_id(selected_work_id)
+        # Obtener datos del trabajo seleccionado (ya cargados si coincide con session_state)
+        if requested_work_id and selected_work_id == requested_work_id:
+            work_data = results["work"]
+        else:
+            work_data = db.get_work_by_id(selected_work_id)
         
         if work_data:
             with st.form("edit_work_form"):
@@ -192,7 +243,7 @@ def show_edit_work_form():
                     status = st.selectbox("Estado *", list(WORK_STATUS.values()),
                                         index=list(WORK_STATUS.values()).index(work_data['status']))
                     streamlit_page = st.text_input("Archivo Streamlit *", value=work_data['streamlit_page'])
-                    image_file = st.file_uploader("Nueva imagen preview", type=['jpg', 'jpeg', 'png', 'gif'])
+                    image_file = st.file_uploader("Nueva imagen preview", type=['jpg', 'jpeg', 'png', 'gif', 'webp'])
                 
                 description = st.text_area("Descripción", value=work_data.get('description', ''))
                 short_description = st.text_area("Descripción corta", value=work_data.get('short_description', ''))
@@ -220,8 +271,18 @@ def show_edit_work_form():
                                 "streamlit_page": streamlit_page,
                                 "notes": notes
                             }
+                            if image_file:
+                                update_data["image_preview_url"] = store_preview_image(image_file)
                             
-                            if db.update_work(selected_work_id, update_data):
+                            if version != work_data['version']:
+                                # Versión nueva: se inserta como vigente y la anterior queda en el historial
+                                changes = {key: value for key, value in update_data.items() if key != "version"}
+                                if db.publish_version(selected_work_id, version, changes):
+                                    st.success(f"✅ Versión {version} de '{work_name}' publicada exitosamente")
+                                    st.rerun()
+                                else:
+                                    st.error(f"❌ Error al publicar la versión {version} (¿ya existe?)")
+                            elif db.update_work(selected_work_id, update_data):
                                 st.success(f"✅ Trabajo '{work_name}' actualizado exitosamente")
                                 st.rerun()
                             else:
@@ -239,14 +300,125 @@ def show_edit_work_form():
                             st.error("❌ Error al archivar el trabajo")
                     except Exception as e:
                         st.error(f"Error al archivar trabajo: {str(e)}")
+            
+            # Historial de versiones: solo se consulta al abrirlo
+            with st.expander("🕘 Historial de versiones"):
+                if st.checkbox("Cargar historial", key=f"versions_{selected_work_id}"):
+                    versions = db.get_work_versions(selected_work_id)
+                    st.dataframe(versions, use_container_width=True, hide_index=True)
+                    
+                    previous_versions = versions.loc[~versions['is_latest'].astype(bool), 'version'].tolist()
+                    if previous_versions:
+                        old_version = st.selectbox("Ver versión anterior:", previous_versions)
+                        old_work = db.get_work_version(selected_work_id, old_version)
+                        if old_work:
+                            st.json({key: str(value) for key, value in old_work.items()})
         
     except Exception as e:
         st.error(f"Error al cargar trabajos: {str(e)}")
 
+def show_bulk_import():
+    """Importación masiva desde CSV/JSON/Parquet con vista previa del diff"""
+    st.subheader("📥 Importación Masiva")
+    st.caption(
+        "Columnas obligatorias: work_name, category, streamlit_page. Filas sin work_id "
+        "se emparejan por categoría y nombre; las que no coinciden se crean."
+    )
+    
+    upload = st.file_uploader("Archivo de trabajos", type=["csv", "json", "jsonl", "parquet"], key="bulk_import_file")
+    if upload is None:
+        return
+    
+    try:
+        db = WorksDatabase()
+        preview = run_import(upload, db=db, file_name=upload.name)
+    except Exception as e:
+        show_error_message(f"Error al leer la importación: {str(e)}")
+        return
+    
+    summary = preview["summary"]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Nuevos", summary.get("create", 0))
+    col2.metric("Actualizados", summary.get("update", 0))
+    col3.metric("Sin cambios", summary.get("unchanged", 0))
+    col4.metric("Con errores", summary.get("error", 0))
+    st.dataframe(preview["diff"], use_container_width=True, hide_index=True)
+    
+    pending = summary.get("create", 0) + summary.get("update", 0)
+    if summary.get("error", 0):
+        st.warning("Las filas con errores no se importarán.")
+    if st.button(f"Importar {pending} trabajos", disabled=pending == 0):
+        try:
+            upload.seek(0)
+            result = run_import(upload, db=db, execute=True, file_name=upload.name)
+            applied = result["applied"]
+            show_success_message(
+                f"Importación aplicada: {applied['created']} nuevos, {applied['updated']} actualizados, "
+                f"{applied['versioned']} con versión nueva"
+            )
+        except Exception as e:
+            show_error_message(f"Error al importar: {str(e)}")
+
 def show_statistics():
     """Mostrar estadísticas del sistema"""
     st.subheader("📈 Estadísticas del Sistema")
-    st.info("Funcionalidad de estadísticas pendiente de implementar")
+    
+    # Contadores compartidos del proceso: una consulta agrupada y luego ajustes por escritura
+    try:
+        stats = get_statistics(WorksDatabase()).snapshot()
+    except Exception as e:
+        show_error_message(f"Error al cargar estadísticas: {str(e)}")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Total Trabajos", stats["total"])
+    
+    with col2:
+        st.metric("Activos", stats["active"])
+    
+    with col3:
+        st.metric("Archivados", stats["by_status"].get("archived", 0))
+    
+    with col4:
+        st.metric("Categorías", len(stats["by_category"]))
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.markdown("**Por categoría**")
+        by_category = {CATEGORIES.get(category, category): count for category, count in stats["by_category"].items()}
+        st.bar_chart(pd.Series(by_category, name="Trabajos"))
+    
+    with col2:
+        st.markdown("**Por estado**")
+        st.bar_chart(pd.Series(stats["by_status"], name="Trabajos"))
+    
+    with col3:
+        st.markdown("**Por versión**")
+        st.bar_chart(pd.Series(stats["by_version"], name="Trabajos"))
+    
+    if stats["timeline"]:
+        st.markdown("**Activaciones y archivados por mes**")
+        timeline = pd.DataFrame(stats["timeline"]).set_index("month")
+        st.line_chart(timeline[["activated", "archived"]])
+        st.caption(f"Tasa de archivado acumulada: {timeline['archival_rate'].iloc[-1] * 100:.1f}%")
+    
+    if stats["recent"]:
+        st.markdown("**Cambios recientes**")
+        recent = pd.DataFrame(stats["recent"])
+        recent["changed_at"] = recent["changed_at"].map(format_date)
+        st.dataframe(
+            recent.rename(columns={
+                "work_id": "ID",
+                "work_name": "Trabajo",
+                "status": "Estado",
+                "changed_at": "Modificado"
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
 
 if __name__ == "__main__":
     main()
@@ -2,63 +2,32 @@
 API FastAPI para Data Science Index
 Provee endpoints para obtener trabajos y categorías desde BigQuery
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, StreamingResponse
+import asyncio
 import sys
 import os
 from typing import List, Dict, Optional
-import json
+import hashlib
+import threading
+import time
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timezone
 
 # Agregar shared al path para importar módulos
 # Desde /app/api/main.py -> /app/shared
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
 
-from database import WorksDatabase
-from config import CATEGORIES
-
-# Funciones de utilidad (sin dependencia de Streamlit)
-def format_date(date_input) -> str:
-    """Formatear fecha para mostrar en la interfaz"""
-    if not date_input:
-        return "N/A"
-    
-    try:
-        # Si es un Timestamp de pandas
-        if hasattr(date_input, 'strftime'):
-            return date_input.strftime("%d/%m/%Y %H:%M")
-        
-        # Si es un string
-        if isinstance(date_input, str):
-            date_obj = datetime.fromisoformat(date_input.replace('Z', '+00:00'))
-            return date_obj.strftime("%d/%m/%Y %H:%M")
-        
-        # Si es otro tipo, convertir a string
-        return str(date_input)
-    except:
-        return str(date_input) if date_input else "N/A"
-
-def get_status_badge(status: str) -> str:
-    """Obtener emoji para el estado del trabajo"""
-    status_emojis = {
-        "active": "🟢",
-        "paused": "⏸️", 
-        "archived": "📁",
-        "maintenance": "🔧"
-    }
-    return status_emojis.get(status, "❓")
-
-def get_category_icon(category: str) -> str:
-    """Obtener emoji para la categoría del trabajo"""
-    category_icons = {
-        "calls_analysis": "📞",
-        "marketing_analysis": "📈",
-        "climate_analysis": "🌡️",
-        "accounting_analysis": "💰",
-        "workforce_analysis": "👥"
-    }
-    return category_icons.get(category, "📊")
+from database import WorksDatabase, BackendUnavailableError, compute_watermark, add_write_listener
+from config import DATABASE_CONFIG
+from serialization import WORK_FIELDS, serialize_work, load_serialized_catalog, build_categories_payload
+from response_cache import EncodedResponseCache, encode_json
+from events import ChangeBroadcaster
+from page_shell import render_page_shell
+from index_stats import get_statistics
+from images import ImageStore, IMMUTABLE_CACHE_CONTROL
+from tag_index import TagIndex, track_writes
 
 app = FastAPI(title="Data Science Index API", version="1.0.0")
 
@@ -69,11 +38,259 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Catalog-Version", "X-Catalog-Stale"],
 )
 
 # Instancia global de la base de datos
 db = WorksDatabase()
 
+# Miniaturas de imágenes preview (directorio local que hace las veces de bucket)
+image_store = ImageStore()
+
+# Snapshot del catálogo en memoria (trabajos serializados + mapeo de categorías)
+_catalog_snapshot: Optional[Dict] = None
+_catalog_snapshot_lock = threading.Lock()
+
+# Cuerpos JSON pre-codificados por endpoint/categoría/proyección, invalidados por versión
+response_cache = EncodedResponseCache()
+
+def load_catalog_snapshot() -> Dict:
+    """Cargar trabajos y mapeo de categorías en paralelo y serializarlos una vez"""
+    catalog = load_serialized_catalog(db)
+    categories = build_categories_payload(db)
+    return {
+        "version": hashlib.sha1(encode_json([catalog["works"], categories])).hexdigest()[:16],
+        "works": catalog["works"],
+        "categories": categories,
+        "category_map": catalog["category_map"],
+        "watermark": catalog["watermark"],
+        # Índice invertido tag/subcategoría -> work_id, mantenido con las escrituras
+        "tag_index": track_writes(TagIndex.from_records(catalog["works"])),
+        "loaded_at": time.monotonic(),
+        "stale": False
+    }
+
+
+def get_catalog_snapshot() -> Dict:
+    """Obtener el snapshot vigente del catálogo
+    
+    Se recarga cada catalog_refresh_seconds. Mientras un hilo recarga, los
+    demás siguen sirviendo el snapshot anterior. Si la recarga falla y hay
+    snapshot previo, se sirve marcado como stale (stale-if-error).
+    """
+    global _catalog_snapshot
+    snapshot = _catalog_snapshot
+    refresh_seconds = DATABASE_CONFIG["catalog_refresh_seconds"]
+    if snapshot and time.monotonic() - snapshot["loaded_at"] < refresh_seconds:
+        return snapshot
+    
+    # Solo se bloquea si no hay nada que servir todavía
+    if not _catalog_snapshot_lock.acquire(blocking=snapshot is None):
+        return snapshot
+    try:
+        if _catalog_snapshot is not snapshot:
+            return _catalog_snapshot  # Otro hilo ya recargó
+        try:
+            _catalog_snapshot = load_catalog_snapshot()
+        except Exception as e:
+            if snapshot is None or not DATABASE_CONFIG["serve_stale_on_error"]:
+                raise
+            print(f"⚠️  Sirviendo catálogo stale: {e}")
+            # Reintentar cuando venza la ventana del circuit breaker, no en cada request
+            retry_at = time.monotonic() + DATABASE_CONFIG["circuit_reset_seconds"]
+            _catalog_snapshot = {**snapshot, "stale": True, "loaded_at": retry_at - refresh_seconds}
+        return _catalog_snapshot
+    finally:
+        _catalog_snapshot_lock.release()
+
+
+def raise_backend_error(error: Exception, detail: str):
+    """Traducir un fallo de BigQuery a HTTPException (503 si el backend no está disponible)"""
+    if isinstance(error, HTTPException):
+        raise error
+    if isinstance(error, BackendUnavailableError):
+        raise HTTPException(status_code=503, detail=f"{detail}: {str(error)}",
+                            headers={"Retry-After": str(int(DATABASE_CONFIG["circuit_reset_seconds"]))})
+    raise HTTPException(status_code=500, detail=f"{detail}: {str(error)}")
+
+
+def parse_fields(fields: Optional[str]) -> Optional[tuple]:
+    """Validar la proyección ?fields=a,b,c (None = todos los campos)"""
+    if not fields:
+        return None
+    requested = tuple(sorted({field.strip() for field in fields.split(",") if field.strip()}))
+    unknown = [field for field in requested if field not in WORK_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Campos desconocidos: {', '.join(unknown)}")
+    return requested
+
+
+def project_works(works: List[Dict], fields: Optional[tuple]) -> List[Dict]:
+    """Aplicar la proyección de campos a una lista de trabajos serializados"""
+    if fields is None:
+        return works
+    return [{field: work[field] for field in fields} for work in works]
+
+
+def parse_tag_filters(tag: Optional[List[str]], subcategory: Optional[List[str]],
+                      tag_mode: str) -> Optional[tuple]:
+    """Normalizar ?tag=&subcategory=&tag_mode= (valores repetidos o separados por coma)"""
+    def split(values):
+        return tuple(sorted({part.strip() for value in values or [] for part in value.split(",") if part.strip()}))
+    
+    if tag_mode not in ("all", "any"):
+        raise HTTPException(status_code=400, detail=f"tag_mode inválido: {tag_mode} (use all o any)")
+    tags, subcategories = split(tag), split(subcategory)
+    if not tags and not subcategories:
+        return None
+    return tags, subcategories, tag_mode
+
+
+def filter_by_tags(works: List[Dict], snapshot: Dict, filters: Optional[tuple]) -> List[Dict]:
+    """Aplicar filtros de tags/subcategoría con el índice invertido del snapshot"""
+    if filters is None:
+        return works
+    tags, subcategories, tag_mode = filters
+    matched = snapshot["tag_index"].match(list(tags), list(subcategories), tag_mode)
+    return [work for work in works if work["work_id"] in matched]
+
+
+def tag_filtered_snapshot(snapshot: Dict, filters: Optional[tuple]) -> Dict:
+    """Snapshot cuya versión (ETag/caché) también depende de las escrituras al índice"""
+    if filters is None:
+        return snapshot
+    return {**snapshot, "version": f"{snapshot['version']}.{snapshot['tag_index'].version}"}
+
+
+def format_watermark(watermark: Optional[datetime]) -> Optional[str]:
+    """Watermark en ISO-8601 UTC para enviar al cliente"""
+    return watermark.astimezone(timezone.utc).isoformat() if watermark else None
+
+
+def parse_watermark(since: str) -> datetime:
+    """Parsear ?since= (ISO-8601; sin zona horaria se asume UTC)"""
+    try:
+        watermark = datetime.fromisoformat(since.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Watermark inválido: {since}")
+    return watermark if watermark.tzinfo else watermark.replace(tzinfo=timezone.utc)
+
+
+def get_works_delta(since: datetime, projection: Optional[tuple]) -> Dict:
+    """Trabajos activos creados/actualizados y trabajos dados de baja desde `since`
+    
+    Si el cliente ya está al día con el snapshot vigente se responde sin
+    consultar BigQuery; el watermark no avanza, así que los cambios posteriores
+    llegan en la siguiente consulta tras recargar el snapshot.
+    """
+    snapshot = _catalog_snapshot
+    if snapshot and not snapshot["stale"] and snapshot["watermark"] and since >= snapshot["watermark"] \
+            and time.monotonic() - snapshot["loaded_at"] < DATABASE_CONFIG["catalog_refresh_seconds"]:
+        return {"works": [], "removed": [], "count": 0, "watermark": format_watermark(since), "delta": True}
+    
+    try:
+        if snapshot:
+            changes_df = db.get_works_changed_since(since)
+            category_map = snapshot["category_map"]
+        else:
+            results = db.fetch_concurrently(
+                changes=lambda: db.get_works_changed_since(since),
+                category_map=db.get_category_map
+            )
+            changes_df = results["changes"]
+            category_map = results["category_map"]
+    except Exception as e:
+        raise_backend_error(e, "Error al obtener cambios")
+    
+    return build_delta(changes_df, category_map, since, projection)
+
+
+def build_delta(changes_df: pd.DataFrame, category_map: Dict[str, Dict], since: datetime,
+                projection: Optional[tuple] = None) -> Dict:
+    """Separar cambios en trabajos activos (upserts) y bajas, con el nuevo watermark"""
+    works = []
+    removed = []
+    for _, row in changes_df.iterrows():
+        if row.get("status") == "active":
+            works.append(serialize_work(row, category_map))
+        else:
+            removed.append(str(row.get("work_id", "")))
+    
+    works = project_works(works, projection)
+    return {
+        "works": works,
+        "removed": removed,
+        "count": len(works),
+        "watermark": format_watermark(compute_watermark(changes_df, since)),
+        "delta": True
+    }
+
+
+def poll_catalog_changes(since: Optional[datetime]):
+    """Buscar cambios para los clientes SSE (se ejecuta en un hilo del executor)"""
+    snapshot = get_catalog_snapshot()
+    if since is None:
+        # Primer poll: partir del watermark del snapshot vigente
+        return None, snapshot["watermark"] or datetime.now(timezone.utc)
+    
+    changes_df = db.get_works_changed_since(since)
+    if changes_df.empty:
+        return None, since
+    payload = build_delta(changes_df, snapshot["category_map"], since)
+    return payload, compute_watermark(changes_df, since)
+
+
+# Difusión de cambios a clientes SSE (un solo poller por proceso)
+broadcaster = ChangeBroadcaster(
+    poll_catalog_changes,
+    poll_seconds=DATABASE_CONFIG["events_poll_seconds"],
+    heartbeat_seconds=DATABASE_CONFIG["events_heartbeat_seconds"]
+)
+
+# Escrituras hechas desde este proceso disparan una búsqueda inmediata
+add_write_listener(lambda event, work_id, data: broadcaster.wake())
+
+
+@app.on_event("startup")
+async def start_broadcaster():
+    """Iniciar el poller de cambios del catálogo"""
+    asyncio.create_task(broadcaster.run())
+
+
+def works_payload(snapshot: Dict, projection: Optional[tuple] = None) -> Dict:
+    """Cuerpo de /works para un snapshot (también embebido en /app)"""
+    works = project_works(snapshot["works"], projection)
+    return {"works": works, "count": len(works), "watermark": format_watermark(snapshot["watermark"])}
+
+
+def resolve_category_id(category: str, snapshot: Dict) -> str:
+    """Resolver un nombre de categoría (works_categories) a su category_id"""
+    category_map = snapshot["category_map"]
+    if category in category_map:
+        return category
+    for category_id, info in category_map.items():
+        if info["name"] == category:
+            return category_id
+    # Sin works_categories (local), el nombre es el ID
+    return category
+
+
+def catalog_response(request: Request, snapshot: Dict, cache_key: tuple, build,
+                     media_type: str = "application/json", encode=encode_json) -> Response:
+    """Responder con el cuerpo pre-codificado del snapshot (o 304 si el cliente ya lo tiene)"""
+    version = snapshot["version"]
+    etag = f'"{version}"'
+    headers = {"ETag": etag, "X-Catalog-Version": version}
+    if snapshot["stale"]:
+        headers["X-Catalog-Stale"] = "true"
+        headers["Warning"] = '110 - "Response is Stale"'
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    body = response_cache.get_or_build(cache_key, version, build, encode=encode)
+    return Response(content=body, media_type=media_type, headers=headers)
+
 
 @app.get("/")
 def root():
@@ -82,197 +299,178 @@ def root():
         "service": "Data Science Index API",
         "version": "1.0.0",
         "endpoints": {
-            "/works": "Obtener todos los trabajos",
+            "/works": "Obtener todos los trabajos (?fields=campo1,campo2 para proyectar, ?since=<watermark> para cambios, ?tag=&subcategory=&tag_mode=all|any para filtrar)",
             "/works/{category}": "Obtener trabajos por categoría",
-            "/categories": "Obtener todas las categorías"
+            "/facets": "Conteos por tag y subcategoría (?category=, ?tag=, ?subcategory=, ?tag_mode=all|any)",
+            "/app": "Frontend renderizado con el catálogo embebido",
+            "/events": "Stream SSE de cambios del catálogo",
+            "/categories": "Obtener todas las categorías",
+            "/stats": "Estadísticas del índice",
+            "/images/{hash}/{archivo}": "Miniaturas de imágenes preview (inmutables)"
         }
     }
 
 
 @app.get("/works")
-def get_all_works():
-    """Obtener todos los trabajos activos"""
+def get_all_works(request: Request, fields: Optional[str] = None, since: Optional[str] = None,
+                  tag: Optional[List[str]] = Query(None), subcategory: Optional[List[str]] = Query(None),
+                  tag_mode: str = "all"):
+    """Obtener todos los trabajos activos
+    
+    Con ?since=<watermark> responde solo los cambios (modo delta): trabajos
+    activos creados/actualizados en `works`, IDs dados de baja en `removed`
+    y el nuevo `watermark` para la siguiente consulta.
+    
+    ?tag= y ?subcategory= (repetibles o separados por coma) filtran con el
+    índice invertido en memoria; tag_mode=all exige todos los tags y any
+    alguno. Las subcategorías se combinan con OR.
+    """
+    projection = parse_fields(fields)
+    filters = parse_tag_filters(tag, subcategory, tag_mode)
+    if since is not None:
+        return get_works_delta(parse_watermark(since), projection)
+    
     try:
-        df = db.get_all_works()
-        
-        if df.empty:
-            return {"works": [], "count": 0}
-        
-        # Obtener mapeo de categorías desde works_categories (si está disponible)
-        category_map = {}
-        try:
-            from google.cloud import bigquery
-            categories_table_ref = f"{db.project_id}.{db.dataset_id}.works_categories"
-            category_query = f"""
-            SELECT category_id, category_name, category_icon
-            FROM `{categories_table_ref}`
-            WHERE is_active = true
-            """
-            cat_result = db.client.query(category_query).to_dataframe()
-            if not cat_result.empty:
-                for _, cat_row in cat_result.iterrows():
-                    category_map[str(cat_row.get("category_id", ""))] = {
-                        "name": str(cat_row.get("category_name", "")),
-                        "icon": str(cat_row.get("category_icon", "📊"))
-                    }
-        except Exception as e:
-            print(f"⚠️  No se pudieron cargar categorías desde BigQuery: {e}")
-        
-        # Convertir DataFrame a lista de diccionarios
-        works = []
-        for _, row in df.iterrows():
-            category_id = str(row.get("category", ""))
-            
-            # Obtener nombre e icono de categoría
-            if category_id in category_map:
-                category_name = category_map[category_id]["name"]
-                category_icon = category_map[category_id]["icon"]
-            else:
-                # Fallback a config.py
-                category_name = CATEGORIES.get(category_id, category_id)
-                category_icon = get_category_icon(category_id)
-            
-            work = {
-                "work_id": str(row.get("work_id", "")),
-                "title": str(row.get("work_name", "")),  # Usar work_name de BigQuery
-                "work_name": str(row.get("work_name", "")),  # Mantener ambos para compatibilidad
-                "description": str(row.get("description", "")),
-                "short_description": str(row.get("short_description", "")),
-                "category": category_id,
-                "category_name": category_name,
-                "url": str(row.get("work_url", "")),  # Usar work_url de BigQuery
-                "work_url": str(row.get("work_url", "")),  # Mantener ambos para compatibilidad
-                "version": str(row.get("version", "")),
-                "created_date": format_date(row.get("created_date")) if pd.notna(row.get("created_date", pd.NaT)) else "",
-                "status": str(row.get("status", "active")),
-                "status_badge": get_status_badge(str(row.get("status", "active"))),
-                "category_icon": category_icon,
-                "notes": str(row.get("notes", "")),
-            }
-            works.append(work)
-        
-        return {"works": works, "count": len(works)}
+        snapshot = get_catalog_snapshot()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener trabajos: {str(e)}")
+        raise_backend_error(e, "Error al obtener trabajos")
+    
+    if filters is None:
+        return catalog_response(request, snapshot, ("works", None, projection),
+                                lambda: works_payload(snapshot, projection))
+    
+    def build():
+        works = project_works(filter_by_tags(snapshot["works"], snapshot, filters), projection)
+        return {"works": works, "count": len(works), "watermark": format_watermark(snapshot["watermark"])}
+    
+    return catalog_response(request, tag_filtered_snapshot(snapshot, filters),
+                            ("works", None, projection, filters), build)
 
 
 @app.get("/works/{category}")
-def get_works_by_category(category: str):
-    """Obtener trabajos por categoría"""
+def get_works_by_category(category: str, request: Request, fields: Optional[str] = None,
+                          tag: Optional[List[str]] = Query(None), subcategory: Optional[List[str]] = Query(None),
+                          tag_mode: str = "all"):
+    """Obtener trabajos por categoría (acepta los mismos filtros de tags que /works)"""
+    projection = parse_fields(fields)
+    filters = parse_tag_filters(tag, subcategory, tag_mode)
     try:
-        df = db.get_works_by_category(category)
-        
-        if df.empty:
-            return {"works": [], "count": 0, "category": category}
-        
-        # Obtener mapeo de categorías desde works_categories (si está disponible)
-        category_map = {}
-        try:
-            from google.cloud import bigquery
-            categories_table_ref = f"{db.project_id}.{db.dataset_id}.works_categories"
-            category_query = f"""
-            SELECT category_id, category_name, category_icon
-            FROM `{categories_table_ref}`
-            WHERE is_active = true
-            """
-            cat_result = db.client.query(category_query).to_dataframe()
-            if not cat_result.empty:
-                for _, cat_row in cat_result.iterrows():
-                    category_map[str(cat_row.get("category_id", ""))] = {
-                        "name": str(cat_row.get("category_name", "")),
-                        "icon": str(cat_row.get("category_icon", "📊"))
-                    }
-        except Exception as e:
-            print(f"⚠️  No se pudieron cargar categorías desde BigQuery: {e}")
-        
-        # Convertir DataFrame a lista de diccionarios
-        works = []
-        for _, row in df.iterrows():
-            category_id = str(row.get("category", ""))
-            
-            # Obtener nombre e icono de categoría
-            if category_id in category_map:
-                category_name = category_map[category_id]["name"]
-                category_icon = category_map[category_id]["icon"]
-            else:
-                # Fallback a config.py
-                category_name = CATEGORIES.get(category_id, category_id)
-                category_icon = get_category_icon(category_id)
-            
-            work = {
-                "work_id": str(row.get("work_id", "")),
-                "title": str(row.get("work_name", "")),  # Usar work_name de BigQuery
-                "work_name": str(row.get("work_name", "")),  # Mantener ambos para compatibilidad
-                "description": str(row.get("description", "")),
-                "short_description": str(row.get("short_description", "")),
-                "category": category_id,
-                "category_name": category_name,
-                "url": str(row.get("work_url", "")),  # Usar work_url de BigQuery
-                "work_url": str(row.get("work_url", "")),  # Mantener ambos para compatibilidad
-                "version": str(row.get("version", "")),
-                "created_date": format_date(row.get("created_date")) if pd.notna(row.get("created_date", pd.NaT)) else "",
-                "status": str(row.get("status", "active")),
-                "status_badge": get_status_badge(str(row.get("status", "active"))),
-                "category_icon": category_icon,
-                "notes": str(row.get("notes", "")),
-            }
-            works.append(work)
-        
+        snapshot = get_catalog_snapshot()
+    except Exception as e:
+        raise_backend_error(e, "Error al obtener trabajos")
+    
+    def build():
+        category_id = resolve_category_id(category, snapshot)
+        works = [work for work in snapshot["works"] if work["category"] == category_id]
+        works = project_works(filter_by_tags(works, snapshot, filters), projection)
         return {"works": works, "count": len(works), "category": category}
+    
+    return catalog_response(request, tag_filtered_snapshot(snapshot, filters),
+                            ("works", category, projection, filters), build)
+
+
+@app.get("/facets")
+def get_facets(category: Optional[str] = None, tag: Optional[List[str]] = Query(None),
+               subcategory: Optional[List[str]] = Query(None), tag_mode: str = "all"):
+    """Conteos por tag y por subcategoría de los trabajos que cumplen los filtros"""
+    filters = parse_tag_filters(tag, subcategory, tag_mode)
+    try:
+        snapshot = get_catalog_snapshot()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener trabajos: {str(e)}")
+        raise_backend_error(e, "Error al obtener facetas")
+    
+    tag_index = snapshot["tag_index"]
+    work_ids = None
+    if category is not None:
+        category_id = resolve_category_id(category, snapshot)
+        work_ids = {work["work_id"] for work in snapshot["works"] if work["category"] == category_id}
+    if filters is not None:
+        matched = tag_index.match(list(filters[0]), list(filters[1]), filters[2])
+        work_ids = matched if work_ids is None else work_ids & matched
+    
+    return {
+        "facets": tag_index.facet_counts(work_ids),
+        "count": len(work_ids) if work_ids is not None else len(tag_index),
+    }
+
+
+@app.get("/app")
+def render_app(request: Request):
+    """Frontend renderizado en el servidor con el catálogo y las categorías embebidos
+    
+    Usa los mismos bytes JSON que /works y pre-renderiza la primera pantalla:
+    el contenido llega en una sola respuesta, sin requests adicionales.
+    """
+    try:
+        snapshot = get_catalog_snapshot()
+    except Exception as e:
+        raise_backend_error(e, "Error al renderizar la página")
+    
+    api_url = str(request.base_url).rstrip("/")
+    
+    def build():
+        works_json = response_cache.get_or_build(
+            ("works", None, None), snapshot["version"], lambda: works_payload(snapshot)
+        )
+        return render_page_shell(
+            works_json, encode_json(snapshot["categories"]),
+            snapshot["works"], snapshot["categories"]["categories"], api_url=api_url
+        )
+    
+    return catalog_response(request, snapshot, ("app", api_url), build,
+                            media_type="text/html; charset=utf-8",
+                            encode=lambda page: page.encode("utf-8"))
+
+
+@app.get("/events")
+async def catalog_events(request: Request):
+    """Stream SSE de cambios del catálogo
+    
+    Eventos: "works" (mismo formato que /works?since=) y "resync" (el cliente
+    debe recargar /works). El id de cada evento es el watermark.
+    """
+    return StreamingResponse(
+        broadcaster.stream(request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @app.get("/categories")
-def get_categories():
-    """Obtener todas las categorías disponibles desde works_categories"""
+def get_categories(request: Request):
+    """Obtener todas las categorías disponibles (desde el snapshot del catálogo)"""
     try:
-        # Intentar obtener categorías desde BigQuery
-        try:
-            from google.cloud import bigquery
-            
-            categories_table_ref = f"{db.project_id}.{db.dataset_id}.works_categories"
-            query = f"""
-            SELECT category_id, category_name, category_icon, description, display_order
-            FROM `{categories_table_ref}`
-            WHERE is_active = true
-            ORDER BY display_order, category_name
-            """
-            result = db.client.query(query).to_dataframe()
-            
-            if not result.empty:
-                categories_list = []
-                for _, row in result.iterrows():
-                    categories_list.append({
-                        "id": str(row.get("category_id", "")),
-                        "name": str(row.get("category_name", "")),
-                        "icon": str(row.get("category_icon", "📊")),
-                        "description": str(row.get("description", "")),
-                        "display_order": int(row.get("display_order", 0)) if pd.notna(row.get("display_order")) else 0
-                    })
-                return {"categories": categories_list, "count": len(categories_list)}
-        except Exception as bq_error:
-            # Fallback: usar CATEGORIES de config.py
-            print(f"⚠️  No se pudo acceder a works_categories, usando fallback: {bq_error}")
-        
-        # Fallback a config.py
-        categories_list = []
-        for cat_id, cat_name in CATEGORIES.items():
-            categories_list.append({
-                "id": cat_id,
-                "name": cat_name,
-                "icon": get_category_icon(cat_id),
-                "description": "",
-                "display_order": 0
-            })
-        
-        return {"categories": categories_list, "count": len(categories_list)}
+        snapshot = get_catalog_snapshot()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener categorías: {str(e)}")
+        raise_backend_error(e, "Error al obtener categorías")
+    
+    return catalog_response(request, snapshot, ("categories",), lambda: snapshot["categories"])
+
+
+@app.get("/stats")
+def get_stats():
+    """Estadísticas del índice: conteos, activaciones/archivados por mes y cambios recientes"""
+    try:
+        return get_statistics(db).snapshot()
+    except Exception as e:
+        raise_backend_error(e, "Error al obtener estadísticas")
+
+
+@app.get("/images/{digest}/{file_name}")
+def get_image(digest: str, file_name: str):
+    """Miniatura de una imagen preview: la ruta incluye el hash, se cachea para siempre"""
+    path = image_store.resolve(f"{digest}/{file_name}")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+    return FileResponse(path, headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
 
 
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "data-science-index-api"}
+    return {
+        "status": "healthy",
+        "service": "data-science-index-api",
+        "bigquery_circuit": "open" if db.circuit_breaker.is_open else "closed"
+    }
 
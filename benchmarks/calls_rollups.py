@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la capa de datos de llamadas: re-agregar crudos vs rollups incrementales
+
+Mide, sobre datos sintéticos:
+  - agregación completa de los crudos (lo que haría cada rerun sin rollups)
+  - primer refresh (construye todos los rollups por bloques)
+  - refresh sin cambios y refresh con un mes nuevo (incremental)
+  - lectura del rollup para servir métricas y gráficos
+
+Uso:
+    python benchmarks/calls_rollups.py [meses] [llamadas_por_mes]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'categories', 'calls_analysis'))
+
+import pandas as pd
+
+from calls_data import CallsRollupStore, aggregate_chunk, monthly_totals, company_totals
+from generate_calls import generate, generate_month
+
+
+def timed(label: str, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<45} {time.perf_counter() - start:>8.3f} s")
+    return result
+
+
+def main():
+    months = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    calls_per_month = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_dir = os.path.join(tmp, "raw")
+        store = CallsRollupStore(raw_dir=raw_dir, rollup_dir=os.path.join(tmp, "rollups"))
+
+        print(f"{months} meses x {calls_per_month:,} llamadas")
+        timed("generar datos sintéticos", lambda: generate(months, calls_per_month, raw_dir))
+
+        def full_aggregation():
+            raw = pd.concat(
+                (pd.read_parquet(os.path.join(raw_dir, name)) for name in sorted(os.listdir(raw_dir))),
+                ignore_index=True
+            )
+            return aggregate_chunk(raw)
+
+        timed("agregación completa de crudos (sin rollups)", full_aggregation)
+        timed("primer refresh (todos los rollups)", store.refresh)
+        timed("refresh sin cambios", store.refresh)
+
+        next_month = pd.Timestamp("2024-01-01") + pd.DateOffset(months=months)
+        generate_month(next_month, calls_per_month, seed=months).to_parquet(
+            os.path.join(raw_dir, f"calls_{next_month:%Y-%m}.parquet"), index=False
+        )
+        result = timed("refresh con un mes nuevo (incremental)", store.refresh)
+        print(f"{'particiones recalculadas':<45} {len(result['changed']):>8}")
+
+        rollup = timed("leer rollup", store.load_rollup)
+        timed("métricas mensuales + por compañía", lambda: (monthly_totals(rollup), company_totals(rollup)))
+        print(f"{'filas del rollup':<45} {len(rollup):>8,}")
+
+
+if __name__ == "__main__":
+    main()
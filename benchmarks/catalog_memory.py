@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memoria del catálogo: DataFrame object-dtype vs CompactCatalog
+
+El catálogo sintético se genera una vez a Parquet (como llega de BigQuery)
+y cada medición corre en un subproceso aislado que solo lo lee y construye
+la representación. Se reporta el RSS del proceso (lo que consume una
+réplica) y el costo por trabajo: crecimiento del RSS sobre el proceso con
+pandas ya importado, dividido por la cantidad de trabajos.
+
+Modos:
+    dataframe       representación anterior: SELECT *, object dtype y una copia por sesión
+    dataframe-lean  línea base comparable: sin description/notes y un solo objeto compartido
+    compact         CompactCatalog con las mismas columnas que dataframe-lean
+
+Resultados (Python 3.11, pandas 3.0.6, pyarrow 26.0.0, Linux x86_64;
+RSS base del proceso con pandas cargado ≈ 100 MB):
+
+      trabajos  representación   RSS (MB)  estructura (MB)  por trabajo (KB)
+        10,000       dataframe      209.0             59.7             10.33
+        10,000  dataframe-lean      154.4             14.3              4.76
+        10,000         compact      153.4              4.4              4.64
+       100,000       dataframe      862.4            597.4              7.73
+       100,000  dataframe-lean      359.4            143.3              2.58
+       100,000         compact      297.3             44.4              1.94
+
+La mayor parte de la baja desde dataframe (862 MB con 100k trabajos) viene
+de no descargar los textos largos ni copiar el catálogo por sesión
+(dataframe-lean, 359 MB). La ganancia propia de CompactCatalog frente a
+dataframe-lean es 359 -> 297 MB de RSS (2.6 -> 1.9 KB por trabajo) y 3x
+menos en la estructura (143 -> 44 MB); con 10k trabajos es despreciable.
+La diferencia entre estructura y crecimiento del RSS son temporales de la
+lectura y la construcción que el asignador no devuelve al sistema.
+
+Uso:
+    python benchmarks/catalog_memory.py            # 10k y 100k trabajos
+    python benchmarks/catalog_memory.py 10000 50000
+"""
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+SIZES = [10_000, 100_000]
+MODES = ["dataframe", "dataframe-lean", "compact"]
+
+CATEGORIES = ["calls_analysis", "marketing_analysis", "climate_analysis",
+              "accounting_analysis", "workforce_analysis"]
+STATUSES = ["active", "paused", "archived", "maintenance"]
+VERSIONS = ["1.0", "1.1", "1.2", "2.0", "2.1", "3.0"]
+WORDS = ["análisis", "llamadas", "modelo", "predictivo", "series", "tiempo",
+         "compañía", "clima", "ventas", "marketing", "personal", "costos"]
+
+
+def generate_works(n: int, seed: int = 42):
+    """Generar un DataFrame sintético con el esquema de works_index"""
+    import pandas as pd
+
+    rng = random.Random(seed)
+    now = pd.Timestamp("2025-01-01", tz="UTC")
+    rows = []
+    for i in range(n):
+        name = " ".join(rng.choices(WORDS, k=3)).title()
+        work_id = f"{name.lower().replace(' ', '-')}-{i:07d}"
+        rows.append({
+            "work_id": work_id,
+            "work_name": name,
+            "work_slug": work_id,
+            "category": rng.choice(CATEGORIES),
+            "subcategory": rng.choice(["", "mensual", "diario", "por compañía"]),
+            "status": rng.choice(STATUSES),
+            "version": rng.choice(VERSIONS),
+            "is_latest": True,
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(80, 200))),
+            "short_description": " ".join(rng.choices(WORDS, k=12)),
+            "image_preview_url": "",
+            "created_date": now - pd.Timedelta(minutes=i),
+            "updated_date": now - pd.Timedelta(minutes=i),
+            "streamlit_page": f"categories/{rng.choice(CATEGORIES)}/dashboard.py",
+            "work_url": f"https://dashboards.example.com/{work_id}",
+            "config_json": "{}",
+            "notes": " ".join(rng.choices(WORDS, k=rng.randint(20, 60))),
+            "tags": rng.sample(WORDS, k=3),
+        })
+    return pd.DataFrame(rows)
+
+
+def current_rss_bytes() -> int:
+    """RSS actual del proceso (Linux, /proc/self/statm)"""
+    with open("/proc/self/statm") as f:
+        resident_pages = int(f.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def run_child(mode: str, path: str):
+    """Construir una representación y reportar RSS (se ejecuta en subproceso)"""
+    import gc
+    import pandas  # noqa: F401 (RSS base con pandas cargado, igual en ambos modos)
+
+    import pyarrow.parquet as pq
+    from catalog import CompactCatalog, HEAVY_TEXT_COLUMNS
+    gc.collect()
+    baseline = current_rss_bytes()
+    # Columnas sin los textos largos (los modos lean y compact no los descargan)
+    columns = [column for column in pq.read_schema(path).names if column not in HEAVY_TEXT_COLUMNS]
+
+    if mode == "dataframe":
+        # Representación anterior: SELECT *, object dtype y copia por sesión
+        catalog = pandas.read_parquet(path).astype(object)
+        session_copy = catalog.copy()
+        structure_bytes = 2 * int(catalog.memory_usage(deep=True).sum())
+    elif mode == "dataframe-lean":
+        # Línea base comparable con compact: mismas columnas y un solo objeto compartido
+        catalog = pandas.read_parquet(path, columns=columns).astype(object)
+        session_copy = catalog
+        structure_bytes = int(catalog.memory_usage(deep=True).sum())
+    else:
+        # Los textos largos no se descargan: se cargan bajo demanda por trabajo
+        catalog = CompactCatalog(pandas.read_parquet(path, columns=columns))
+        session_copy = catalog  # Compartido entre sesiones, sin copia
+        structure_bytes = catalog.memory_usage()
+
+    gc.collect()
+    print(f"{current_rss_bytes()} {baseline} {structure_bytes}")
+    return catalog, session_copy
+
+
+def main():
+    if len(sys.argv) >= 4 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], sys.argv[3])
+        return
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print(f"{'trabajos':>10} {'representación':>15} {'RSS (MB)':>10} {'estructura (MB)':>16} {'por trabajo (KB)':>17}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f"works-{n}.parquet")
+            generate_works(n).to_parquet(path, index=False)
+            for mode in MODES:
+                output = subprocess.run(
+                    [sys.executable, __file__, "--child", mode, path],
+                    capture_output=True, text=True, check=True
+                ).stdout.split()
+                rss, baseline, structure_bytes = int(output[0]), int(output[1]), int(output[2])
+                per_work = (rss - baseline) / n / 1024
+                print(f"{n:>10,} {mode:>15} {rss / 1024 / 1024:>10.1f} {structure_bytes / 1024 / 1024:>16.1f} {per_work:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
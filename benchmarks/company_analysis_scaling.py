@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Escalamiento del análisis por compañía: 1 a N procesos sobre datos sintéticos
+
+Genera llamadas para cientos de compañías, las particiona por compañía y
+mide CompanyAnalysisRunner sin caché con 1, 2, 4, ... núcleos, más una
+corrida con caché y una tras agregar un mes nuevo (invalidación).
+
+Resultados con los valores por defecto (300 compañías, 6,000,000 llamadas;
+Python 3.11, pandas 3.0.6, Linux x86_64). El host de la medición tenía un
+solo núcleo, así que 2 y 4 procesos están sobresuscritos: la tabla muestra
+el costo del pool y no el speedup, que debe medirse en un host multinúcleo
+con el mismo comando.
+
+     procesos  tiempo (s)  speedup
+            1      14.898    1.00x
+            2      15.792    0.94x
+            4      20.416    0.73x
+    con caché (sin cambios)           0.061 s
+    con caché (5 compañías nuevas)    0.332 s
+
+Con un núcleo el costo del pool es ~6% con 2 procesos; la caché por
+compañía reduce una corrida sin cambios de ~15 s a 0.06 s y una con 5
+compañías nuevas a 0.33 s.
+
+Uso:
+    python benchmarks/company_analysis_scaling.py [compañías] [meses] [llamadas_por_mes]
+    DSI_BENCH_WORKERS=1,2,4 python benchmarks/company_analysis_scaling.py   # procesos a medir
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'categories', 'calls_analysis'))
+
+import pandas as pd
+
+from calls_data import CallsRollupStore
+from company_analysis import CompanyAnalysisRunner
+from generate_calls import generate, generate_month
+
+
+def worker_counts():
+    """1, 2, 4, ... hasta los núcleos disponibles (o DSI_BENCH_WORKERS=1,2,4)"""
+    if os.getenv("DSI_BENCH_WORKERS"):
+        return [int(count) for count in os.environ["DSI_BENCH_WORKERS"].split(",")]
+    cpus = os.cpu_count() or 1
+    counts, n = [], 1
+    while n < cpus:
+        counts.append(n)
+        n *= 2
+    return counts + [cpus]
+
+
+def main():
+    companies = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    months = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    calls_per_month = int(sys.argv[3]) if len(sys.argv) > 3 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_dir = os.path.join(tmp, "raw")
+        store = CallsRollupStore(raw_dir=raw_dir, rollup_dir=os.path.join(tmp, "rollups"))
+        generate(months, calls_per_month, raw_dir, companies=companies)
+        store.refresh()
+
+        print(f"{companies} compañías, {months * calls_per_month:,} llamadas, {os.cpu_count()} núcleos")
+        print(f"{'procesos':>9} {'tiempo (s)':>11} {'speedup':>8}")
+        baseline = None
+        for workers in worker_counts():
+            runner = CompanyAnalysisRunner(store, max_workers=workers)
+            start = time.perf_counter()
+            runner.run(use_cache=False)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{workers:>9} {elapsed:>11.3f} {baseline / elapsed:>7.2f}x")
+
+        runner = CompanyAnalysisRunner(store)
+        runner.run()
+        start = time.perf_counter()
+        runner.run()
+        print(f"{'con caché (sin cambios)':<30} {time.perf_counter() - start:>8.3f} s")
+
+        # Un mes nuevo con pocas compañías: solo esas se recalculan
+        next_month = pd.Timestamp("2024-01-01") + pd.DateOffset(months=months)
+        generate_month(next_month, calls_per_month // 100, seed=months, companies=5).to_parquet(
+            os.path.join(raw_dir, f"calls_{next_month:%Y-%m}.parquet"), index=False
+        )
+        store.refresh()
+        start = time.perf_counter()
+        runner.run()
+        print(f"{'con caché (5 compañías nuevas)':<30} {time.perf_counter() - start:>8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
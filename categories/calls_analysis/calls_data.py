@@ -0,0 +1,346 @@
+"""
+Capa de datos del análisis de llamadas
+
+Los registros de llamadas crudos se leen por bloques (nunca el archivo
+completo en memoria) y se agregan a rollups por mes y compañía, guardados
+localmente en Parquet. Cada archivo crudo es una partición: solo se
+recalculan las particiones nuevas o modificadas. Las páginas de Streamlit
+leen únicamente los rollups. Además, cada bloque se particiona por compañía
+para el análisis individual (company_analysis.py).
+
+Esquema de los registros crudos (CSV o Parquet):
+    call_id, company, call_start, duration_seconds, answered
+
+Si CALLS_ANALYSIS_CONFIG["bigquery_table"] está definido, los registros se
+leen de esa tabla (mismo esquema): el rollup y las llamadas de cada compañía
+son consultas de BigQuery que pasan por la caché de resultados en disco
+(WorksDatabase.run_cached_query) y solo se vuelven a ejecutar cuando cambia
+la tabla.
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
+
+from config import CALLS_ANALYSIS_CONFIG
+
+CALL_COLUMNS = ["call_id", "company", "call_start", "duration_seconds", "answered"]
+ROLLUP_KEYS = ["month", "company"]
+ROLLUP_COLUMNS = ROLLUP_KEYS + ["calls", "answered_calls", "total_duration_seconds"]
+RAW_EXTENSIONS = (".parquet", ".csv")
+MANIFEST_NAME = "manifest.json"
+
+# Un lock por ruta compartido por todo el proceso: las páginas crean un store
+# nuevo en cada rerun, así que un lock por instancia no serializa las sesiones
+_path_locks: Dict[str, threading.Lock] = {}
+_path_locks_guard = threading.Lock()
+
+
+def path_lock(path: str) -> threading.Lock:
+    """Lock del proceso para una ruta (el mismo para todas las instancias)"""
+    path = os.path.abspath(path)
+    with _path_locks_guard:
+        return _path_locks.setdefault(path, threading.Lock())
+
+
+def _tmp_path(path: str) -> str:
+    """Temporal único por proceso e hilo, para escribir y renombrar atómicamente"""
+    return f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+
+
+def iter_call_chunks(path: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Leer un archivo de llamadas en bloques de chunk_rows filas"""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=CALL_COLUMNS[1:]):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(
+            path,
+            usecols=CALL_COLUMNS[1:],
+            parse_dates=["call_start"],
+            chunksize=chunk_rows
+        )
+
+
+def company_slug(company: str) -> str:
+    """Nombre de directorio seguro y sin colisiones para una compañía"""
+    digest = hashlib.sha1(company.encode("utf-8")).hexdigest()[:8]
+    return f"{re.sub(r'[^a-zA-Z0-9_-]', '_', company)[:40]}-{digest}"
+
+
+def aggregate_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Agregar un bloque de llamadas a (mes, compañía)"""
+    call_start = pd.to_datetime(chunk["call_start"], utc=True)
+    frame = pd.DataFrame({
+        "month": call_start.dt.tz_localize(None).dt.to_period("M").dt.to_timestamp(),
+        "company": chunk["company"].astype(str),
+        "calls": 1,
+        "answered_calls": chunk["answered"].astype(bool).astype("int64"),
+        "total_duration_seconds": chunk["duration_seconds"].fillna(0).astype("int64"),
+    })
+    return frame.groupby(ROLLUP_KEYS, as_index=False, sort=False).sum()
+
+
+def combine_rollups(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Sumar rollups parciales (de bloques o de particiones)"""
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    return pd.concat(frames, ignore_index=True).groupby(ROLLUP_KEYS, as_index=False).sum()
+
+
+class CallsRollupStore:
+    """Rollups mensuales por compañía, persistidos en Parquet e incrementales
+    
+    El manifest guarda (mtime, tamaño) de cada archivo crudo ya procesado; un
+    refresh solo vuelve a leer los archivos nuevos o modificados y borra los
+    rollups de archivos eliminados.
+    """
+    
+    def __init__(self, raw_dir: Optional[str] = None, rollup_dir: Optional[str] = None,
+                 chunk_rows: Optional[int] = None):
+        self.raw_dir = os.path.abspath(raw_dir or CALLS_ANALYSIS_CONFIG["raw_dir"])
+        self.rollup_dir = os.path.abspath(rollup_dir or CALLS_ANALYSIS_CONFIG["rollup_dir"])
+        self.chunk_rows = chunk_rows or CALLS_ANALYSIS_CONFIG["chunk_rows"]
+    
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.rollup_dir, MANIFEST_NAME)
+    
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    def _save_manifest(self, manifest: Dict[str, Dict]):
+        os.makedirs(self.rollup_dir, exist_ok=True)
+        tmp_path = _tmp_path(self.manifest_path)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def raw_partitions(self) -> Dict[str, Dict]:
+        """Archivos crudos disponibles: nombre -> {mtime, size}"""
+        if not os.path.isdir(self.raw_dir):
+            return {}
+        partitions = {}
+        for name in sorted(os.listdir(self.raw_dir)):
+            if name.endswith(RAW_EXTENSIONS):
+                stat = os.stat(os.path.join(self.raw_dir, name))
+                partitions[name] = {"mtime": stat.st_mtime, "size": stat.st_size}
+        return partitions
+    
+    def _rollup_path(self, partition: str) -> str:
+        return os.path.join(self.rollup_dir, "partitions", f"{partition}.parquet")
+    
+    def refresh(self) -> Dict[str, List[str]]:
+        """Recalcular solo las particiones nuevas/modificadas; retorna qué cambió
+        
+        Un refresh por directorio de rollups a la vez: las sesiones que llegan
+        mientras otra procesa esperan y luego encuentran el manifest al día.
+        """
+        with path_lock(self.rollup_dir):
+            manifest = self._load_manifest()
+            partitions = self.raw_partitions()
+            
+            changed = [
+                name for name, signature in partitions.items()
+                if manifest.get(name) != signature
+                or not os.path.exists(self._rollup_path(name))
+                or not os.path.isdir(self.company_dir)
+            ]
+            removed = [name for name in manifest if name not in partitions]
+            
+            for name in changed:
+                path = os.path.join(self.raw_dir, name)
+                self._remove_company_files(name)
+                partials = []
+                for chunk_index, chunk in enumerate(iter_call_chunks(path, self.chunk_rows)):
+                    partials.append(aggregate_chunk(chunk))
+                    self._write_company_files(name, chunk_index, chunk)
+                rollup = combine_rollups(partials)
+                
+                rollup_path = self._rollup_path(name)
+                os.makedirs(os.path.dirname(rollup_path), exist_ok=True)
+                tmp_path = _tmp_path(rollup_path)
+                rollup.to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, rollup_path)
+                manifest[name] = partitions[name]
+            
+            for name in removed:
+                if os.path.exists(self._rollup_path(name)):
+                    os.remove(self._rollup_path(name))
+                self._remove_company_files(name)
+                manifest.pop(name)
+            
+            if changed or removed:
+                self._save_manifest(manifest)
+            return {"changed": changed, "removed": removed}
+    
+    @property
+    def company_dir(self) -> str:
+        return os.path.join(self.rollup_dir, "by_company")
+    
+    def company_path(self, company: str) -> str:
+        """Directorio con las llamadas de una compañía (un archivo por partición y bloque)"""
+        return os.path.join(self.company_dir, company_slug(company))
+    
+    def company_files(self, company: str) -> List[str]:
+        path = self.company_path(company)
+        if not os.path.isdir(path):
+            return []
+        return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".parquet"))
+    
+    def load_company_calls(self, company: str) -> pd.DataFrame:
+        """Llamadas de una compañía ordenadas por inicio"""
+        files = self.company_files(company)
+        if not files:
+            return pd.DataFrame(columns=CALL_COLUMNS[2:] + ["call_start"])
+        calls = pd.concat([pd.read_parquet(path) for path in files], ignore_index=True)
+        return calls.sort_values("call_start", ignore_index=True)
+    
+    def _write_company_files(self, partition: str, chunk_index: int, chunk: pd.DataFrame):
+        """Particionar un bloque por compañía para el análisis individual"""
+        for company, group in chunk.groupby(chunk["company"].astype(str), sort=False):
+            path = self.company_path(company)
+            os.makedirs(path, exist_ok=True)
+            # El directorio ya identifica a la compañía
+            group.drop(columns="company").to_parquet(
+                os.path.join(path, f"{partition}.{chunk_index:05d}.parquet"), index=False
+            )
+    
+    def _remove_company_files(self, partition: str):
+        if not os.path.isdir(self.company_dir):
+            return
+        for company in os.listdir(self.company_dir):
+            path = os.path.join(self.company_dir, company)
+            for name in os.listdir(path):
+                if name.startswith(f"{partition}."):
+                    os.remove(os.path.join(path, name))
+    
+    def version(self) -> str:
+        """Identificador de los rollups vigentes (cambia solo si cambió alguna partición)"""
+        manifest = self._load_manifest()
+        return json.dumps(manifest, sort_keys=True)
+    
+    def load_rollup(self) -> pd.DataFrame:
+        """Rollup (mes, compañía) de todas las particiones procesadas"""
+        manifest = self._load_manifest()
+        frames = [
+            pd.read_parquet(self._rollup_path(name))
+            for name in manifest if os.path.exists(self._rollup_path(name))
+        ]
+        return combine_rollups(frames).sort_values(ROLLUP_KEYS, ignore_index=True)
+
+
+class BigQueryCallsSource:
+    """Registros de llamadas en una tabla de BigQuery, con la interfaz de CallsRollupStore
+    
+    Las agregaciones se hacen en BigQuery y sus resultados se reutilizan desde
+    la caché de consultas hasta que la tabla se modifique. El análisis por
+    compañía (company_analysis.py) necesita las particiones locales y no está
+    disponible con esta fuente.
+    """
+    
+    def __init__(self, table: Optional[str] = None, db=None):
+        from database import WorksDatabase
+        
+        self.table = table or CALLS_ANALYSIS_CONFIG["bigquery_table"]
+        self.db = db or WorksDatabase()
+    
+    def refresh(self) -> Dict[str, List[str]]:
+        # Nada que procesar localmente: la tabla es la fuente
+        return {"changed": [], "removed": []}
+    
+    def version(self) -> str:
+        """Fecha de modificación de la tabla (cambia con cada carga de registros)"""
+        from database import get_query_cache
+        
+        return get_query_cache(self.db.client).table_modified(self.table)
+    
+    def load_rollup(self) -> pd.DataFrame:
+        """Rollup (mes, compañía) agregado en BigQuery"""
+        query = f"""
+        SELECT
+            TIMESTAMP(DATE_TRUNC(DATE(call_start), MONTH)) AS month,
+            CAST(company AS STRING) AS company,
+            COUNT(*) AS calls,
+            COUNTIF(answered) AS answered_calls,
+            SUM(IFNULL(duration_seconds, 0)) AS total_duration_seconds
+        FROM `{self.table}`
+        GROUP BY month, company
+        """
+        rollup = self.db.run_cached_query(query, tables=[self.table])
+        if rollup.empty:
+            return pd.DataFrame(columns=ROLLUP_COLUMNS)
+        # Mismo formato que los rollups locales (mes sin zona horaria)
+        rollup["month"] = pd.to_datetime(rollup["month"], utc=True).dt.tz_localize(None)
+        return rollup[ROLLUP_COLUMNS].sort_values(ROLLUP_KEYS, ignore_index=True)
+    
+    def load_company_calls(self, company: str) -> pd.DataFrame:
+        """Llamadas de una compañía ordenadas por inicio"""
+        from google.cloud import bigquery
+        
+        query = f"""
+        SELECT call_start, duration_seconds, answered
+        FROM `{self.table}`
+        WHERE company = @company
+        ORDER BY call_start
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ScalarQueryParameter("company", "STRING", company)]
+        )
+        return self.db.run_cached_query(query, job_config=job_config, tables=[self.table])
+
+
+def open_calls_store():
+    """Fuente de llamadas configurada: tabla de BigQuery o archivos crudos locales"""
+    if CALLS_ANALYSIS_CONFIG["bigquery_table"]:
+        return BigQueryCallsSource()
+    return CallsRollupStore()
+
+
+def monthly_totals(rollup: pd.DataFrame) -> pd.DataFrame:
+    """Totales por mes (todas las compañías)"""
+    monthly = rollup.groupby("month", as_index=False)[ROLLUP_COLUMNS[2:]].sum()
+    return _with_rates(monthly.sort_values("month", ignore_index=True))
+
+
+def company_totals(rollup: pd.DataFrame, months: Optional[List[pd.Timestamp]] = None) -> pd.DataFrame:
+    """Totales por compañía, opcionalmente restringidos a algunos meses"""
+    if months:
+        rollup = rollup[rollup["month"].isin(months)]
+    companies = rollup.groupby("company", as_index=False)[ROLLUP_COLUMNS[2:]].sum()
+    return _with_rates(companies.sort_values("calls", ascending=False, ignore_index=True))
+
+
+def _with_rates(df: pd.DataFrame) -> pd.DataFrame:
+    """Agregar tasa de atención y duración media (derivadas de las sumas)"""
+    df = df.copy()
+    calls = df["calls"].where(df["calls"] > 0)
+    df["answer_rate"] = (df["answered_calls"] / calls).fillna(0.0)
+    df["avg_duration_seconds"] = (df["total_duration_seconds"] / df["answered_calls"].where(df["answered_calls"] > 0)).fillna(0.0)
+    return df
+
+
+def refresh_rollup(store=None) -> str:
+    """Procesar las particiones nuevas y retornar la versión vigente del rollup
+    
+    Las páginas cachean el rollup por esta versión (st.cache_data): en un
+    rerun sin datos nuevos solo se listan los archivos crudos (o se lee la
+    fecha de modificación de la tabla).
+    """
+    store = store or open_calls_store()
+    store.refresh()
+    return store.version()
@@ -0,0 +1,131 @@
+"""
+Análisis individual por compañía, en paralelo y con caché por compañía
+
+Las llamadas ya vienen particionadas por compañía (CallsRollupStore). Cada
+compañía se analiza de forma independiente y vectorizada; las compañías se
+reparten entre procesos para usar todos los núcleos. El resultado de cada
+compañía se guarda con la firma de sus archivos y solo se recalcula cuando
+esos archivos cambian.
+"""
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from calls_data import CallsRollupStore, path_lock
+from config import CALLS_ANALYSIS_CONFIG
+
+CACHE_NAME = "company_analysis.json"
+WEEKDAYS = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+
+
+def analyze_company(company: str, files: List[str]) -> Dict:
+    """Métricas de una compañía a partir de sus llamadas (se ejecuta en un proceso del pool)"""
+    calls = pd.concat([pd.read_parquet(path) for path in files], ignore_index=True)
+    call_start = pd.to_datetime(calls["call_start"], utc=True)
+    answered = calls["answered"].to_numpy(dtype=bool)
+    durations = calls["duration_seconds"].to_numpy()[answered]
+    
+    hourly = np.bincount(call_start.dt.hour.to_numpy(), minlength=24)
+    weekly = np.bincount(call_start.dt.weekday.to_numpy(), minlength=7)
+    daily = call_start.dt.floor("D").value_counts()
+    
+    return {
+        "company": company,
+        "calls": int(len(calls)),
+        "answered_calls": int(answered.sum()),
+        "answer_rate": float(answered.mean()) if len(calls) else 0.0,
+        "p50_duration_seconds": float(np.percentile(durations, 50)) if len(durations) else 0.0,
+        "p90_duration_seconds": float(np.percentile(durations, 90)) if len(durations) else 0.0,
+        "peak_hour": int(hourly.argmax()),
+        "peak_weekday": WEEKDAYS[int(weekly.argmax())],
+        "daily_mean_calls": float(daily.mean()) if len(daily) else 0.0,
+        "daily_std_calls": float(daily.std(ddof=0)) if len(daily) else 0.0,
+        "hourly_calls": hourly.tolist(),
+    }
+
+
+def _analyze_task(args) -> Dict:
+    return analyze_company(*args)
+
+
+class CompanyAnalysisRunner:
+    """Ejecuta analyze_company para todas las compañías con caché por compañía
+    
+    La firma de una compañía es el hash de (nombre, mtime, tamaño) de sus
+    archivos: si una partición nueva trae llamadas de esa compañía la firma
+    cambia y solo esa compañía se recalcula.
+    """
+    
+    def __init__(self, store: Optional[CallsRollupStore] = None, max_workers: Optional[int] = None):
+        self.store = store or CallsRollupStore()
+        self.max_workers = max_workers or CALLS_ANALYSIS_CONFIG["analysis_workers"] or os.cpu_count() or 1
+    
+    @property
+    def cache_path(self) -> str:
+        return os.path.join(self.store.rollup_dir, CACHE_NAME)
+    
+    def _load_cache(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.cache_path):
+            return {}
+        with open(self.cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    def _save_cache(self, cache: Dict[str, Dict]):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, self.cache_path)
+    
+    @staticmethod
+    def signature(files: List[str]) -> str:
+        stats = [(os.path.basename(path), os.path.getmtime(path), os.path.getsize(path)) for path in files]
+        return hashlib.sha1(json.dumps(stats).encode("utf-8")).hexdigest()
+    
+    def run(self, companies: Optional[List[str]] = None, use_cache: bool = True) -> pd.DataFrame:
+        """Analizar las compañías pedidas (por defecto todas las del rollup)"""
+        with path_lock(self.cache_path):
+            if companies is None:
+                rollup = self.store.load_rollup()
+                companies = sorted(rollup["company"].unique().tolist())
+            
+            cache = self._load_cache() if use_cache else {}
+            results: Dict[str, Dict] = {}
+            pending = []
+            signatures = {}
+            for company in companies:
+                files = self.store.company_files(company)
+                if not files:
+                    continue
+                signatures[company] = self.signature(files)
+                cached = cache.get(company)
+                if cached and cached["signature"] == signatures[company]:
+                    results[company] = cached["metrics"]
+                else:
+                    pending.append((company, files))
+            
+            for metrics in self._analyze(pending):
+                company = metrics["company"]
+                results[company] = metrics
+                cache[company] = {"signature": signatures[company], "metrics": metrics}
+            
+            if pending and use_cache:
+                self._save_cache(cache)
+            
+            return pd.DataFrame([results[company] for company in companies if company in results])
+    
+    def _analyze(self, pending):
+        """Una compañía por tarea; con un solo worker se evita el costo del pool"""
+        if not pending:
+            return []
+        if self.max_workers <= 1 or len(pending) == 1:
+            return [_analyze_task(task) for task in pending]
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+            chunksize = max(1, len(pending) // (self.max_workers * 4))
+            return list(pool.map(_analyze_task, pending, chunksize=chunksize))
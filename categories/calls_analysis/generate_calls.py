@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Generador de registros de llamadas sintéticos (un archivo Parquet por mes)
+
+Uso:
+    python categories/calls_analysis/generate_calls.py [meses] [llamadas_por_mes] [compañías] [directorio]
+    python categories/calls_analysis/generate_calls.py 12 1000000 300
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
+
+from config import CALLS_ANALYSIS_CONFIG
+
+DEFAULT_COMPANIES = 12
+
+
+def company_names(companies: int) -> list:
+    return [f"Compañía {i + 1:03d}" for i in range(companies)]
+
+
+def generate_month(month: pd.Timestamp, calls: int, seed: int = 0,
+                   companies: int = DEFAULT_COMPANIES) -> pd.DataFrame:
+    """Llamadas de un mes con volumen, tasa de atención y duración distintas por compañía"""
+    rng = np.random.default_rng(seed)
+    names = company_names(companies)
+    weights = rng.dirichlet(np.ones(companies) * 2)
+    company_codes = rng.choice(companies, size=calls, p=weights)
+    # Tasas fijas por compañía (misma semilla en todos los meses)
+    answer_rates = np.random.default_rng(companies).uniform(0.7, 0.97, size=companies)
+    
+    seconds_in_month = int((month + pd.offsets.MonthBegin(1) - month).total_seconds())
+    offsets = np.sort(rng.integers(0, seconds_in_month, size=calls))
+    answered = rng.random(calls) < answer_rates[company_codes]
+    durations = np.where(answered, rng.gamma(2.0, 90.0, size=calls).astype("int64"), 0)
+    
+    return pd.DataFrame({
+        "call_id": [f"{month:%Y%m}-{i:09d}" for i in range(calls)],
+        "company": pd.Categorical.from_codes(company_codes, categories=names),
+        "call_start": month.tz_localize("UTC") + pd.to_timedelta(offsets, unit="s"),
+        "duration_seconds": durations,
+        "answered": answered,
+    })
+
+
+def generate(months: int, calls_per_month: int, output_dir: str, start: str = "2024-01-01",
+             companies: int = DEFAULT_COMPANIES) -> list:
+    """Escribir un archivo calls_YYYY-MM.parquet por mes y retornar las rutas"""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for i, month in enumerate(pd.date_range(start, periods=months, freq="MS")):
+        path = os.path.join(output_dir, f"calls_{month:%Y-%m}.parquet")
+        generate_month(month, calls_per_month, seed=i, companies=companies).to_parquet(path, index=False)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    months = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    calls_per_month = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    companies = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_COMPANIES
+    output_dir = sys.argv[4] if len(sys.argv) > 4 else CALLS_ANALYSIS_CONFIG["raw_dir"]
+    paths = generate(months, calls_per_month, output_dir, companies=companies)
+    print(f"✅ {len(paths)} archivos ({months * calls_per_month:,} llamadas) en {os.path.abspath(output_dir)}")
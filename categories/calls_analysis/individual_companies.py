@@ -6,6 +6,10 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from calls_data import CallsRollupStore, open_calls_store, refresh_rollup, company_totals, monthly_totals
+from company_analysis import CompanyAnalysisRunner
+from charts import line_figure, plot_cached
+
 # Configuración de la página
 st.set_page_config(
     page_title="Análisis de Llamadas - Compañías Individuales",
@@ -13,31 +17,50 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_rollup(version: str) -> pd.DataFrame:
+    """Rollup (mes, compañía) cacheado por versión de los datos"""
+    return open_calls_store().load_rollup()
+
+@st.cache_data(show_spinner="Analizando compañías...", max_entries=2)
+def load_company_analysis(version: str) -> pd.DataFrame:
+    """Análisis individual de todas las compañías (en paralelo, caché por compañía)"""
+    store = open_calls_store()
+    if not isinstance(store, CallsRollupStore):
+        # Requiere las particiones locales por compañía
+        return pd.DataFrame()
+    return CompanyAnalysisRunner(store).run()
+
 def main():
     """Función principal del análisis de llamadas individuales"""
     
     st.title("📞 Análisis de Llamadas por Compañía")
     st.markdown("*Análisis detallado de llamadas para cada compañía individual*")
     
-    # Placeholder para el análisis real
-    st.info("🚧 Este es un template para el análisis de llamadas por compañía individual.")
-    st.info("Aquí se integrará el código de análisis existente.")
+    # Rollups por compañía y mes (solo se procesan archivos crudos nuevos)
+    try:
+        data_version = refresh_rollup()
+        rollup = load_rollup(data_version)
+    except Exception as e:
+        st.error(f"❌ Error al procesar los registros de llamadas: {str(e)}")
+        return
     
-    # Ejemplo de gráfico placeholder
-    st.subheader("📊 Ejemplo de Visualización")
+    if rollup.empty:
+        st.info("No hay registros de llamadas. Genera datos de prueba con "
+                "`python categories/calls_analysis/generate_calls.py`.")
+        return
     
-    # Datos de ejemplo
-    companies = ['Compañía A', 'Compañía B', 'Compañía C', 'Compañía D']
-    calls = [1200, 980, 1450, 1100]
+    companies = company_totals(rollup)
+    # Figuras cacheadas por versión de los rollups (data_version)
     
-    fig = px.bar(
-        x=companies, 
-        y=calls,
+    st.subheader("📊 Llamadas por Compañía")
+    
+    plot_cached("calls_by_company", data_version, lambda: px.bar(
+        x=companies["company"], 
+        y=companies["calls"],
         title="Llamadas por Compañía",
         labels={'x': 'Compañía', 'y': 'Número de Llamadas'}
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    ))
     
     # Información adicional
     col1, col2, col3 = st.columns(3)
@@ -46,10 +69,79 @@ def main():
         st.metric("Total Compañías", len(companies))
     
     with col2:
-        st.metric("Total Llamadas", sum(calls))
+        st.metric("Total Llamadas", f"{companies['calls'].sum():,}")
+    
+    with col3:
+        st.metric("Promedio por Compañía", f"{companies['calls'].mean():,.0f}")
+    
+    # Detalle de una compañía
+    st.subheader("🏢 Detalle por Compañía")
+    company = st.selectbox("Compañía:", companies["company"].tolist())
+    
+    company_monthly = monthly_totals(rollup[rollup["company"] == company])
+    company_row = companies[companies["company"] == company].iloc[0]
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Llamadas", f"{company_row['calls']:,}")
+    
+    with col2:
+        st.metric("Tasa de Atención", f"{company_row['answer_rate'] * 100:.1f}%")
     
     with col3:
-        st.metric("Promedio por Compañía", round(sum(calls)/len(companies), 0))
+        st.metric("Duración Media", f"{company_row['avg_duration_seconds']:.0f} s")
+    
+    # Análisis individual: solo se recalculan las compañías con datos nuevos
+    analysis = load_company_analysis(data_version)
+    company_analysis = analysis[analysis["company"] == company] if not analysis.empty else analysis
+    if not company_analysis.empty:
+        row = company_analysis.iloc[0]
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("Duración p50 / p90", f"{row['p50_duration_seconds']:.0f} s / {row['p90_duration_seconds']:.0f} s")
+        
+        with col2:
+            st.metric("Hora Pico", f"{row['peak_hour']:02d}:00 ({row['peak_weekday']})")
+        
+        with col3:
+            st.metric("Llamadas por Día", f"{row['daily_mean_calls']:,.0f} ± {row['daily_std_calls']:,.0f}")
+        
+        plot_cached("calls_company_hourly", data_version, lambda: px.bar(
+            x=list(range(24)),
+            y=row["hourly_calls"],
+            title=f"Distribución Horaria - {company}",
+            labels={'x': 'Hora', 'y': 'Número de Llamadas'}
+        ), company=company)
+    
+    def build_monthly_figure():
+        fig_company = go.Figure()
+        fig_company.add_trace(go.Scatter(
+            x=company_monthly["month"].dt.strftime("%Y-%m"),
+            y=company_monthly["calls"],
+            mode="lines+markers",
+            name=company
+        ))
+        fig_company.update_layout(title=f"Evolución Mensual - {company}", xaxis_title="Mes", yaxis_title="Número de Llamadas")
+        return fig_company
+    
+    plot_cached("calls_company_monthly", data_version, build_monthly_figure, company=company)
+    
+    # Duración de cada llamada atendida: cientos de miles de puntos reducidos a
+    # un presupuesto fijo con min-max (conserva las llamadas más largas)
+    def build_duration_figure():
+        calls = open_calls_store().load_company_calls(company)
+        calls = calls[calls["answered"].astype(bool)]
+        return line_figure(
+            calls["call_start"],
+            calls["duration_seconds"],
+            title=f"Duración por Llamada - {company}",
+            labels={'x': 'Inicio', 'y': 'Duración (s)'},
+            method="minmax"
+        )
+    
+    plot_cached("calls_company_durations", data_version, build_duration_figure, company=company, method="minmax")
 
 if __name__ == "__main__":
     main()
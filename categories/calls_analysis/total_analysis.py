@@ -6,6 +6,9 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from calls_data import open_calls_store, refresh_rollup, monthly_totals
+from charts import line_figure, plot_cached
+
 # Configuración de la página
 st.set_page_config(
     page_title="Análisis Total de Llamadas",
@@ -13,46 +16,75 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_rollup(version: str) -> pd.DataFrame:
+    """Rollup (mes, compañía) cacheado por versión de los datos"""
+    return open_calls_store().load_rollup()
+
 def main():
     """Función principal del análisis total de llamadas"""
     
     st.title("📊 Análisis Total de Llamadas")
     st.markdown("*Análisis consolidado de todas las llamadas*")
     
-    # Placeholder para el análisis real
-    st.info("🚧 Este es un template para el análisis total de llamadas.")
-    st.info("Aquí se integrará el código de análisis existente.")
+    # Rollups mensuales (solo se procesan archivos crudos nuevos)
+    try:
+        data_version = refresh_rollup()
+        rollup = load_rollup(data_version)
+    except Exception as e:
+        st.error(f"❌ Error al procesar los registros de llamadas: {str(e)}")
+        return
+    
+    if rollup.empty:
+        st.info("No hay registros de llamadas. Genera datos de prueba con "
+                "`python categories/calls_analysis/generate_calls.py`.")
+        return
+    
+    monthly = monthly_totals(rollup)
+    months = monthly["month"].dt.strftime("%Y-%m")
+    total_calls = monthly["calls"]
     
-    # Ejemplo de gráfico placeholder
-    st.subheader("📈 Ejemplo de Visualización")
+    st.subheader("📈 Evolución de Llamadas")
     
-    # Datos de ejemplo
-    months = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun']
-    total_calls = [4500, 5200, 4800, 6100, 5800, 6500]
+    # Figuras cacheadas por versión de los rollups (data_version)
     
-    fig = px.line(
-        x=months, 
-        y=total_calls,
+    plot_cached("calls_total_monthly", data_version, lambda: line_figure(
+        months,
+        total_calls,
         title="Evolución de Llamadas Totales",
         labels={'x': 'Mes', 'y': 'Número de Llamadas'}
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    ))
     
     # Métricas principales
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Llamadas", f"{sum(total_calls):,}")
+        st.metric("Total Llamadas", f"{total_calls.sum():,}")
     
     with col2:
-        st.metric("Promedio Mensual", f"{sum(total_calls)/len(total_calls):,.0f}")
+        st.metric("Promedio Mensual", f"{total_calls.mean():,.0f}")
     
     with col3:
-        st.metric("Mes Pico", months[total_calls.index(max(total_calls))])
+        st.metric("Mes Pico", months.iloc[int(total_calls.values.argmax())])
     
     with col4:
-        st.metric("Crecimiento", f"{((total_calls[-1] - total_calls[0]) / total_calls[0] * 100):.1f}%")
+        first_month = total_calls.iloc[0]
+        growth = (total_calls.iloc[-1] - first_month) / first_month * 100 if first_month else 0.0
+        st.metric("Crecimiento", f"{growth:.1f}%")
+    
+    # Atención y duración
+    def build_rate_figure():
+        fig_rate = go.Figure()
+        fig_rate.add_trace(go.Bar(x=months, y=monthly["answer_rate"] * 100, name="Tasa de atención (%)"))
+        fig_rate.add_trace(go.Scatter(x=months, y=monthly["avg_duration_seconds"], name="Duración media (s)", yaxis="y2"))
+        fig_rate.update_layout(
+            title="Tasa de Atención y Duración Media",
+            yaxis=dict(title="Tasa de atención (%)"),
+            yaxis2=dict(title="Duración media (s)", overlaying="y", side="right")
+        )
+        return fig_rate
+    
+    plot_cached("calls_total_rates", data_version, build_rate_figure)
 
 if __name__ == "__main__":
     main()
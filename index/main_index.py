@@ -2,16 +2,19 @@
 Índice principal de trabajos de ciencia de datos
 """
 import streamlit as st
+import numpy as np
+import html
 import sys
 import os
-from google.cloud import bigquery
 
 # Agregar el directorio shared al path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
 
 from database import WorksDatabase
-from config import APP_CONFIG, CATEGORIES
+from config import APP_CONFIG, CATEGORIES, DATABASE_CONFIG
 from utils import format_date, get_status_badge, get_category_icon
+from images import thumbnail_url
+from tag_index import TagIndex, track_writes
 
 # Importar estilos compartidos externos (desde módulo compartido)
 # Exactamente como en calls_analysis_dashboard que funciona
@@ -41,6 +44,76 @@ st.set_page_config(
 # Aplicar estilos centralizados INMEDIATAMENTE después de set_page_config
 apply_standard_styles()
 
+# Fragmentos: st.fragment (>=1.37) o experimental_fragment; sin soporte, rerun completo
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+STATUS_FILTERS = {
+    "Todos": None,
+    "Activos": "active",
+    "Pausados": "paused",
+    "En Mantenimiento": "maintenance"
+}
+
+@st.cache_resource(ttl=DATABASE_CONFIG["catalog_refresh_seconds"], show_spinner="Cargando catálogo...")
+def load_index_catalog():
+    """Catálogo compartido entre sesiones, con máscaras de filtros precalculadas
+    
+    Se consulta BigQuery una vez por réplica y por TTL; los cambios de filtro y
+    de vista solo combinan máscaras en memoria.
+    """
+    db = WorksDatabase()
+    results = db.fetch_concurrently(
+        categories=db.get_categories,
+        category_map=db.get_category_map,
+        catalog=db.get_catalog
+    )
+    catalog = results["catalog"]
+    category_map = results["category_map"]
+    
+    # Nombre visible -> category_id (sin works_categories el nombre ya es el ID)
+    category_ids = {info["name"]: category_id for category_id, info in category_map.items()}
+    category_masks = {
+        name: catalog.mask(category=category_ids.get(name, name))
+        for name in results["categories"]
+    }
+    status_masks = {
+        label: catalog.mask(status=status)
+        for label, status in STATUS_FILTERS.items() if status is not None
+    }
+    return {
+        "catalog": catalog,
+        "categories": results["categories"],
+        "category_map": category_map,
+        "category_masks": category_masks,
+        "status_masks": status_masks,
+        # Índice invertido tag/subcategoría -> work_id, mantenido con las escrituras
+        "tag_index": track_writes(TagIndex.from_records(catalog)),
+    }
+
+def filter_works(index, category: str, status_label: str, tags=None, subcategories=None,
+                 tag_mode: str = "all"):
+    """Trabajos que cumplen los filtros, combinando máscaras precalculadas y el índice de tags"""
+    catalog = index["catalog"]
+    mask = np.ones(len(catalog), dtype=bool)
+    if category != "Todas":
+        mask &= index["category_masks"].get(category, np.zeros(len(catalog), dtype=bool))
+    if status_label in index["status_masks"]:
+        mask &= index["status_masks"][status_label]
+    works = [catalog[i] for i in np.flatnonzero(mask)]
+    
+    matched = index["tag_index"].match(tags, subcategories, tag_mode)
+    if matched is not None:
+        works = [work for work in works if work['work_id'] in matched]
+    return works
+
+def get_category_info(category_id: str, category_map):
+    """(nombre, icono, descripción) de una categoría, con fallback a config.py"""
+    info = category_map.get(category_id)
+    if info:
+        return info["name"], info["icon"], info["description"]
+    # Fallback: usar config.py (para ejecución local sin permisos)
+    return CATEGORIES.get(category_id, category_id), get_category_icon(category_id), ""
+
 def main():
     """Función principal del índice"""
     
@@ -60,99 +133,101 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
-    # Inicializar base de datos
+    # Cargar catálogo compartido (BigQuery solo si la caché expiró)
     try:
-        db = WorksDatabase()
-        
-        # Sidebar con filtros
-        with st.sidebar:
-            st.header("🔍 Filtros")
-            
-            # Filtro por categoría
-            categories = db.get_categories()
-            selected_category = st.selectbox(
-                "Categoría:",
-                ["Todas"] + categories
-            )
-            
-            # Filtro por estado
-            status_filter = st.selectbox(
-                "Estado:",
-                ["Todos", "Activos", "Pausados", "En Mantenimiento"]
-            )
-        
-        # Obtener trabajos según filtros
-        if selected_category == "Todas":
-            works_df = db.get_all_works()
-        else:
-            works_df = db.get_works_by_category(selected_category)
-        
-        # Aplicar filtro de estado
-        if status_filter != "Todos":
-            status_map = {
-                "Activos": "active",
-                "Pausados": "paused", 
-                "En Mantenimiento": "maintenance"
-            }
-            works_df = works_df[works_df['status'] == status_map[status_filter]]
-        
-        # Mostrar trabajos
-        if works_df.empty:
-            st.info("No se encontraron trabajos con los filtros seleccionados.")
-        else:
-            st.subheader(f"📊 Trabajos encontrados: {len(works_df)}")
-            
-            # Opción de vista: Tabla o Cards
-            view_option = st.radio("Vista:", ["📋 Tabla", "🎴 Cards"], horizontal=True)
-            
-            if view_option == "📋 Tabla":
-                show_works_table(works_df)
-            else:
-                # Mostrar trabajos en tabla horizontal (estilo Kaggle)
-                for idx, (_, work) in enumerate(works_df.iterrows()):
-                    show_work_card_horizontal(work)
-    
+        index = load_index_catalog()
     except Exception as e:
         st.error(f"Error al cargar los trabajos: {str(e)}")
         st.info("Verifique la conexión a BigQuery y las credenciales.")
+        return
+    
+    show_works_browser(index)
+
+@fragment
+def show_works_browser(index):
+    """Filtros, vista y listado: sus widgets solo re-ejecutan este fragmento"""
+    
+    # Filtros (dentro del fragmento: st.sidebar no se puede usar desde un fragmento)
+    st.markdown("#### 🔍 Filtros")
+    col_category, col_status = st.columns(2)
+    
+    with col_category:
+        category_options = ["Todas"] + index["categories"]
+        if st.session_state.get("index_category_filter", "Todas") not in category_options:
+            st.session_state.pop("index_category_filter", None)
+        selected_category = st.selectbox(
+            "Categoría:",
+            category_options,
+            key="index_category_filter"
+        )
+    
+    with col_status:
+        status_filter = st.selectbox(
+            "Estado:",
+            list(STATUS_FILTERS.keys()),
+            key="index_status_filter"
+        )
+    
+    # Tags y subcategorías: opciones con conteos de los trabajos de la categoría/estado elegidos
+    candidates = filter_works(index, selected_category, status_filter)
+    facets = index["tag_index"].facet_counts({work['work_id'] for work in candidates})
+    for key, options in (("index_tag_filter", facets["tag"]), ("index_subcategory_filter", facets["subcategory"])):
+        selected = st.session_state.get(key) or []
+        if any(value not in options for value in selected):
+            st.session_state[key] = [value for value in selected if value in options]
+    col_tags, col_mode, col_subcategory = st.columns([3, 1, 2])
+    
+    with col_tags:
+        tag_filter = st.multiselect(
+            "Tags:",
+            list(facets["tag"]),
+            format_func=lambda tag: f"{tag} ({facets['tag'].get(tag, 0)})",
+            key="index_tag_filter"
+        )
+    
+    with col_mode:
+        tag_mode = st.radio(
+            "Coincidir:",
+            ["all", "any"],
+            format_func={"all": "Todos", "any": "Alguno"}.get,
+            horizontal=True,
+            key="index_tag_mode"
+        )
+    
+    with col_subcategory:
+        subcategory_filter = st.multiselect(
+            "Subcategoría:",
+            list(facets["subcategory"]),
+            format_func=lambda subcategory: f"{subcategory} ({facets['subcategory'].get(subcategory, 0)})",
+            key="index_subcategory_filter"
+        )
+    
+    works = filter_works(index, selected_category, status_filter, tag_filter, subcategory_filter, tag_mode)
+    
+    # Mostrar trabajos
+    if not works:
+        st.info("No se encontraron trabajos con los filtros seleccionados.")
+        return
+    
+    st.subheader(f"📊 Trabajos encontrados: {len(works)}")
+    
+    # Opción de vista: Tabla o Cards
+    view_option = st.radio("Vista:", ["📋 Tabla", "🎴 Cards"], horizontal=True, key="index_view")
+    
+    if view_option == "📋 Tabla":
+        show_works_table(works, index["category_map"])
+    else:
+        show_work_cards(works, index)
 
-def show_works_table(works_df):
+def show_works_table(works, category_map):
     """Mostrar trabajos en formato tabla científica"""
     
     # Preparar datos para la tabla
     table_data = []
     
-    for _, work in works_df.iterrows():
-        # Obtener información de categoría
-        try:
-            db = WorksDatabase()
-            categories_table_ref = f"{db.project_id}.{db.dataset_id}.works_categories"
-            category_query = f"""
-            SELECT category_name, category_icon
-            FROM `{categories_table_ref}`
-            WHERE category_id = @category_id AND is_active = true
-            """
-            
-            job_config = bigquery.QueryJobConfig(
-                query_parameters=[
-                    bigquery.ScalarQueryParameter("category_id", "STRING", work['category'])
-                ]
-            )
-            
-            category_result = db.client.query(category_query, job_config=job_config).to_dataframe()
-            
-            if not category_result.empty:
-                category_name = category_result['category_name'].iloc[0]
-                category_icon = category_result['category_icon'].iloc[0]
-            else:
-                category_name = work['category']
-                category_icon = "📊"
-                
-        except Exception as e:
-            # Fallback: usar config.py (para ejecución local sin permisos)
-            category_id = work['category']
-            category_name = CATEGORIES.get(category_id, category_id)
-            category_icon = get_category_icon(category_id)
+    for work in works:
+        # Información de categoría desde el mapa cacheado (sin consultas por fila)
+        category_name, category_icon, _ = get_category_info(work['category'], category_map)
         
         # Estado con color
         status_display = {
@@ -220,122 +295,124 @@ def show_works_table(works_df):
         st.markdown("### 🚀 Acciones")
         cols = st.columns(min(len(table_data), 4))  # Máximo 4 columnas
         
-        for i, work_data in enumerate(table_data):
+        for i, work in enumerate(works):
             with cols[i % 4]:
-                work_id = work_data["Acción"].replace("work_", "")
-                work_name = work_data["Trabajo"]
+                work_name = work['work_name']
                 
-                # Obtener work_url de la base de datos
-                try:
-                    db = WorksDatabase()
-                    work_info = db.get_work_by_id(work_id)
-                    if work_info and work_info.get('work_url'):
-                        work_url = work_info['work_url']
-                        st.markdown(f'<a href="{work_url}" target="_self" style="display: inline-block; padding: 0.25rem 0.75rem; background-color: #FF4B4B; color: white; text-decoration: none; border-radius: 0.25rem;">Ver {work_name[:20]}...</a>', unsafe_allow_html=True)
-                    else:
-                        st.write("❌ Sin URL")
-                except Exception as e:
-                        st.error(f"❌ Error al cargar trabajo: {str(e)}")
+                # work_url ya viene en el catálogo
+                work_url = work.get('work_url')
+                if work_url:
+                    st.markdown(f'<a href="{work_url}" target="_self" style="display: inline-block; padding: 0.25rem 0.75rem; background-color: #FF4B4B; color: white; text-decoration: none; border-radius: 0.25rem;">Ver {work_name[:20]}...</a>', unsafe_allow_html=True)
+                else:
+                    st.write("❌ Sin URL")
+
+CARD_STATUS_ICONS = {
+    "active": "🟢",
+    "paused": "⏸️",
+    "archived": "📁",
+    "maintenance": "🔧"
+}
 
-def show_work_card_horizontal(work):
-    """Mostrar tarjeta de trabajo en formato horizontal estilo Kaggle"""
+def render_work_card_html(work, category_map) -> str:
+    """HTML de una tarjeta de trabajo en formato horizontal estilo Kaggle"""
+    category_name, category_icon, category_description = get_category_info(work['category'], category_map)
+    esc = html.escape
     
-    # Obtener información de categoría
-    try:
-        db = WorksDatabase()
-        categories_table_ref = f"{db.project_id}.{db.dataset_id}.works_categories"
-        category_query = f"""
-        SELECT category_name, category_icon, description as category_description
-        FROM `{categories_table_ref}`
-        WHERE category_id = @category_id AND is_active = true
-        """
-        
-        job_config = bigquery.QueryJobConfig(
-            query_parameters=[
-                bigquery.ScalarQueryParameter("category_id", "STRING", work['category'])
-            ]
+    short_description = work.get('short_description')
+    status = work['status'] or ""
+    work_url = work.get('work_url')
+    
+    parts = [
+        '<div class="work-card" style="margin-bottom: 1rem;">',
+        '<div style="display: flex; gap: 1rem; flex-wrap: wrap;">',
+    ]
+    image_preview_url = work.get('image_preview_url')
+    if image_preview_url:
+        # Miniatura WebP del tamaño de la tarjeta (JPEG de respaldo), nunca el original
+        parts += [
+            '<picture style="flex: 0 0 10rem;">',
+            f'<source type="image/webp" srcset="{esc(image_preview_url)}">',
+            f'<img src="{esc(thumbnail_url(image_preview_url, extension="jpg"))}" alt="" '
+            'loading="lazy" decoding="async" style="width: 10rem; border-radius: 0.25rem;">',
+            '</picture>',
+        ]
+    parts += [
+        '<div style="flex: 4; min-width: 16rem;">',
+        f'<h3>{esc(work["work_name"] or "")}</h3>',
+        f'<p><strong>{esc(category_icon)} {esc(category_name)}</strong></p>',
+    ]
+    if short_description:
+        parts.append(f'<p><em>{esc(short_description)}</em></p>')
+    parts += [
+        '</div>',
+        '<div style="flex: 1; min-width: 8rem;">',
+        f'<p><strong>Estado:</strong> {CARD_STATUS_ICONS.get(status, "❓")} {esc(status.title())}</p>',
+        f'<p><strong>Versión:</strong> {esc(str(work["version"] or ""))}</p>',
+        '</div>',
+        '<div style="flex: 1; min-width: 8rem;">',
+        f'<p><strong>Creado:</strong> {esc(format_date(work["created_date"]))}</p>',
+        '</div>',
+        '</div>',
+    ]
+    
+    # Link directo para ver trabajo
+    if work_url:
+        parts.append(f'<a href="{esc(work_url)}" target="_self" style="display: inline-block; padding: 0.5rem 1rem; background-color: #FF4B4B; color: white; text-decoration: none; border-radius: 0.25rem; font-weight: 600;">🚀 Ver Trabajo</a>')
+    else:
+        parts.append('<p>❌ No se especificó URL para este trabajo</p>')
+    
+    sections = [
+        ("📝 Descripción:", work.get('description'), False),
+        ("📂 Sobre esta categoría:", category_description, False),
+        ("📌 Notas:", work.get('notes'), True),
+    ]
+    for title, text, italic in sections:
+        if not text:
+            continue
+        body = esc(text)
+        if italic:
+            body = f'<em>{body}</em>'
+        parts.append(f'<hr><p><strong>{title}</strong></p><p style="white-space: pre-line;">{body}</p>')
+    
+    parts.append('</div>')
+    return "".join(parts)
+
+def show_work_cards(works, index):
+    """Tarjetas paginadas: cada página es un único bloque HTML
+    
+    El costo de render depende del tamaño de página y no del catálogo. El HTML
+    de cada tarjeta se guarda en la caché compartida del catálogo.
+    """
+    page_size = max(1, APP_CONFIG["cards_page_size"])
+    total_pages = (len(works) + page_size - 1) // page_size
+    
+    page = 1
+    if total_pages > 1:
+        if st.session_state.get("index_cards_page", 1) > total_pages:
+            st.session_state["index_cards_page"] = 1
+        page = st.number_input(
+            f"Página (de {total_pages}):",
+            min_value=1,
+            max_value=total_pages,
+            step=1,
+            key="index_cards_page"
         )
-        
-        category_result = db.client.query(category_query, job_config=job_config).to_dataframe()
-        
-        if not category_result.empty:
-            category_name = category_result['category_name'].iloc[0]
-            category_icon = category_result['category_icon'].iloc[0]
-            category_description = category_result['category_description'].iloc[0]
-        else:
-            category_name = work['category']
-            category_icon = "📊"
-            category_description = ""
-            
-    except Exception as e:
-        # Fallback: usar config.py (para ejecución local sin permisos)
-        category_id = work['category']
-        category_name = CATEGORIES.get(category_id, category_id)
-        category_icon = get_category_icon(category_id)
-        category_description = ""
-    
-    # Contenedor principal con borde y padding usando clase CSS centralizada
-    with st.container():
-        st.markdown("""
-        <div class="work-card">
-        """, unsafe_allow_html=True)
-        
-        # Header del trabajo
-        col1, col2, col3 = st.columns([4, 1, 1])
-        
-        with col1:
-            # Título principal
-            st.markdown(f"### {work['work_name']}")
-            
-            # Categoría con icono
-            st.markdown(f"**{category_icon} {category_name}**")
-            
-            # Descripción corta
-            if work['short_description']:
-                st.markdown(f"*{work['short_description']}*")
-        
-        with col2:
-            # Estado
-            status_color = {
-                "active": "🟢",
-                "paused": "⏸️",
-                "archived": "📁",
-                "maintenance": "🔧"
-            }.get(work['status'], "❓")
-            
-            st.markdown(f"**Estado:** {status_color} {work['status'].title()}")
-            st.markdown(f"**Versión:** {work['version']}")
-        
-        with col3:
-            # Metadatos
-            st.markdown(f"**Creado:** {format_date(work['created_date'])}")
-            
-        # Link directo para ver trabajo
-        work_url = work.get('work_url')
-        if work_url:
-            st.markdown(f'<a href="{work_url}" target="_self" style="display: inline-block; padding: 0.5rem 1rem; background-color: #FF4B4B; color: white; text-decoration: none; border-radius: 0.25rem; font-weight: 600;">🚀 Ver Trabajo</a>', unsafe_allow_html=True)
-        else:
-            st.error("❌ No se especificó URL para este trabajo")
-        
-        # Descripción completa del trabajo (si existe)
-        if work.get('description'):
-            st.markdown("---")
-            st.markdown("**📝 Descripción:**")
-            st.markdown(work['description'])
-        
-        # Descripción de la categoría (si existe)
-        if category_description:
-            st.markdown("---")
-            st.markdown("**📂 Sobre esta categoría:**")
-            st.markdown(category_description)
-        
-        # Tags o notas (si existen)
-        if work.get('notes'):
-            st.markdown("---")
-            st.markdown("**📌 Notas:**")
-            st.markdown(f"*{work['notes']}*")
-        
-        st.markdown("</div>", unsafe_allow_html=True)
+    
+    page_works = works[(page - 1) * page_size:page * page_size]
+    
+    card_html = index.setdefault("card_html", {})
+    missing = [work for work in page_works if work['work_id'] not in card_html]
+    if missing:
+        # Textos largos de la página en una sola consulta
+        index["catalog"].load_texts([work['work_id'] for work in missing])
+        for work in missing:
+            card_html[work['work_id']] = render_work_card_html(work, index["category_map"])
+    
+    st.markdown(
+        "".join(card_html[work['work_id']] for work in page_works),
+        unsafe_allow_html=True
+    )
+    st.caption(f"Mostrando {len(page_works)} de {len(works)} trabajos")
 
 # Función eliminada - ya no se usa show_external_work
 
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Gestión del layout de las tablas de data_science_index en BigQuery
+
+Crea o migra works_index y works_categories con clustering (y particionado
+donde aporta), y compara con dry-runs los bytes que escanea cada consulta
+de WorksDatabase antes y después de la migración.
+
+Uso:
+    python manage_tables.py status  [dev|qua|pro]
+    python manage_tables.py report  [dev|qua|pro] [--measure]
+    python manage_tables.py migrate [dev|qua|pro] [--execute] [--measure]
+    python manage_tables.py backfill-latest [dev|qua|pro] [--execute]
+
+migrate sin --execute solo muestra el plan. Con --execute respalda cada
+tabla (copia works_index_backup_<fecha>), la recrea con el layout nuevo
+conservando datos y políticas IAM de la tabla, y reporta antes/después.
+
+backfill-latest es la migración única de is_latest: deja exactamente una
+fila vigente por work_id (la de updated_date más reciente) y el resto en
+FALSE, incluidas las filas con is_latest NULL anteriores al versionado.
+Debe ejecutarse en cada ambiente antes de desplegar las lecturas que
+filtran por is_latest; sin --execute solo muestra cuántas filas cambian.
+
+Nota: el dry-run de BigQuery solo descuenta el particionado; la poda por
+clustering recién se ve al ejecutar. --measure ejecuta las consultas de
+lectura (sin caché de resultados) y reporta bytes facturados y latencia.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from google.api_core import exceptions as google_exceptions
+from google.cloud import bigquery
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'shared'))
+
+from setup_service_accounts import ENVIRONMENTS, DATASET_ID
+
+# Esquemas de las tablas (columnas usadas por shared/database.py)
+SCHEMAS = {
+    'works_index': [
+        bigquery.SchemaField('work_id', 'STRING', mode='REQUIRED'),
+        bigquery.SchemaField('work_name', 'STRING'),
+        bigquery.SchemaField('work_slug', 'STRING'),
+        bigquery.SchemaField('category', 'STRING'),
+        bigquery.SchemaField('subcategory', 'STRING'),
+        bigquery.SchemaField('status', 'STRING'),
+        bigquery.SchemaField('version', 'STRING'),
+        bigquery.SchemaField('is_latest', 'BOOL'),
+        bigquery.SchemaField('description', 'STRING'),
+        bigquery.SchemaField('short_description', 'STRING'),
+        bigquery.SchemaField('image_preview_url', 'STRING'),
+        bigquery.SchemaField('created_date', 'TIMESTAMP'),
+        bigquery.SchemaField('updated_date', 'TIMESTAMP'),
+        bigquery.SchemaField('activated_date', 'TIMESTAMP'),
+        bigquery.SchemaField('archived_date', 'TIMESTAMP'),
+        bigquery.SchemaField('streamlit_page', 'STRING'),
+        bigquery.SchemaField('work_url', 'STRING'),
+        bigquery.SchemaField('config_json', 'STRING'),
+        bigquery.SchemaField('notes', 'STRING'),
+        bigquery.SchemaField('tags', 'STRING', mode='REPEATED'),
+    ],
+    'works_categories': [
+        bigquery.SchemaField('category_id', 'STRING', mode='REQUIRED'),
+        bigquery.SchemaField('category_name', 'STRING'),
+        bigquery.SchemaField('category_icon', 'STRING'),
+        bigquery.SchemaField('description', 'STRING'),
+        bigquery.SchemaField('display_order', 'INT64'),
+        bigquery.SchemaField('is_active', 'BOOL'),
+    ],
+}
+
+# Layout deseado. Todas las lecturas filtran por is_latest/status/category/work_id,
+# así que el clustering ordena los bloques por esas columnas y las versiones
+# viejas y filas archivadas quedan en bloques que las consultas no leen.
+# Ninguna consulta filtra por fecha, por lo que no se particiona: particiones
+# por mes serían pequeñas y solo fragmentarían el clustering.
+LAYOUTS = {
+    'works_index': {
+        'partition_field': None,
+        'clustering_fields': ['is_latest', 'status', 'category', 'work_id'],
+    },
+    'works_categories': {
+        'partition_field': None,
+        'clustering_fields': ['is_active', 'category_id'],
+    },
+}
+
+
+def table_ref(project_id, table):
+    return f"{project_id}.{DATASET_ID}.{table}"
+
+
+def current_layout(table):
+    """Layout actual de una tabla existente"""
+    partitioning = table.time_partitioning
+    return {
+        'partition_field': (partitioning.field or '_PARTITIONTIME') if partitioning else None,
+        'clustering_fields': list(table.clustering_fields or []),
+    }
+
+
+def layout_sql(layout):
+    """Cláusulas PARTITION BY / CLUSTER BY para CREATE TABLE"""
+    clauses = []
+    if layout['partition_field']:
+        clauses.append(f"PARTITION BY TIMESTAMP_TRUNC({layout['partition_field']}, MONTH)")
+    if layout['clustering_fields']:
+        clauses.append(f"CLUSTER BY {', '.join(layout['clustering_fields'])}")
+    return '\n'.join(clauses)
+
+
+def show_status(client, project_id):
+    """Mostrar layout actual vs deseado de cada tabla"""
+    print(f"\n📋 Tablas en {project_id}.{DATASET_ID}:")
+    pending = []
+    for name, layout in LAYOUTS.items():
+        try:
+            table = client.get_table(table_ref(project_id, name))
+        except google_exceptions.NotFound:
+            print(f"  ❌ {name}: no existe (se creará)")
+            pending.append(name)
+            continue
+
+        current = current_layout(table)
+        ok = current == layout
+        print(f"  {'✅' if ok else '⚠️ '} {name}: {table.num_rows:,} filas, {table.num_bytes / 1024 / 1024:.2f} MB")
+        print(f"      actual:  particionado={current['partition_field']}, clustering={current['clustering_fields']}")
+        if not ok:
+            print(f"      deseado: particionado={layout['partition_field']}, clustering={layout['clustering_fields']}")
+            pending.append(name)
+    return pending
+
+
+class QueryRecorder:
+    """Captura el SQL que genera WorksDatabase sin ejecutarlo
+
+    Reemplaza run_query por una grabación y llama a cada método de lectura;
+    así el reporte cubre exactamente las consultas que ejecuta la aplicación.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.queries = []
+        self._current = None
+        db.run_query = self._record
+
+    def _record(self, query, job_config=None, timeout=None, to_dataframe=True):
+        self.queries.append((self._current, query, job_config))
+        return pd.DataFrame()
+
+    def capture(self, name, call):
+        self._current = name
+        try:
+            call()
+        except Exception:
+            # El resultado vacío puede romper el post-proceso; la consulta ya quedó grabada
+            pass
+
+
+def collect_queries(project_id):
+    """Consultas de lectura de WorksDatabase (y estadísticas) con parámetros de ejemplo"""
+    os.environ['GCP_PROJECT'] = project_id
+    from database import WorksDatabase
+    from index_stats import WorksStatistics
+
+    db = WorksDatabase()
+    statistics = WorksStatistics(db)
+    recorder = QueryRecorder(db)
+    sample_id = 'ejemplo-trabajo'
+    calls = {
+        'get_all_works': db.get_all_works,
+        'get_catalog': db.get_catalog,
+        'get_work_texts': lambda: db.get_work_texts([sample_id]),
+        'get_works_changed_since': lambda: db.get_works_changed_since(datetime(2024, 1, 1, tzinfo=timezone.utc)),
+        'get_works_by_category': lambda: db.get_works_by_category('calls_analysis'),
+        'get_work_by_id': lambda: db.get_work_by_id(sample_id),
+        'get_work_by_slug': lambda: db.get_work_by_slug(sample_id),
+        'get_categories': db.get_categories,
+        'get_category_map': db.get_category_map,
+        'find_works': lambda: db.find_works(status='active'),
+        'get_work_index': db.get_work_index,
+        'get_work_versions': lambda: db.get_work_versions(sample_id),
+        'get_work_version': lambda: db.get_work_version(sample_id, '1.0'),
+        'statistics': statistics.load,
+    }
+    for name, call in calls.items():
+        recorder.capture(name, call)
+    return recorder.queries
+
+
+def scan_report(client, project_id, measure=False):
+    """Bytes estimados (dry-run) y, con measure, bytes facturados y latencia reales"""
+    report = {}
+    for name, query, job_config in collect_queries(project_id):
+        # Métodos con más de una consulta (p.ej. resolver categoría + trabajos)
+        label, suffix = name, 2
+        while label in report:
+            label, suffix = f"{name}#{suffix}", suffix + 1
+        config = bigquery.QueryJobConfig(
+            dry_run=True,
+            use_query_cache=False,
+            query_parameters=list(job_config.query_parameters) if job_config else []
+        )
+        entry = {}
+        try:
+            entry['estimated_bytes'] = client.query(query, job_config=config).total_bytes_processed
+        except Exception as e:
+            entry['error'] = str(e).split('\n')[0]
+            report[label] = entry
+            continue
+
+        if measure:
+            config.dry_run = False
+            start = time.perf_counter()
+            job = client.query(query, job_config=config)
+            job.result()
+            entry['billed_bytes'] = job.total_bytes_billed or 0
+            entry['processed_bytes'] = job.total_bytes_processed or 0
+            entry['seconds'] = time.perf_counter() - start
+        report[label] = entry
+    return report
+
+
+def format_bytes(value):
+    if value is None:
+        return '-'
+    return f"{value / 1024 / 1024:.3f} MB" if value >= 1024 * 1024 else f"{value / 1024:.1f} KB"
+
+
+def print_report(before, after=None):
+    """Tabla de bytes por consulta (y comparación si hay 'after')"""
+    metric = 'processed_bytes' if any('processed_bytes' in entry for entry in before.values()) else 'estimated_bytes'
+    title = 'procesados' if metric == 'processed_bytes' else 'estimados (dry-run)'
+    print(f"\n📊 Bytes {title} por consulta:")
+    header = f"  {'consulta':<28} {'antes':>12}"
+    if after is not None:
+        header += f" {'después':>12} {'cambio':>8}"
+    print(header)
+    for name, entry in before.items():
+        if 'error' in entry:
+            print(f"  {name:<28} ❌ {entry['error']}")
+            continue
+        line = f"  {name:<28} {format_bytes(entry.get(metric)):>12}"
+        if after is not None and name in after and 'error' not in after[name]:
+            new_value = after[name].get(metric)
+            old_value = entry.get(metric)
+            change = f"{(new_value - old_value) / old_value * 100:+.0f}%" if old_value else '-'
+            line += f" {format_bytes(new_value):>12} {change:>8}"
+        if 'seconds' in entry:
+            line += f"  ({entry['seconds']:.2f}s"
+            if after is not None and 'seconds' in after.get(name, {}):
+                line += f" → {after[name]['seconds']:.2f}s"
+            line += ")"
+        print(line)
+
+
+def create_table(client, project_id, name):
+    """Crear una tabla inexistente con esquema y layout"""
+    layout = LAYOUTS[name]
+    table = bigquery.Table(table_ref(project_id, name), schema=SCHEMAS[name])
+    if layout['partition_field']:
+        table.time_partitioning = bigquery.TimePartitioning(
+            type_=bigquery.TimePartitioningType.MONTH,
+            field=layout['partition_field']
+        )
+    table.clustering_fields = layout['clustering_fields'] or None
+    client.create_table(table)
+    print(f"  ✅ {name} creada")
+
+
+def migrate_table(client, project_id, name):
+    """Respaldar y recrear una tabla existente con el layout deseado
+
+    CREATE OR REPLACE reescribe los datos ordenados por el clustering nuevo
+    (actualizar solo clustering_fields dejaría los datos existentes sin
+    reagrupar). La política IAM de la tabla se guarda y se vuelve a aplicar.
+    """
+    ref = table_ref(project_id, name)
+    backup_ref = f"{ref}_backup_{datetime.now(timezone.utc):%Y%m%d%H%M%S}"
+
+    print(f"  💾 Respaldando {name} en {backup_ref}...")
+    client.copy_table(ref, backup_ref).result()
+
+    policy = client.get_iam_policy(ref)
+
+    print(f"  🔄 Recreando {name}...")
+    query = f"""
+    CREATE OR REPLACE TABLE `{ref}`
+    {layout_sql(LAYOUTS[name])}
+    AS SELECT * FROM `{ref}`
+    """
+    client.query(query).result()
+
+    if policy.bindings:
+        policy.etag = None
+        client.set_iam_policy(ref, policy)
+        print(f"  🔐 Política IAM de {name} restaurada ({len(policy.bindings)} bindings)")
+    print(f"  ✅ {name} migrada")
+
+
+# Fila vigente de cada trabajo: la de updated_date más reciente (desempates estables)
+LATEST_RANK_SQL = (
+    "ROW_NUMBER() OVER (PARTITION BY work_id "
+    "ORDER BY updated_date DESC, created_date DESC, version DESC) = 1"
+)
+
+
+def latest_backfill_plan(client, project_id):
+    """Estado de is_latest en works_index y filas que cambiaría el backfill"""
+    ref = table_ref(project_id, 'works_index')
+    query = f"""
+    WITH ranked AS (
+        SELECT work_id, version, is_latest, {LATEST_RANK_SQL} AS should_be_latest
+        FROM `{ref}`
+    )
+    SELECT
+        COUNT(DISTINCT work_id) AS works,
+        COUNT(*) AS total_rows,
+        COUNTIF(is_latest IS NULL) AS null_rows,
+        COUNTIF(is_latest IS DISTINCT FROM should_be_latest) AS rows_to_change,
+        (SELECT COUNT(*) FROM (
+            SELECT work_id FROM ranked GROUP BY work_id HAVING COUNTIF(is_latest) != 1
+        )) AS works_without_single_latest,
+        (SELECT COUNT(*) FROM (
+            SELECT work_id FROM ranked GROUP BY work_id, version HAVING COUNT(*) > 1
+        )) AS duplicate_keys
+    FROM ranked
+    """
+    return dict(next(iter(client.query(query).result())).items())
+
+
+def print_backfill_plan(plan):
+    print("\n📋 is_latest en works_index:")
+    print(f"  trabajos: {plan['works']:,} | filas: {plan['total_rows']:,} | is_latest NULL: {plan['null_rows']:,}")
+    print(f"  trabajos sin exactamente una fila vigente: {plan['works_without_single_latest']:,}")
+    print(f"  filas a cambiar: {plan['rows_to_change']:,}")
+    if plan['duplicate_keys']:
+        print(f"  ⚠️  {plan['duplicate_keys']:,} claves work_id + version repetidas")
+
+
+def backfill_latest(client, project_id):
+    """Respaldar works_index y fijar is_latest con una única sentencia UPDATE
+
+    Las versiones NULL se comparan como '' para que las filas anteriores al
+    versionado también se actualicen.
+    """
+    ref = table_ref(project_id, 'works_index')
+    backup_ref = f"{ref}_backup_{datetime.now(timezone.utc):%Y%m%d%H%M%S}"
+    print(f"  💾 Respaldando works_index en {backup_ref}...")
+    client.copy_table(ref, backup_ref).result()
+
+    print("  🔄 Actualizando is_latest...")
+    query = f"""
+    UPDATE `{ref}` T
+    SET is_latest = S.should_be_latest
+    FROM (
+        SELECT work_id, version, {LATEST_RANK_SQL} AS should_be_latest
+        FROM `{ref}`
+    ) S
+    WHERE T.work_id = S.work_id
+      AND IFNULL(T.version, '') = IFNULL(S.version, '')
+      AND T.is_latest IS DISTINCT FROM S.should_be_latest
+    """
+    job = client.query(query)
+    job.result()
+    print(f"  ✅ {job.num_dml_affected_rows or 0:,} filas actualizadas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Layout de tablas de data_science_index en BigQuery")
+    parser.add_argument('command', choices=['status', 'report', 'migrate', 'backfill-latest'])
+    parser.add_argument('env', nargs='?', default='dev', choices=list(ENVIRONMENTS.keys()))
+    parser.add_argument('--execute', action='store_true', help="Aplicar la migración (por defecto solo plan)")
+    parser.add_argument('--measure', action='store_true', help="Ejecutar lecturas para medir bytes facturados y latencia")
+    args = parser.parse_args()
+
+    project_id = ENVIRONMENTS[args.env]['project_id']
+    client = bigquery.Client(project=project_id)
+
+    print("=" * 80)
+    print(f"🗄️  LAYOUT DE TABLAS: {project_id}.{DATASET_ID}")
+    print("=" * 80)
+
+    if args.command == 'status':
+        show_status(client, project_id)
+        return
+
+    if args.command == 'report':
+        print_report(scan_report(client, project_id, measure=args.measure))
+        return
+
+    if args.command == 'backfill-latest':
+        plan = latest_backfill_plan(client, project_id)
+        print_backfill_plan(plan)
+        if not plan['rows_to_change']:
+            print("\n✅ is_latest ya está consistente.")
+            return
+        if plan['duplicate_keys']:
+            print("\n❌ Resuelva las claves repetidas antes del backfill (el UPDATE fallaría).")
+            return
+        if not args.execute:
+            print("\nℹ️  Solo plan. Ejecuta con --execute para aplicar.")
+            return
+        backfill_latest(client, project_id)
+        print_backfill_plan(latest_backfill_plan(client, project_id))
+        return
+
+    pending = show_status(client, project_id)
+    if not pending:
+        print("\n✅ Todas las tablas ya tienen el layout deseado.")
+        return
+
+    print("\n📋 Plan:")
+    for name in pending:
+        print(f"  - {name}: {layout_sql(LAYOUTS[name]).replace(chr(10), ' ')}")
+    if not args.execute:
+        print("\nℹ️  Solo plan. Ejecuta con --execute para aplicar.")
+        return
+
+    before = scan_report(client, project_id, measure=args.measure)
+    for name in pending:
+        try:
+            client.get_table(table_ref(project_id, name))
+        except google_exceptions.NotFound:
+            create_table(client, project_id, name)
+            continue
+        migrate_table(client, project_id, name)
+    after = scan_report(client, project_id, measure=args.measure)
+    print_report(before, after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Importación masiva de trabajos desde CSV, JSON o Parquet
+
+Todo el archivo se valida y se normaliza en una sola pasada vectorizada con
+pandas (sin iterar fila por fila), se calcula un diff contra el catálogo
+vigente y, si se confirma, se escribe con un único load job + MERGE
+(WorksDatabase.bulk_upsert_works).
+
+Filas sin work_id se emparejan con trabajos existentes por categoría y
+nombre normalizado; las que no coinciden se crean con un ID nuevo.
+
+Uso:
+    python shared/bulk_import.py archivo.csv            # solo diff (dry run)
+    python shared/bulk_import.py archivo.csv --execute  # aplicar
+"""
+import argparse
+import io
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from config import CATEGORIES, WORK_STATUS
+from database import WorksDatabase, VERSION_COLUMN_TYPES
+
+REQUIRED_COLUMNS = ("work_name", "category", "streamlit_page")
+DEFAULTS = {"version": "1.0", "status": WORK_STATUS["ACTIVE"], "config_json": "{}"}
+# Columnas que el archivo puede traer (el resto se ignora con una advertencia)
+IMPORTABLE_COLUMNS = tuple(
+    column for column in VERSION_COLUMN_TYPES
+    if column not in ("is_latest", "created_date", "updated_date")
+)
+# Columnas comparadas en el diff de filas que actualizan un trabajo existente
+DIFF_COLUMNS = tuple(column for column in IMPORTABLE_COLUMNS if column != "work_id")
+
+
+def read_import_file(source, file_name: Optional[str] = None) -> pd.DataFrame:
+    """Leer un archivo CSV, JSON (lista de objetos o JSON Lines) o Parquet
+
+    source puede ser una ruta o un objeto tipo archivo (p. ej. un upload de
+    Streamlit); el formato se deduce de la extensión.
+    """
+    file_name = file_name or getattr(source, "name", None) or str(source)
+    extension = os.path.splitext(file_name)[1].lower()
+
+    if extension == ".csv":
+        return pd.read_csv(source, dtype=str, keep_default_na=False)
+    if extension == ".parquet":
+        return pd.read_parquet(source)
+    if extension in (".json", ".jsonl", ".ndjson"):
+        raw = source.read() if hasattr(source, "read") else open(source, "rb").read()
+        text = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+        lines = extension != ".json" or not text.lstrip().startswith("[")
+        return pd.read_json(io.StringIO(text), orient="records", lines=lines, dtype=False)
+    raise ValueError(f"Formato no soportado: {extension or file_name} (use .csv, .json o .parquet)")
+
+
+def slugify(values: pd.Series) -> pd.Series:
+    """Slug en minúsculas, ASCII y separado por guiones (vectorizado)"""
+    return (
+        values.fillna("").astype(str)
+        .str.normalize("NFKD")
+        .str.encode("ascii", errors="ignore").str.decode("ascii")
+        .str.lower()
+        .str.replace(r"[^a-z0-9]+", "-", regex=True)
+        .str.strip("-")
+    )
+
+
+def _clean_text(values: pd.Series) -> pd.Series:
+    return values.fillna("").astype(str).str.strip()
+
+
+def _split_tags(values: pd.Series) -> pd.Series:
+    """Tags como listas: acepta listas (JSON/Parquet) o texto separado por , o ;"""
+    def to_list(value):
+        if isinstance(value, str):
+            parts = value.replace(";", ",").split(",")
+        elif isinstance(value, (list, tuple, np.ndarray)):
+            parts = [str(tag) for tag in list(value)]
+        else:
+            parts = []
+        return [part.strip() for part in parts if part.strip()]
+
+    return values.map(to_list)
+
+
+def _comparable(values: pd.Series) -> pd.Series:
+    """Texto comparable para el diff (listas unidas por coma, nulos como vacío)"""
+    def to_text(value):
+        if isinstance(value, (list, tuple, np.ndarray)):
+            return ",".join(str(item) for item in list(value))
+        if value is None or pd.isna(value):
+            return ""
+        return str(value)
+
+    return values.map(to_text)
+
+
+def unique_work_ids(slugs: pd.Series, existing_ids: Set[str], stamp: Optional[str] = None) -> pd.Series:
+    """IDs garantizados únicos: slug-timestamp, con sufijo si se repiten
+
+    Los slugs repetidos dentro del archivo reciben -2, -3...; si aun así algún
+    ID choca con uno existente se le agrega un sufijo aleatorio hasta que no
+    choque.
+    """
+    stamp = stamp or datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    base = slugs.where(slugs != "", "trabajo") + f"-{stamp}"
+    occurrence = base.groupby(base).cumcount()
+    ids = base.where(occurrence == 0, base + "-" + (occurrence + 1).astype(str))
+
+    taken = set(existing_ids)
+    collisions = ids.isin(taken)
+    for position in ids.index[collisions]:
+        candidate = ids[position]
+        while candidate in taken:
+            candidate = f"{ids[position]}-{uuid.uuid4().hex[:6]}"
+        ids[position] = candidate
+    return ids
+
+
+def prepare_import(frame: pd.DataFrame, existing: pd.DataFrame) -> pd.DataFrame:
+    """Normalizar, validar y emparejar el archivo contra el catálogo existente
+
+    Retorna una fila por fila del archivo con las columnas importables más
+    action ("create" | "update" | "error") y error (motivo, si corresponde).
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(missing)}")
+    ignored = [column for column in frame.columns if column not in IMPORTABLE_COLUMNS]
+    if ignored:
+        print(f"⚠️  Columnas ignoradas en la importación: {', '.join(map(str, ignored))}")
+
+    rows = pd.DataFrame(index=frame.index)
+    for column in IMPORTABLE_COLUMNS:
+        if column == "tags":
+            rows[column] = _split_tags(frame[column]) if column in frame else [[] for _ in frame.index]
+        elif column in ("activated_date", "archived_date"):
+            values = frame[column] if column in frame else pd.Series(None, index=frame.index)
+            rows[column] = pd.to_datetime(values.where(values.astype(str) != ""), utc=True, errors="coerce")
+        else:
+            rows[column] = _clean_text(frame[column]) if column in frame else pd.Series("", index=frame.index)
+    rows["category"] = rows["category"].str.lower()
+    rows["status"] = rows["status"].str.lower()
+    rows["name_slug"] = slugify(rows["work_name"])
+
+    # Emparejar con el catálogo: por work_id explícito o por categoría + nombre
+    existing = existing.copy()
+    existing_ids = set(existing["work_id"]) if not existing.empty else set()
+    if not existing.empty:
+        existing["name_key"] = existing["category"] + "/" + slugify(existing["work_name"])
+        by_name = existing.drop_duplicates("name_key", keep="first").set_index("name_key")["work_id"]
+    else:
+        by_name = pd.Series(dtype=str)
+    name_key = rows["category"] + "/" + rows["name_slug"]
+    matched_id = rows["work_id"].where(rows["work_id"] != "", name_key.map(by_name)).fillna("")
+    unknown_id = (rows["work_id"] != "") & ~rows["work_id"].isin(existing_ids)
+    duplicated = (matched_id != "") & matched_id.duplicated(keep=False)
+
+    is_new = matched_id == ""
+    is_update = ~is_new & ~unknown_id
+    rows["work_id"] = matched_id
+    if is_new.any():
+        rows.loc[is_new, "work_id"] = unique_work_ids(rows.loc[is_new, "name_slug"], existing_ids)
+
+    # Trabajos nuevos: valores por defecto. Actualizaciones: las columnas que el
+    # archivo no trae conservan el valor vigente (nunca se aplican DEFAULTS)
+    for column, default in DEFAULTS.items():
+        rows[column] = rows[column].where(~is_new | (rows[column] != ""), default)
+    rows["work_slug"] = rows["work_slug"].where(~is_new | (rows["work_slug"] != ""), rows["work_id"])
+    if is_update.any():
+        current = existing.set_index("work_id").reindex(rows.loc[is_update, "work_id"])
+        for column in IMPORTABLE_COLUMNS:
+            if column in frame.columns or column == "work_id":
+                continue
+            kept = pd.Series(current[column].tolist(), index=rows.index[is_update], dtype=object)
+            rows[column] = rows[column].astype(object).where(~is_update, kept)
+
+    # Validación vectorizada (sobre la fila final): cada máscara marca un motivo de error
+    checks = [
+        (rows["name_slug"] == "", "work_name vacío"),
+        (~rows["category"].isin(list(CATEGORIES)), "categoría desconocida"),
+        (~rows["status"].isin(list(WORK_STATUS.values())), "estado inválido"),
+        (rows["streamlit_page"] == "", "streamlit_page vacío"),
+        (unknown_id, "work_id inexistente"),
+        (duplicated, "trabajo repetido en el archivo"),
+    ]
+    error = pd.Series("", index=rows.index)
+    for mask, reason in checks:
+        error = error.where(~mask, error.where(error == "", error + "; ") + reason)
+
+    rows["action"] = "update"
+    rows.loc[is_new, "action"] = "create"
+    rows.loc[error != "", "action"] = "error"
+    rows["error"] = error
+    return rows.drop(columns=["name_slug"])
+
+
+def diff_import(prepared: pd.DataFrame, existing: pd.DataFrame) -> pd.DataFrame:
+    """Diff legible: acción, trabajo y columnas que cambian respecto del catálogo"""
+    current = existing.set_index("work_id") if not existing.empty else pd.DataFrame()
+    changes = pd.Series("", index=prepared.index)
+    updates = prepared[prepared["action"] == "update"]
+    if not updates.empty:
+        before = current.reindex(updates["work_id"])
+        before.index = updates.index
+        for column in DIFF_COLUMNS:
+            if column not in before:
+                continue
+            changed = _comparable(before[column]) != _comparable(updates[column])
+            changes[changed[changed].index] += f"{column}, "
+        changes = changes.str.rstrip(", ")
+        unchanged = (prepared["action"] == "update") & (changes == "")
+        prepared = prepared.assign(action=prepared["action"].where(~unchanged, "unchanged"))
+
+    return pd.DataFrame({
+        "action": prepared["action"],
+        "work_id": prepared["work_id"],
+        "work_name": prepared["work_name"],
+        "category": prepared["category"],
+        "version": prepared["version"],
+        "changes": changes.where(prepared["action"] != "error", prepared["error"]),
+    })
+
+
+def load_existing(db: WorksDatabase) -> pd.DataFrame:
+    """Versión vigente de todos los trabajos (incluye archivados) para el diff"""
+    return db.find_works(columns=list(VERSION_COLUMN_TYPES))
+
+
+def build_rows(prepared: pd.DataFrame, existing: pd.DataFrame, provided_columns) -> list:
+    """Filas completas para bulk_upsert_works (solo create/update)
+
+    Las actualizaciones parten de la fila vigente y solo se pisan las
+    columnas que venían en el archivo (provided_columns).
+    """
+    now = datetime.now(timezone.utc)
+    current = existing.set_index("work_id") if not existing.empty else pd.DataFrame()
+    update_columns = [column for column in IMPORTABLE_COLUMNS if column in set(provided_columns)]
+    records = []
+    for record in prepared[prepared["action"].isin(["create", "update"])].to_dict("records"):
+        if record["action"] == "update" and record["work_id"] in current.index:
+            row = current.loc[record["work_id"]].to_dict()
+            row.update({column: record[column] for column in update_columns})
+        else:
+            row = {column: record[column] for column in IMPORTABLE_COLUMNS}
+            row["created_date"] = now
+        row.update({"work_id": record["work_id"], "is_latest": True, "updated_date": now})
+        records.append(row)
+    return records
+
+
+def run_import(source, db: Optional[WorksDatabase] = None, execute: bool = False,
+               file_name: Optional[str] = None) -> Dict:
+    """Leer, validar y (si execute) aplicar una importación; retorna diff y conteos"""
+    db = db or WorksDatabase()
+    existing = load_existing(db)
+    frame = read_import_file(source, file_name)
+    prepared = prepare_import(frame, existing)
+    diff = diff_import(prepared, existing)
+    result = {"diff": diff, "summary": diff["action"].value_counts().to_dict(), "applied": None}
+
+    if execute:
+        applicable = prepared[diff["action"].isin(["create", "update"])]
+        result["applied"] = db.bulk_upsert_works(build_rows(applicable, existing, frame.columns))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importación masiva de trabajos (CSV, JSON o Parquet)")
+    parser.add_argument("file", help="Archivo a importar")
+    parser.add_argument("--execute", action="store_true", help="Aplicar los cambios (por defecto solo diff)")
+    args = parser.parse_args()
+
+    result = run_import(args.file, execute=args.execute)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(result["diff"].to_string(index=False))
+    print(f"\nResumen: {result['summary']}")
+    if result["applied"] is not None:
+        print(f"✅ Importación aplicada: {result['applied']}")
+    else:
+        print("ℹ️  Dry run: use --execute para aplicar")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Representación compacta en memoria del catálogo de trabajos
+
+Las columnas de baja cardinalidad (category, status, version) se codifican
+como categóricas, los strings se internan y los textos largos
+(description, notes) se guardan aparte y se cargan bajo demanda.
+"""
+import sys
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Columnas de baja cardinalidad: códigos enteros + diccionario de valores
+CATEGORICAL_COLUMNS = ("category", "status", "version")
+
+# Textos largos: fuera de las columnas, se cargan bajo demanda por work_id
+HEAVY_TEXT_COLUMNS = ("description", "notes")
+
+DATE_COLUMNS = ("created_date", "updated_date", "activated_date", "archived_date")
+
+
+def _compact_value(value):
+    """Internar strings y convertir arrays (tags) a tuplas inmutables"""
+    # str() también convierte numpy.str_ (arrays <U de Parquet/pyarrow), que sys.intern rechaza
+    if isinstance(value, str):
+        return sys.intern(str(value))
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(sys.intern(str(v)) if isinstance(v, str) else v for v in value)
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value
+
+
+def _object_array(values: Iterable) -> np.ndarray:
+    """Array de objetos 1-D (sin que numpy intente expandir tuplas a 2-D)"""
+    values = list(values)
+    array = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        array[i] = value
+    return array
+
+
+class Work:
+    """Registro liviano de un trabajo: vista sobre una fila del catálogo compacto
+
+    No tiene __dict__ por instancia; los valores se leen de las columnas del
+    catálogo. Soporta acceso tipo diccionario (work['work_name'],
+    work.get('description')) para reemplazar filas de pandas en los renderers.
+    """
+    __slots__ = ("_catalog", "_index")
+
+    def __init__(self, catalog: "CompactCatalog", index: int):
+        self._catalog = catalog
+        self._index = index
+
+    def __getitem__(self, column: str):
+        return self._catalog.value(self._index, column)
+
+    def __getattr__(self, column: str):
+        if column.startswith("_"):
+            raise AttributeError(column)
+        try:
+            return self[column]
+        except KeyError:
+            raise AttributeError(column) from None
+
+    def get(self, column: str, default=None):
+        try:
+            return self[column]
+        except KeyError:
+            return default
+
+    def keys(self) -> List[str]:
+        return self._catalog.columns + list(HEAVY_TEXT_COLUMNS)
+
+    def to_dict(self, include_text: bool = False) -> Dict:
+        """Convertir a diccionario (los textos largos solo si include_text)"""
+        record = {column: self[column] for column in self._catalog.columns}
+        if include_text:
+            for column in HEAVY_TEXT_COLUMNS:
+                record[column] = self[column]
+        return record
+
+    def __repr__(self) -> str:
+        return f"Work({self['work_id']!r})"
+
+
+class CompactCatalog:
+    """Catálogo de trabajos en formato columnar compacto
+
+    text_loader(work_ids) -> {work_id: {"description": ..., "notes": ...}} se usa
+    para cargar los textos largos la primera vez que se piden.
+    """
+
+    def __init__(self, df: pd.DataFrame,
+                 text_loader: Optional[Callable[[List[str]], Dict[str, Dict]]] = None):
+        df = df.reset_index(drop=True)
+        self._size = len(df)
+        self._columns: Dict[str, object] = {}
+        self._texts: Dict[str, Dict] = {}
+        self._text_loader = text_loader
+
+        for column in df.columns:
+            if column in HEAVY_TEXT_COLUMNS:
+                continue
+            series = df[column]
+            if column in CATEGORICAL_COLUMNS:
+                self._columns[column] = pd.Categorical(series.astype("string"))
+            elif column in DATE_COLUMNS:
+                # datetime64 en UTC sin zona (8 bytes por valor); se localiza al leer
+                dates = pd.to_datetime(series, utc=True, errors="coerce")
+                self._columns[column] = dates.dt.tz_convert(None).to_numpy()
+            elif series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+                self._columns[column] = _object_array(_compact_value(v) for v in series)
+            else:
+                self._columns[column] = series.to_numpy()
+
+        # Si el DataFrame ya trae los textos, guardarlos aparte por work_id
+        text_columns = [c for c in HEAVY_TEXT_COLUMNS if c in df.columns]
+        if text_columns and "work_id" in df.columns:
+            for record in df[["work_id"] + text_columns].itertuples(index=False):
+                self._texts[record[0]] = {
+                    column: _compact_value(value) for column, value in zip(text_columns, record[1:])
+                }
+
+        work_ids = self._columns.get("work_id", [])
+        self._index_by_id = {work_id: i for i, work_id in enumerate(work_ids)}
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns.keys())
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Work]:
+        for i in range(self._size):
+            yield Work(self, i)
+
+    def __getitem__(self, index: int) -> Work:
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        return Work(self, index)
+
+    def get(self, work_id: str) -> Optional[Work]:
+        """Obtener un trabajo por work_id"""
+        index = self._index_by_id.get(work_id)
+        return Work(self, index) if index is not None else None
+
+    def value(self, index: int, column: str):
+        """Valor de una celda (los textos largos se cargan bajo demanda)"""
+        if column in HEAVY_TEXT_COLUMNS:
+            return self.get_text(self.value(index, "work_id"), column)
+
+        array = self._columns[column]
+        if isinstance(array, pd.Categorical):
+            code = array.codes[index]
+            return None if code < 0 else array.categories[code]
+
+        value = array[index]
+        if isinstance(value, np.datetime64):
+            return None if np.isnat(value) else pd.Timestamp(value, tz="UTC")
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
+
+    def get_text(self, work_id: str, column: str) -> str:
+        """Obtener description/notes de un trabajo, cargándolos si hace falta"""
+        if work_id not in self._texts:
+            self.load_texts([work_id])
+        return self._texts.get(work_id, {}).get(column) or ""
+
+    def load_texts(self, work_ids: List[str]):
+        """Cargar en lote los textos largos que aún no están en memoria"""
+        missing = [work_id for work_id in work_ids if work_id not in self._texts]
+        if not missing or self._text_loader is None:
+            return
+        loaded = self._text_loader(missing)
+        for work_id in missing:
+            record = loaded.get(work_id, {})
+            self._texts[work_id] = {column: _compact_value(record.get(column)) for column in HEAVY_TEXT_COLUMNS}
+
+    def mask(self, **equals) -> np.ndarray:
+        """Máscara booleana por igualdad de columnas (None = sin filtro)
+
+        En columnas categóricas compara códigos enteros en lugar de strings.
+        """
+        mask = np.ones(self._size, dtype=bool)
+        for column, expected in equals.items():
+            if expected is None:
+                continue
+            array = self._columns[column]
+            if isinstance(array, pd.Categorical):
+                if expected not in array.categories:
+                    return np.zeros(self._size, dtype=bool)
+                mask &= array.codes == array.categories.get_loc(expected)
+            else:
+                mask &= array == expected
+        return mask
+
+    def to_dataframe(self, columns: Optional[List[str]] = None, include_text: bool = False) -> pd.DataFrame:
+        """Vista DataFrame de las columnas pedidas (categóricas se mantienen como category)"""
+        columns = columns or self.columns
+        data = {}
+        for column in columns:
+            if column in HEAVY_TEXT_COLUMNS:
+                continue
+            array = self._columns[column]
+            if column in DATE_COLUMNS:
+                data[column] = pd.Series(array).dt.tz_localize("UTC")
+            else:
+                data[column] = array
+        df = pd.DataFrame(data, copy=False)
+
+        text_columns = [c for c in HEAVY_TEXT_COLUMNS if include_text or c in columns]
+        if text_columns and "work_id" in self._columns:
+            work_ids = list(self._columns["work_id"])
+            self.load_texts(work_ids)
+            for column in text_columns:
+                df[column] = [self._texts.get(work_id, {}).get(column) or "" for work_id in work_ids]
+        return df
+
+    def memory_usage(self) -> int:
+        """Bytes aproximados de las columnas (sin contar textos largos cargados)"""
+        total = 0
+        for array in self._columns.values():
+            if isinstance(array, pd.Categorical):
+                total += array.codes.nbytes + int(array.categories.memory_usage(deep=True))
+            elif array.dtype == object:
+                total += int(pd.Series(array).memory_usage(deep=True, index=False))
+            else:
+                total += array.nbytes
+        return total
@@ -0,0 +1,135 @@
+"""
+Capa de gráficos compartida para las páginas de categorías
+
+Las series largas se reducen a un presupuesto de puntos (del orden del ancho
+en píxeles del gráfico) con algoritmos que preservan la forma: LTTB para
+líneas y min-max por bloque para picos. El JSON de cada figura se cachea por
+versión de datos y parámetros, así que un rerun no reconstruye ni re-serializa
+la figura y el payload al navegador queda acotado sin importar el historial.
+"""
+import json
+from typing import Callable, Dict, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+from config import CHART_CONFIG
+
+
+def _as_numeric(x) -> np.ndarray:
+    """Eje x como float64 (fechas en nanosegundos) para los cálculos de área"""
+    values = pd.Series(x)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        values = values.dt.tz_convert(None) if values.dt.tz is not None else values
+        return values.to_numpy(dtype="datetime64[ns]").astype("int64").astype("float64")
+    return values.to_numpy(dtype="float64")
+
+
+def lttb_indices(x, y, threshold: int) -> np.ndarray:
+    """Índices elegidos por Largest-Triangle-Three-Buckets
+
+    Conserva el primer y último punto y, en cada bloque, el punto que forma el
+    triángulo de mayor área con el punto elegido antes y el promedio del
+    bloque siguiente. x debe estar ordenado.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = _as_numeric(x)
+    y = np.asarray(y, dtype="float64")
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.nanargmax(areas)) if np.isfinite(areas).any() else start
+        indices[i + 1] = previous
+    return indices
+
+
+def minmax_indices(y, threshold: int) -> np.ndarray:
+    """Índices del mínimo y máximo de cada bloque (preserva picos y valles)"""
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype="float64")
+    edges = np.linspace(0, n, threshold // 2 + 1).astype(np.int64)
+    indices = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        block = y[start:end]
+        indices.append(start + int(np.nanargmin(block)) if np.isfinite(block).any() else start)
+        indices.append(start + int(np.nanargmax(block)) if np.isfinite(block).any() else end - 1)
+    return np.unique(indices)
+
+
+def downsample(x, y, max_points: Optional[int] = None, method: str = "lttb"):
+    """Reducir (x, y) a lo sumo max_points puntos con "lttb" o "minmax" """
+    max_points = max_points or CHART_CONFIG["max_points"]
+    if method == "minmax":
+        indices = minmax_indices(y, max_points)
+    else:
+        indices = lttb_indices(x, y, max_points)
+    x = pd.Series(x).iloc[indices].reset_index(drop=True)
+    y = pd.Series(y).iloc[indices].reset_index(drop=True)
+    return x, y
+
+
+def line_figure(x, y: Union[Sequence, Dict[str, Sequence]], title: str,
+                labels: Optional[Dict[str, str]] = None, max_points: Optional[int] = None,
+                method: str = "lttb") -> go.Figure:
+    """Gráfico de líneas (una o varias series) con cada serie reducida al presupuesto de puntos"""
+    series = y if isinstance(y, dict) else {None: y}
+    frames = []
+    for name, values in series.items():
+        sampled_x, sampled_y = downsample(x, values, max_points, method)
+        frames.append(pd.DataFrame({"x": sampled_x, "y": sampled_y, "serie": name}))
+    data = pd.concat(frames, ignore_index=True)
+
+    fig = px.line(
+        data,
+        x="x",
+        y="y",
+        color="serie" if isinstance(y, dict) else None,
+        title=title,
+        labels={"x": (labels or {}).get("x", "x"), "y": (labels or {}).get("y", "y"), "serie": ""}
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=CHART_CONFIG["cache_entries"])
+def _figure_json(chart_key: str, data_version: str, params: str, _build: Callable[[], go.Figure]) -> str:
+    # _build no participa de la clave (Streamlit ignora argumentos con "_")
+    return _build().to_json()
+
+
+def cached_figure(chart_key: str, data_version: str, build: Callable[[], go.Figure], **params) -> go.Figure:
+    """Figura cacheada como JSON por (gráfico, versión de datos, parámetros)
+
+    build solo se ejecuta cuando cambia alguno de los tres; la caché es
+    compartida entre sesiones.
+    """
+    figure_json = _figure_json(chart_key, data_version, json.dumps(params, sort_keys=True, default=str), build)
+    return pio.from_json(figure_json)
+
+
+def plot_cached(chart_key: str, data_version: str, build: Callable[[], go.Figure], **params):
+    """st.plotly_chart de una figura cacheada"""
+    st.plotly_chart(cached_figure(chart_key, data_version, build, **params), use_container_width=True)
@@ -12,6 +12,15 @@ BIGQUERY_PROJECT = "platform-partners-des"
 BIGQUERY_DATASET = "settings"
 BIGQUERY_TABLE = "works_index"
 
+# Proyectos por ambiente (cada uno con su propio settings.works_index)
+ENVIRONMENT_PROJECTS = {
+    "des": os.getenv("DSI_PROJECT_DES", "platform-partners-des"),
+    "qua": os.getenv("DSI_PROJECT_QUA", "platform-partners-qua"),
+    "pro": os.getenv("DSI_PROJECT_PRO", "platform-partners-pro"),
+}
+# Orden de promoción permitido (origen -> destino)
+PROMOTION_PATH = {"des": "qua", "qua": "pro"}
+
 # Configuración de Streamlit
 STREAMLIT_CONFIG = {
     "page_title": "Data Science Index",
@@ -27,7 +36,101 @@ APP_CONFIG = {
     "page_icon": "📊",
     "admin_password": os.getenv("ADMIN_PASSWORD", "admin123"),  # Cambiar en producción
     "max_image_size": 5 * 1024 * 1024,  # 5MB
-    "allowed_image_types": ["jpg", "jpeg", "png", "gif"]
+    "allowed_image_types": ["jpg", "jpeg", "png", "gif"],
+    # Tarjetas por página en la vista de cards del índice
+    "cards_page_size": int(os.getenv("DSI_CARDS_PAGE_SIZE", "20"))
+}
+
+# Configuración de acceso a BigQuery
+DATABASE_CONFIG = {
+    # Segundos entre re-chequeos de tablas/permisos disponibles (probe de capacidades)
+    "capability_ttl_seconds": int(os.getenv("DSI_CAPABILITY_TTL_SECONDS", "600")),
+    # Plazo máximo por consulta (segundos); las consultas que lo exceden se cancelan
+    "query_timeout_seconds": float(os.getenv("DSI_QUERY_TIMEOUT_SECONDS", "20")),
+    # Circuit breaker: fallos consecutivos para abrir el circuito y segundos antes de reintentar
+    "circuit_failure_threshold": int(os.getenv("DSI_CIRCUIT_FAILURE_THRESHOLD", "5")),
+    "circuit_reset_seconds": float(os.getenv("DSI_CIRCUIT_RESET_SECONDS", "30")),
+    # Hilos para lanzar consultas independientes en paralelo (fan-out)
+    "fanout_max_workers": int(os.getenv("DSI_FANOUT_MAX_WORKERS", "8")),
+    # Segundos que la API reutiliza el snapshot del catálogo antes de recargarlo
+    "catalog_refresh_seconds": float(os.getenv("DSI_CATALOG_REFRESH_SECONDS", "60")),
+    # Eventos SSE: cada cuántos segundos se buscan cambios y se envía keepalive
+    "events_poll_seconds": float(os.getenv("DSI_EVENTS_POLL_SECONDS", "10")),
+    "events_heartbeat_seconds": float(os.getenv("DSI_EVENTS_HEARTBEAT_SECONDS", "15")),
+    # Servir la última respuesta válida (marcada como stale) si BigQuery falla
+    "serve_stale_on_error": os.getenv("DSI_SERVE_STALE_ON_ERROR", "true").lower() == "true",
+    # Estadísticas: segundos entre recargas completas y trabajos recientes a mostrar
+    "stats_refresh_seconds": float(os.getenv("DSI_STATS_REFRESH_SECONDS", "300")),
+    "stats_recent_limit": int(os.getenv("DSI_STATS_RECENT_LIMIT", "10")),
+}
+
+# Publicación del catálogo como archivos JSON estáticos (un directorio local hace de bucket)
+STATIC_CATALOG_CONFIG = {
+    "output_dir": os.getenv(
+        "DSI_STATIC_CATALOG_DIR",
+        os.path.join(os.path.dirname(__file__), '..', 'frontend', 'catalog')
+    ),
+    # Publicar automáticamente tras create_work / update_work / delete_work
+    "publish_on_write": os.getenv("DSI_PUBLISH_ON_WRITE", "true").lower() == "true",
+    # Segundos que se conservan archivos ya no referenciados (clientes a mitad de carga)
+    "retention_seconds": int(os.getenv("DSI_STATIC_CATALOG_RETENTION_SECONDS", "3600")),
+}
+
+# Análisis de llamadas: registros crudos (un archivo por partición) y rollups locales
+CALLS_ANALYSIS_CONFIG = {
+    "raw_dir": os.getenv(
+        "DSI_CALLS_RAW_DIR",
+        os.path.join(os.path.dirname(__file__), '..', 'data', 'calls', 'raw')
+    ),
+    "rollup_dir": os.getenv(
+        "DSI_CALLS_ROLLUP_DIR",
+        os.path.join(os.path.dirname(__file__), '..', 'data', 'calls', 'rollups')
+    ),
+    # Filas por bloque al leer los archivos crudos
+    "chunk_rows": int(os.getenv("DSI_CALLS_CHUNK_ROWS", "500000")),
+    # Procesos para el análisis por compañía (0 = todos los núcleos)
+    "analysis_workers": int(os.getenv("DSI_CALLS_ANALYSIS_WORKERS", "0")),
+    # Tabla de BigQuery con los registros (proyecto.dataset.tabla); si se
+    # define, los rollups se calculan en BigQuery a través de la caché de consultas
+    "bigquery_table": os.getenv("DSI_CALLS_BIGQUERY_TABLE", ""),
+}
+
+# Caché en disco de resultados de consultas analíticas de los dashboards
+QUERY_CACHE_CONFIG = {
+    "cache_dir": os.getenv(
+        "DSI_QUERY_CACHE_DIR",
+        os.path.join(os.path.dirname(__file__), '..', 'data', 'query_cache')
+    ),
+    # Tamaño máximo total en disco; se descartan los resultados menos usados
+    "max_bytes": int(float(os.getenv("DSI_QUERY_CACHE_MAX_MB", "512")) * 1024 * 1024),
+    # Segundos que se reutiliza la fecha de modificación de una tabla
+    "metadata_ttl_seconds": float(os.getenv("DSI_QUERY_CACHE_METADATA_TTL_SECONDS", "30")),
+}
+
+# Gráficos de las páginas de categorías
+CHART_CONFIG = {
+    # Puntos máximos por serie enviados al navegador (~ ancho en píxeles del gráfico)
+    "max_points": int(os.getenv("DSI_CHART_MAX_POINTS", "1500")),
+    # Figuras serializadas que se conservan en caché por proceso
+    "cache_entries": int(os.getenv("DSI_CHART_CACHE_ENTRIES", "256")),
+}
+
+# Imágenes preview: miniaturas con hash de contenido en la ruta (inmutables)
+IMAGE_CONFIG = {
+    # Directorio local que hace las veces de bucket
+    "output_dir": os.getenv(
+        "DSI_IMAGE_DIR",
+        os.path.join(os.path.dirname(__file__), '..', 'frontend', 'images')
+    ),
+    # URL pública bajo la que se sirve output_dir (frontend o API)
+    "base_url": os.getenv("DSI_IMAGE_BASE_URL", "/images").rstrip("/"),
+    "max_bytes": int(float(os.getenv("DSI_IMAGE_MAX_MB", "5")) * 1024 * 1024),
+    # Límite de píxeles del original (protege contra decompression bombs)
+    "max_pixels": int(os.getenv("DSI_IMAGE_MAX_PIXELS", str(40_000_000))),
+    # Anchos generados; image_preview_url apunta a card_width en WebP
+    "widths": tuple(int(w) for w in os.getenv("DSI_IMAGE_WIDTHS", "160,320,640").split(",")),
+    "card_width": int(os.getenv("DSI_IMAGE_CARD_WIDTH", "320")),
+    "quality": int(os.getenv("DSI_IMAGE_QUALITY", "80")),
 }
 
 # Estados de trabajos
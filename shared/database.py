@@ -1,17 +1,209 @@
 """
 Conexión y operaciones con BigQuery para el índice de trabajos
 """
+import concurrent.futures
 import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from google.api_core import exceptions as google_exceptions
 from google.cloud import bigquery
 from google.oauth2 import service_account
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional
+
+from config import DATABASE_CONFIG
+from catalog import CompactCatalog, HEAVY_TEXT_COLUMNS
+from query_cache import QueryResultCache
+
+# Columnas de works_index que se pueden pedir en find_works
+WORK_COLUMNS = (
+    "work_id", "work_name", "work_slug", "category", "subcategory", "status", "version",
+    "is_latest", "description", "short_description", "image_preview_url", "created_date",
+    "updated_date", "activated_date", "archived_date", "streamlit_page", "work_url",
+    "config_json", "notes", "tags",
+)
+# Columnas para listados y para selectores (sin textos largos)
+LIST_COLUMNS = ("work_id", "work_name", "category", "status", "version", "created_date", "updated_date")
+INDEX_COLUMNS = ("work_id", "work_name", "status", "version")
+
+# Columnas (y tipos) de una fila de versión insertada por _merge_version
+VERSION_COLUMN_TYPES = {
+    "work_id": "STRING", "work_name": "STRING", "work_slug": "STRING", "category": "STRING",
+    "subcategory": "STRING", "status": "STRING", "version": "STRING", "is_latest": "BOOL",
+    "description": "STRING", "short_description": "STRING", "image_preview_url": "STRING",
+    "created_date": "TIMESTAMP", "updated_date": "TIMESTAMP", "activated_date": "TIMESTAMP",
+    "archived_date": "TIMESTAMP", "streamlit_page": "STRING", "work_url": "STRING",
+    "config_json": "STRING", "notes": "STRING", "tags": "ARRAY<STRING>",
+}
+
+
+def _query_parameter(name: str, column_type: str, value):
+    """Parámetro de consulta para una columna (NaN/NaT -> NULL, fechas ISO -> datetime)"""
+    if column_type == "ARRAY<STRING>":
+        return bigquery.ArrayQueryParameter(name, "STRING", [str(v) for v in (value if value is not None else [])])
+    if value is not None and not isinstance(value, (list, tuple)) and pd.isna(value):
+        value = None
+    if column_type == "TIMESTAMP" and value is not None:
+        value = pd.Timestamp(value).to_pydatetime()
+    return bigquery.ScalarQueryParameter(name, column_type, value)
+
+
+def _json_value(value):
+    """Valor serializable a JSON para un load job (fechas ISO, NaN -> None, arrays -> listas)"""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [str(v) for v in value]
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+# Errores que indican que la tabla no existe o no hay permisos (no transitorios)
+PERMISSION_ERRORS = (google_exceptions.Forbidden, google_exceptions.NotFound)
+
+# Cache de capacidades por proceso, compartido entre instancias de WorksDatabase
+# {project_id: {"capabilities": {tabla: bool}, "checked_at": monotonic}}
+_capabilities_cache: Dict[str, Dict] = {}
+_capabilities_lock = threading.Lock()
+_probe_lock = threading.Lock()
+
+
+class BackendUnavailableError(Exception):
+    """BigQuery no disponible: circuito abierto o consulta fuera de plazo"""
+
+
+class CircuitBreaker:
+    """Circuit breaker simple alrededor de BigQuery
+    
+    Tras `failure_threshold` fallos consecutivos el circuito se abre y las
+    consultas fallan de inmediato con BackendUnavailableError. Pasados
+    `reset_seconds` se deja pasar una consulta de prueba (half-open): si
+    funciona el circuito se cierra, si falla se vuelve a abrir.
+    """
+    
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+    
+    def before_call(self):
+        """Verificar si se permite la llamada (lanza BackendUnavailableError si el circuito está abierto)"""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            elapsed = time.monotonic() - self._opened_at
+            if elapsed >= self.reset_seconds:
+                # Half-open: una sola llamada de prueba por ventana de reset
+                self._opened_at = time.monotonic()
+                return
+            retry_in = self.reset_seconds - elapsed
+        raise BackendUnavailableError(f"Circuito abierto hacia BigQuery, reintentar en {retry_in:.0f}s")
+    
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    print(f"⚠️  Circuit breaker abierto tras {self._failures} fallos consecutivos")
+                self._opened_at = time.monotonic()
+
+
+# Columnas de fecha que marcan un cambio en un trabajo (creación, edición, archivo)
+CHANGE_DATE_COLUMNS = ("created_date", "updated_date", "archived_date")
+
+
+def compute_watermark(df: pd.DataFrame, default: Optional[datetime] = None) -> Optional[datetime]:
+    """Máxima fecha de cambio en un resultado (watermark para sincronización incremental)"""
+    if df.empty:
+        return default
+    timestamps = [
+        pd.to_datetime(df[column], utc=True, errors="coerce").max()
+        for column in CHANGE_DATE_COLUMNS if column in df.columns
+    ]
+    timestamps = [ts for ts in timestamps if pd.notna(ts)]
+    if not timestamps:
+        return default
+    return max(timestamps).to_pydatetime()
+
+
+# Listeners de escritura del proceso: listener(event, work_id, data) tras cada
+# create/update/delete exitoso ("created", "updated", "archived")
+_write_listeners: List[Callable[[str, str, Dict], None]] = []
+
+
+def add_write_listener(listener: Callable[[str, str, Dict], None]):
+    """Registrar un callback que se ejecuta después de cada escritura exitosa"""
+    _write_listeners.append(listener)
+
+
+def notify_write(event: str, work_id: str, data: Dict):
+    """Notificar a los listeners (un listener que falla no afecta la escritura)"""
+    for listener in list(_write_listeners):
+        try:
+            listener(event, work_id, data)
+        except Exception as e:
+            print(f"⚠️  Error en listener de escritura ({event} {work_id}): {e}")
+
+
+# Un circuit breaker por proyecto, compartido entre instancias de WorksDatabase
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+# Pool compartido para fan-out: los jobs de BigQuery corren en paralelo del lado del
+# servidor, los hilos solo esperan resultados y descargan filas
+_fanout_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=DATABASE_CONFIG["fanout_max_workers"],
+    thread_name_prefix="bq-fanout"
+)
+
+
+def get_circuit_breaker(project_id: str) -> CircuitBreaker:
+    """Obtener (o crear) el circuit breaker del proyecto"""
+    with _circuit_breakers_lock:
+        if project_id not in _circuit_breakers:
+            _circuit_breakers[project_id] = CircuitBreaker(
+                DATABASE_CONFIG["circuit_failure_threshold"],
+                DATABASE_CONFIG["circuit_reset_seconds"]
+            )
+        return _circuit_breakers[project_id]
+
+
+_query_caches: Dict[str, QueryResultCache] = {}
+_query_caches_lock = threading.Lock()
+
+
+def get_query_cache(client: bigquery.Client) -> QueryResultCache:
+    """Caché de resultados por proyecto, compartida entre instancias de WorksDatabase"""
+    with _query_caches_lock:
+        if client.project not in _query_caches:
+            _query_caches[client.project] = QueryResultCache(client)
+        return _query_caches[client.project]
+
 
 class WorksDatabase:
-    def __init__(self):
+    def __init__(self, project_id: Optional[str] = None):
         """Inicializar conexión a BigQuery
         
-        Detecta el proyecto desde la variable de entorno o usa el cliente por defecto
+        Usa project_id si se indica (p. ej. para comparar ambientes); si no, detecta
+        el proyecto desde la variable de entorno o usa el cliente por defecto
         """
         # Dataset y tabla son iguales en todos los ambientes
         self.dataset_id = "settings"
@@ -19,7 +211,7 @@ class WorksDatabase:
         
         # Detectar el proyecto desde variables de entorno o configuración
         # En Cloud Run, la service account tiene acceso al proyecto configurado
-        project_id = os.getenv('GCP_PROJECT') or os.getenv('GOOGLE_CLOUD_PROJECT')
+        project_id = project_id or os.getenv('GCP_PROJECT') or os.getenv('GOOGLE_CLOUD_PROJECT')
         
         if project_id:
             # Si hay variable de entorno, usarla explícitamente
@@ -31,16 +223,280 @@ class WorksDatabase:
             self.project_id = self.client.project
         
         self.table_ref = f"{self.project_id}.{self.dataset_id}.{self.table_id}"
+        # Vista de solo la última versión de cada trabajo: todas las lecturas pasan por acá
+        # (con clustering por is_latest, las versiones viejas no se escanean)
+        self.latest_works = f"(SELECT * FROM `{self.table_ref}` WHERE is_latest)"
+        self.categories_table_ref = f"{self.project_id}.{self.dataset_id}.works_categories"
+        self.circuit_breaker = get_circuit_breaker(self.project_id)
+    
+    def run_query(self, query: str, job_config: Optional[bigquery.QueryJobConfig] = None,
+                  timeout: Optional[float] = None, to_dataframe: bool = True):
+        """Ejecutar una consulta con deadline y circuit breaker
+        
+        Si la consulta excede el plazo se cancela el job y se lanza
+        BackendUnavailableError. Errores de permisos o de sintaxis no
+        cuentan como fallos del backend.
+        """
+        timeout = timeout or DATABASE_CONFIG["query_timeout_seconds"]
+        self.circuit_breaker.before_call()
+        deadline = time.monotonic() + timeout
+        job = None
+        try:
+            job = self.client.query(query, job_config=job_config, timeout=timeout)
+            rows = job.result(timeout=max(deadline - time.monotonic(), 0.1))
+            result = rows.to_dataframe() if to_dataframe else rows
+        except PERMISSION_ERRORS + (google_exceptions.BadRequest,):
+            raise
+        except (TimeoutError, concurrent.futures.TimeoutError) as e:
+            self.circuit_breaker.record_failure()
+            self._cancel_job(job)
+            raise BackendUnavailableError(f"La consulta excedió el plazo de {timeout:.0f}s") from e
+        except Exception:
+            self.circuit_breaker.record_failure()
+            raise
+        self.circuit_breaker.record_success()
+        return result
+    
+    def run_cached_query(self, query: str, job_config: Optional[bigquery.QueryJobConfig] = None,
+                         tables: Optional[List[str]] = None,
+                         columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Ejecutar una consulta analítica pesada a través de la caché en disco
+        
+        El resultado se reutiliza entre sesiones y réplicas hasta que cambie
+        alguna de las tablas de origen (por defecto, las referenciadas en el SQL).
+        """
+        return get_query_cache(self.client).get_or_run(
+            query,
+            lambda: self.run_query(query, job_config=job_config),
+            job_config=job_config,
+            tables=tables,
+            columns=columns
+        )
+    
+    def fetch_concurrently(self, **calls: Callable[[], Any]) -> Dict[str, Any]:
+        """Ejecutar varias lecturas independientes a la vez y recolectar los resultados
+        
+        Ejemplo: db.fetch_concurrently(categories=db.get_categories, works=db.get_all_works)
+        
+        El tiempo total es el de la consulta más lenta y no la suma. Cada llamada
+        conserva su propio deadline; si alguna falla se propaga su excepción.
+        """
+        futures = {name: _fanout_executor.submit(call) for name, call in calls.items()}
+        return {name: future.result() for name, future in futures.items()}
+    
+    def _cancel_job(self, job):
+        """Cancelar un job fuera de plazo para no seguir consumiendo slots"""
+        if job is None:
+            return
+        try:
+            job.cancel()
+        except Exception as e:
+            print(f"⚠️  No se pudo cancelar el job {getattr(job, 'job_id', '')}: {e}")
+    
+    def get_capabilities(self, force_refresh: bool = False) -> Dict[str, bool]:
+        """Obtener tablas accesibles para la service account actual
+        
+        El probe se ejecuta una vez por proceso y se re-chequea cada
+        DATABASE_CONFIG["capability_ttl_seconds"]. Así los fallbacks
+        (ejecución local sin permisos) no repiten consultas que van a fallar.
+        """
+        cached = self._cached_capabilities()
+        if cached is not None and not force_refresh:
+            return cached
+        
+        # Un solo probe a la vez: los demás hilos esperan y reutilizan el resultado
+        with _probe_lock:
+            cached = self._cached_capabilities()
+            if cached is not None and not force_refresh:
+                return cached
+            
+            capabilities = {
+                "works_index": self._can_read_table(self.table_ref),
+                "works_categories": self._can_read_table(self.categories_table_ref),
+            }
+            
+            with _capabilities_lock:
+                _capabilities_cache[self.project_id] = {
+                    "capabilities": capabilities,
+                    "checked_at": time.monotonic()
+                }
+            return capabilities
+    
+    def _cached_capabilities(self) -> Optional[Dict[str, bool]]:
+        """Capacidades cacheadas si aún no vencen, o None"""
+        ttl = DATABASE_CONFIG["capability_ttl_seconds"]
+        with _capabilities_lock:
+            cached = _capabilities_cache.get(self.project_id)
+            if cached and time.monotonic() - cached["checked_at"] < ttl:
+                return cached["capabilities"]
+        return None
+    
+    def has_works_categories(self) -> bool:
+        """Indica si works_categories es accesible (resultado cacheado del probe)"""
+        return self.get_capabilities().get("works_categories", False)
+    
+    def mark_unavailable(self, table_name: str):
+        """Registrar que una tabla falló por permisos (negative caching hasta el próximo re-chequeo)"""
+        with _capabilities_lock:
+            cached = _capabilities_cache.get(self.project_id)
+            if cached:
+                cached["capabilities"] = {**cached["capabilities"], table_name: False}
+            else:
+                _capabilities_cache[self.project_id] = {
+                    "capabilities": {"works_index": True, table_name: False},
+                    "checked_at": time.monotonic()
+                }
+    
+    def _can_read_table(self, table_ref: str) -> bool:
+        """Probar acceso a una tabla con un dry run (no escanea datos ni tiene costo)"""
+        job_config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
+        try:
+            self.client.query(f"SELECT 1 FROM `{table_ref}` LIMIT 1", job_config=job_config,
+                              timeout=DATABASE_CONFIG["query_timeout_seconds"])
+            return True
+        except PERMISSION_ERRORS as e:
+            print(f"⚠️  Sin acceso a {table_ref}: {e}")
+            return False
+        except Exception as e:
+            # Error transitorio: no cachear como no disponible, el llamador maneja el fallo
+            print(f"⚠️  No se pudo verificar acceso a {table_ref}: {e}")
+            return True
+    
+    def get_category_map(self) -> Dict[str, Dict]:
+        """Obtener mapeo category_id -> {name, icon, description} desde works_categories
+        
+        Retorna un diccionario vacío si works_categories no es accesible.
+        """
+        if not self.has_works_categories():
+            return {}
+        
+        query = f"""
+        SELECT category_id, category_name, category_icon, description
+        FROM `{self.categories_table_ref}`
+        WHERE is_active = true
+        """
+        try:
+            result = self.run_query(query)
+        except Exception as e:
+            print(f"⚠️  No se pudieron cargar categorías desde BigQuery: {e}")
+            if isinstance(e, PERMISSION_ERRORS):
+                self.mark_unavailable("works_categories")
+            return {}
+        
+        category_map = {}
+        for _, row in result.iterrows():
+            category_map[str(row.get("category_id", ""))] = {
+                "name": str(row.get("category_name", "")),
+                "icon": str(row.get("category_icon", "📊")),
+                "description": str(row.get("description", "") or "")
+            }
+        return category_map
     
     def get_all_works(self) -> pd.DataFrame:
         """Obtener todos los trabajos activos"""
         query = f"""
         SELECT *
-        FROM `{self.table_ref}`
+        FROM {self.latest_works}
+        WHERE status = 'active'
+        ORDER BY category, created_date DESC
+        """
+        return self.run_query(query)
+    
+    def find_works(self, category: Optional[str] = None, status: Optional[str] = None,
+                   columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Buscar trabajos con filtros aplicados en SQL (None = sin filtro, incluye archivados)
+        
+        Solo trae las columnas pedidas (por defecto LIST_COLUMNS), nunca los
+        textos largos salvo que se pidan explícitamente.
+        """
+        columns = list(columns or LIST_COLUMNS)
+        unknown = [column for column in columns if column not in WORK_COLUMNS]
+        if unknown:
+            raise ValueError(f"Columnas desconocidas: {', '.join(unknown)}")
+        
+        conditions, parameters = [], []
+        if category is not None:
+            conditions.append("category = @category")
+            parameters.append(bigquery.ScalarQueryParameter("category", "STRING", category))
+        if status is not None:
+            conditions.append("status = @status")
+            parameters.append(bigquery.ScalarQueryParameter("status", "STRING", status))
+        
+        query = f"""
+        SELECT {', '.join(columns)}
+        FROM {self.latest_works}
+        {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+        ORDER BY updated_date DESC
+        """
+        return self.run_query(query, job_config=bigquery.QueryJobConfig(query_parameters=parameters))
+    
+    def get_work_index(self, category: Optional[str] = None, status: Optional[str] = None) -> pd.DataFrame:
+        """Índice liviano (work_id, work_name, status, version) para selectores"""
+        return self.find_works(category=category, status=status, columns=list(INDEX_COLUMNS))
+    
+    def get_catalog(self) -> CompactCatalog:
+        """Obtener el catálogo compacto de trabajos activos
+        
+        No descarga description/notes: se cargan bajo demanda con get_work_texts.
+        """
+        query = f"""
+        SELECT * EXCEPT({', '.join(HEAVY_TEXT_COLUMNS)})
+        FROM {self.latest_works}
         WHERE status = 'active'
         ORDER BY category, created_date DESC
         """
-        return self.client.query(query).to_dataframe()
+        return CompactCatalog(self.run_query(query), text_loader=self.get_work_texts)
+    
+    def get_work_texts(self, work_ids: List[str]) -> Dict[str, Dict]:
+        """Obtener description/notes de varios trabajos en una sola consulta"""
+        query = f"""
+        SELECT work_id, {', '.join(HEAVY_TEXT_COLUMNS)}
+        FROM {self.latest_works}
+        WHERE work_id IN UNNEST(@work_ids)
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ArrayQueryParameter("work_ids", "STRING", list(work_ids))
+            ]
+        )
+        result = self.run_query(query, job_config=job_config)
+        return {record["work_id"]: record for record in result.to_dict('records')}
+    
+    def get_change_watermark(self) -> Optional[datetime]:
+        """Última fecha de cambio de cualquier trabajo vigente, incluidos los archivados
+        
+        Es el watermark de un snapshot del catálogo: calcularlo solo sobre los
+        trabajos activos no vería archivados ni cambios de estado.
+        """
+        query = f"""
+        SELECT MAX(changed_at) AS watermark
+        FROM {self.latest_works}, UNNEST([{', '.join(CHANGE_DATE_COLUMNS)}]) AS changed_at
+        """
+        result = self.run_query(query)
+        if result.empty or pd.isna(result["watermark"].iloc[0]):
+            return None
+        return pd.Timestamp(result["watermark"].iloc[0]).tz_convert("UTC").to_pydatetime()
+    
+    def get_works_changed_since(self, since: datetime) -> pd.DataFrame:
+        """Obtener trabajos creados, actualizados o archivados después de `since`
+        
+        Incluye todos los estados (los archivados indican bajas). El nuevo
+        watermark se obtiene con compute_watermark(resultado, since).
+        """
+        query = f"""
+        SELECT *
+        FROM {self.latest_works}
+        WHERE updated_date > @since
+           OR created_date > @since
+           OR archived_date > @since
+        ORDER BY updated_date
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("since", "TIMESTAMP", since)
+            ]
+        )
+        return self.run_query(query, job_config=job_config)
     
     def get_works_by_category(self, category_name: str) -> pd.DataFrame:
         """Obtener trabajos por categoría
@@ -48,12 +504,34 @@ class WorksDatabase:
         Intenta obtener category_id desde works_categories.
         Si no tiene permisos (local), asume que category_name es el category_id.
         """
+        category_id = category_name
+        if self.has_works_categories():
+            category_id = self._resolve_category_id(category_name)
+            if category_id is None:
+                return pd.DataFrame()  # No hay categoría con ese nombre
+        
+        # Obtener trabajos por category_id
+        works_query = f"""
+        SELECT *
+        FROM {self.latest_works}
+        WHERE category = @category_id AND status = 'active'
+        ORDER BY created_date DESC
+        """
+        
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("category_id", "STRING", category_id)
+            ]
+        )
+        
+        return self.run_query(works_query, job_config=job_config)
+    
+    def _resolve_category_id(self, category_name: str) -> Optional[str]:
+        """Resolver category_id desde works_categories (None si no existe la categoría)"""
         try:
-            # Intentar obtener el category_id desde works_categories
-            categories_table_ref = f"{self.project_id}.{self.dataset_id}.works_categories"
             category_query = f"""
             SELECT category_id
-            FROM `{categories_table_ref}`
+            FROM `{self.categories_table_ref}`
             WHERE category_name = @category_name AND is_active = true
             """
             
@@ -63,38 +541,24 @@ class WorksDatabase:
                 ]
             )
             
-            category_result = self.client.query(category_query, job_config=job_config).to_dataframe()
+            category_result = self.run_query(category_query, job_config=job_config)
             
             if category_result.empty:
-                return pd.DataFrame()  # No hay categoría con ese nombre
+                return None
             
-            category_id = category_result['category_id'].iloc[0]
+            return category_result['category_id'].iloc[0]
         except Exception as e:
             # Fallback: asumir que category_name es el category_id (para ejecución local)
             print(f"⚠️  No se pudo acceder a works_categories, usando category como ID: {e}")
-            category_id = category_name
-        
-        # Obtener trabajos por category_id
-        works_query = f"""
-        SELECT *
-        FROM `{self.table_ref}`
-        WHERE category = @category_id AND status = 'active'
-        ORDER BY created_date DESC
-        """
-        
-        job_config = bigquery.QueryJobConfig(
-            query_parameters=[
-                bigquery.ScalarQueryParameter("category_id", "STRING", category_id)
-            ]
-        )
-        
-        return self.client.query(works_query, job_config=job_config).to_dataframe()
+            if isinstance(e, PERMISSION_ERRORS):
+                self.mark_unavailable("works_categories")
+            return category_name
     
     def get_work_by_id(self, work_id: str) -> Optional[Dict]:
         """Obtener un trabajo específico por ID"""
         query = f"""
         SELECT *
-        FROM `{self.table_ref}`
+        FROM {self.latest_works}
         WHERE work_id = @work_id
         LIMIT 1
         """
@@ -103,7 +567,7 @@ class WorksDatabase:
                 bigquery.ScalarQueryParameter("work_id", "STRING", work_id)
             ]
         )
-        result = self.client.query(query, job_config=job_config).to_dataframe()
+        result = self.run_query(query, job_config=job_config)
         return result.to_dict('records')[0] if not result.empty else None
     
     def get_categories(self) -> List[str]:
@@ -111,31 +575,36 @@ class WorksDatabase:
         
         Si no tiene permisos (ejecución local), usa categorías de works_index
         """
-        try:
-            categories_table_ref = f"{self.project_id}.{self.dataset_id}.works_categories"
+        if self.has_works_categories():
             query = f"""
             SELECT category_name
-            FROM `{categories_table_ref}`
+            FROM `{self.categories_table_ref}`
             WHERE is_active = true
             ORDER BY display_order, category_name
             """
-            result = self.client.query(query).to_dataframe()
-            return result['category_name'].tolist()
-        except Exception as e:
-            # Fallback: usar categorías únicas de works_index (para ejecución local)
-            print(f"⚠️  No se pudo acceder a works_categories, usando fallback: {e}")
-            query = f"""
-            SELECT DISTINCT category
-            FROM `{self.table_ref}`
-            WHERE status = 'active' AND category IS NOT NULL
-            ORDER BY category
-            """
-            result = self.client.query(query).to_dataframe()
-            return result['category'].tolist()
+            try:
+                result = self.run_query(query)
+                return result['category_name'].tolist()
+            except Exception as e:
+                print(f"⚠️  No se pudo acceder a works_categories, usando fallback: {e}")
+                if isinstance(e, PERMISSION_ERRORS):
+                    self.mark_unavailable("works_categories")
+        
+        # Fallback: usar categorías únicas de works_index (para ejecución local)
+        query = f"""
+        SELECT DISTINCT category
+        FROM {self.latest_works}
+        WHERE status = 'active' AND category IS NOT NULL
+        ORDER BY category
+        """
+        result = self.run_query(query)
+        return result['category'].tolist()
     
     def create_work(self, work_data: Dict) -> bool:
-        """Crear nuevo trabajo"""
+        """Crear nuevo trabajo (su primera versión)"""
         try:
+            now = datetime.now(timezone.utc).isoformat()
+            
             # Preparar datos para inserción
             row_to_insert = {
                 "work_id": work_data["work_id"],
@@ -145,28 +614,278 @@ class WorksDatabase:
                 "subcategory": work_data.get("subcategory", ""),
                 "status": work_data["status"],
                 "version": work_data["version"],
-                "is_latest": work_data.get("is_latest", True),
+                "is_latest": True,
                 "description": work_data.get("description", ""),
                 "short_description": work_data.get("short_description", ""),
                 "image_preview_url": work_data.get("image_preview_url", ""),
-                "created_date": work_data.get("created_date", "CURRENT_TIMESTAMP()"),
-                "updated_date": "CURRENT_TIMESTAMP()",
+                # Timestamps reales para que updated_date sirva como watermark
+                # de sincronización incremental
+                "created_date": work_data.get("created_date", now),
+                "updated_date": now,
                 "activated_date": work_data.get("activated_date"),
                 "archived_date": work_data.get("archived_date"),
                 "streamlit_page": work_data["streamlit_page"],
+                "work_url": work_data.get("work_url"),
                 "config_json": work_data.get("config_json", "{}"),
                 "notes": work_data.get("notes", ""),
                 "tags": work_data.get("tags", [])
             }
             
-            # Insertar en BigQuery
-            errors = self.client.insert_rows_json(self.table_ref, [row_to_insert])
-            return len(errors) == 0
+            # Insertar con DML (no streaming): las filas quedan editables de inmediato
+            if not self._merge_version(row_to_insert):
+                return False
+            notify_write("created", row_to_insert["work_id"], row_to_insert)
+            return True
             
         except Exception as e:
             print(f"Error creating work: {e}")
             return False
     
+    def publish_version(self, work_id: str, version: str, changes: Optional[Dict] = None) -> bool:
+        """Publicar una nueva versión de un trabajo existente
+        
+        La fila nueva parte de la versión vigente más `changes`. Insertarla y
+        desmarcar is_latest de la anterior ocurre en un solo MERGE (atómico).
+        Retorna False si el trabajo no existe o esa versión ya fue publicada.
+        """
+        try:
+            current = self.get_work_by_id(work_id)
+            if current is None:
+                return False
+            
+            row = {column: current.get(column) for column in VERSION_COLUMN_TYPES}
+            row.update(changes or {})
+            row.update({
+                "work_id": work_id,
+                "version": version,
+                "is_latest": True,
+                "updated_date": datetime.now(timezone.utc).isoformat(),
+            })
+            
+            if not self._merge_version(row):
+                return False
+            notify_write("updated", work_id, row)
+            return True
+            
+        except Exception as e:
+            print(f"Error publishing version: {e}")
+            return False
+    
+    def _merge_version(self, row: Dict) -> bool:
+        """Insertar una versión y desmarcar la vigente en un único MERGE
+        
+        La fuente trae la fila nueva dos veces: con merge_key = work_id para
+        encontrar (y desmarcar) la versión vigente, y con merge_key NULL, que
+        nunca coincide, para insertarla. Si la versión ya existe la fuente queda
+        vacía y no se modifica nada.
+        """
+        columns = list(VERSION_COLUMN_TYPES)
+        select_list = ", ".join(f"@{column} AS {column}" for column in columns)
+        query = f"""
+        MERGE `{self.table_ref}` T
+        USING (
+            WITH new_version AS (
+                SELECT {select_list}
+                FROM UNNEST([1])
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM `{self.table_ref}`
+                    WHERE work_id = @work_id AND version = @version
+                )
+            )
+            SELECT work_id AS merge_key, * FROM new_version
+            UNION ALL
+            SELECT CAST(NULL AS STRING) AS merge_key, * FROM new_version
+        ) S
+        ON T.work_id = S.merge_key AND T.is_latest
+        WHEN MATCHED THEN
+            UPDATE SET is_latest = FALSE, updated_date = CURRENT_TIMESTAMP()
+        WHEN NOT MATCHED BY TARGET AND S.merge_key IS NULL THEN
+            INSERT ({', '.join(columns)})
+            VALUES ({', '.join(f"S.{column}" for column in columns)})
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                _query_parameter(column, column_type, row.get(column))
+                for column, column_type in VERSION_COLUMN_TYPES.items()
+            ]
+        )
+        rows = self.run_query(query, job_config=job_config, to_dataframe=False)
+        affected = getattr(rows, "num_dml_affected_rows", None)
+        return affected is None or affected > 0
+    
+    def bulk_upsert_works(self, rows: List[Dict]) -> Dict[str, int]:
+        """Cargar muchos trabajos con un load job a staging y un único MERGE
+        
+        Filas cuyo work_id ya existe actualizan la versión vigente (misma
+        versión) o publican una nueva (versión distinta); el resto se insertan.
+        Retorna los conteos {"created", "updated", "versioned"} estimados contra
+        el catálogo leído justo antes del MERGE.
+        """
+        if not rows:
+            return {"created": 0, "updated": 0, "versioned": 0}
+        
+        columns = list(VERSION_COLUMN_TYPES)
+        staging_ref = self._staging_ref("import")
+        existing = self.find_works(columns=["work_id", "version"])
+        existing_versions = dict(zip(existing["work_id"], existing["version"])) if not existing.empty else {}
+        counts = {"created": 0, "updated": 0, "versioned": 0}
+        for row in rows:
+            if row["work_id"] not in existing_versions:
+                counts["created"] += 1
+            elif existing_versions[row["work_id"]] == row["version"]:
+                counts["updated"] += 1
+            else:
+                counts["versioned"] += 1
+        
+        update_columns = [c for c in columns if c not in ("work_id", "version", "is_latest", "created_date")]
+        query = f"""
+        MERGE `{self.table_ref}` T
+        USING (
+            -- Versiones ya históricas se ignoran (no se reescribe el pasado)
+            WITH staged AS (
+                SELECT S.* FROM `{staging_ref}` S
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM `{self.table_ref}` H
+                    WHERE H.work_id = S.work_id AND H.version = S.version AND NOT H.is_latest
+                )
+            )
+            -- Misma versión: actualizar en el lugar. Versión distinta: desmarcar la
+            -- vigente (merge_key) e insertar la nueva (merge_key NULL)
+            SELECT work_id AS merge_key, * FROM staged
+            UNION ALL
+            SELECT CAST(NULL AS STRING) AS merge_key, * FROM staged
+            WHERE NOT EXISTS (
+                SELECT 1 FROM `{self.table_ref}` L
+                WHERE L.work_id = staged.work_id AND L.is_latest AND L.version = staged.version
+            )
+        ) S
+        ON T.work_id = S.merge_key AND T.is_latest
+        WHEN MATCHED AND T.version = S.version THEN
+            UPDATE SET {', '.join(f"{column} = S.{column}" for column in update_columns)}
+        WHEN MATCHED THEN
+            UPDATE SET is_latest = FALSE, updated_date = CURRENT_TIMESTAMP()
+        WHEN NOT MATCHED BY TARGET AND S.merge_key IS NULL THEN
+            INSERT ({', '.join(columns)})
+            VALUES ({', '.join(f"S.{column}" for column in columns)})
+        """
+        
+        self._merge_from_staging(rows, query, staging_ref)
+        
+        for row in rows:
+            event = "created" if row["work_id"] not in existing_versions else "updated"
+            notify_write(event, row["work_id"], row)
+        return counts
+    
+    def get_version_rows(self, work_ids: Optional[List[str]] = None) -> pd.DataFrame:
+        """Todas las filas de versión (vigentes e históricas) en una sola consulta"""
+        parameters = []
+        condition = ""
+        if work_ids:
+            condition = "WHERE work_id IN UNNEST(@work_ids)"
+            parameters.append(bigquery.ArrayQueryParameter("work_ids", "STRING", list(work_ids)))
+        query = f"""
+        SELECT {', '.join(VERSION_COLUMN_TYPES)}
+        FROM `{self.table_ref}`
+        {condition}
+        """
+        return self.run_query(
+            query,
+            job_config=bigquery.QueryJobConfig(query_parameters=parameters),
+            timeout=DATABASE_CONFIG["query_timeout_seconds"] * 3
+        )
+    
+    def merge_version_rows(self, rows: List[Dict]) -> int:
+        """Escribir filas de versión con clave work_id + version en un único MERGE
+        
+        Las claves que ya existen se sobrescriben completas (incluido is_latest)
+        y las nuevas se insertan. updated_date se fija al momento de la escritura
+        para que los watermarks del destino vean el cambio. Si una fila trae
+        is_latest, las demás versiones vigentes de ese work_id en el destino
+        (que no vienen en rows) se desmarcan en el mismo MERGE. Pensado para
+        copiar filas entre ambientes. Retorna la cantidad de filas escritas.
+        """
+        if not rows:
+            return 0
+        
+        columns = list(VERSION_COLUMN_TYPES)
+        copied = [column for column in columns if column not in ("work_id", "version", "updated_date")]
+        staging_ref = self._staging_ref("promote")
+        query = f"""
+        MERGE `{self.table_ref}` T
+        USING `{staging_ref}` S
+        ON T.work_id = S.work_id AND T.version = S.version
+        WHEN MATCHED THEN
+            UPDATE SET {', '.join(f"{column} = S.{column}" for column in copied)},
+                       updated_date = CURRENT_TIMESTAMP()
+        WHEN NOT MATCHED BY TARGET THEN
+            INSERT ({', '.join(columns)})
+            VALUES ({', '.join("CURRENT_TIMESTAMP()" if column == "updated_date" else f"S.{column}" for column in columns)})
+        WHEN NOT MATCHED BY SOURCE AND T.is_latest
+             AND T.work_id IN (SELECT work_id FROM `{staging_ref}` WHERE is_latest) THEN
+            UPDATE SET is_latest = FALSE, updated_date = CURRENT_TIMESTAMP()
+        """
+        self._merge_from_staging(rows, query, staging_ref)
+        
+        for row in rows:
+            if row.get("is_latest"):
+                notify_write("updated", row["work_id"], row)
+        return len(rows)
+    
+    def _staging_ref(self, purpose: str) -> str:
+        return f"{self.table_ref}_{purpose}_{uuid.uuid4().hex[:12]}"
+    
+    def _merge_from_staging(self, rows: List[Dict], query: str, staging_ref: str):
+        """Cargar rows a staging_ref con un solo load job, ejecutar el MERGE y borrar staging"""
+        schema = [
+            bigquery.SchemaField(column, "STRING", mode="REPEATED") if column_type == "ARRAY<STRING>"
+            else bigquery.SchemaField(column, column_type)
+            for column, column_type in VERSION_COLUMN_TYPES.items()
+        ]
+        payload = [{column: _json_value(row.get(column)) for column in VERSION_COLUMN_TYPES} for row in rows]
+        load_config = bigquery.LoadJobConfig(
+            schema=schema,
+            write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE
+        )
+        timeout = DATABASE_CONFIG["query_timeout_seconds"] * 3
+        try:
+            self.client.load_table_from_json(payload, staging_ref, job_config=load_config).result(timeout=timeout)
+            self.run_query(query, to_dataframe=False, timeout=timeout)
+        finally:
+            self.client.delete_table(staging_ref, not_found_ok=True)
+    
+    def get_work_versions(self, work_id: str) -> pd.DataFrame:
+        """Historial de versiones de un trabajo (liviano, la más reciente primero)"""
+        query = f"""
+        SELECT work_id, version, is_latest, status, created_date, updated_date
+        FROM `{self.table_ref}`
+        WHERE work_id = @work_id
+        ORDER BY is_latest DESC, updated_date DESC
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("work_id", "STRING", work_id)
+            ]
+        )
+        return self.run_query(query, job_config=job_config)
+    
+    def get_work_version(self, work_id: str, version: str) -> Optional[Dict]:
+        """Obtener una versión específica (vigente o anterior) de un trabajo"""
+        query = f"""
+        SELECT *
+        FROM `{self.table_ref}`
+        WHERE work_id = @work_id AND version = @version
+        ORDER BY updated_date DESC
+        LIMIT 1
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("work_id", "STRING", work_id),
+                bigquery.ScalarQueryParameter("version", "STRING", version)
+            ]
+        )
+        result = self.run_query(query, job_config=job_config)
+        return result.to_dict('records')[0] if not result.empty else None
+    
     def update_work(self, work_id: str, update_data: Dict) -> bool:
         """Actualizar trabajo existente"""
         try:
@@ -189,11 +908,11 @@ class WorksDatabase:
             query = f"""
             UPDATE `{self.table_ref}`
             SET {', '.join(set_clauses)}, updated_date = CURRENT_TIMESTAMP()
-            WHERE work_id = '{work_id}'
+            WHERE work_id = '{work_id}' AND is_latest
             """
             
-            job = self.client.query(query)
-            job.result()  # Esperar a que termine
+            self.run_query(query, to_dataframe=False)  # Esperar a que termine
+            notify_write("updated", work_id, update_data)
             return True
             
         except Exception as e:
@@ -208,11 +927,11 @@ class WorksDatabase:
             SET status = 'archived', 
                 archived_date = CURRENT_TIMESTAMP(),
                 updated_date = CURRENT_TIMESTAMP()
-            WHERE work_id = '{work_id}'
+            WHERE work_id = '{work_id}' AND is_latest
             """
             
-            job = self.client.query(query)
-            job.result()
+            self.run_query(query, to_dataframe=False)
+            notify_write("archived", work_id, {"status": "archived"})
             return True
             
         except Exception as e:
@@ -223,7 +942,7 @@ class WorksDatabase:
         """Obtener trabajo por slug (para URLs amigables)"""
         query = f"""
         SELECT *
-        FROM `{self.table_ref}`
+        FROM {self.latest_works}
         WHERE work_slug = @work_slug AND status = 'active'
         LIMIT 1
         """
@@ -232,5 +951,5 @@ class WorksDatabase:
                 bigquery.ScalarQueryParameter("work_slug", "STRING", work_slug)
             ]
         )
-        result = self.client.query(query, job_config=job_config).to_dataframe()
+        result = self.run_query(query, job_config=job_config)
         return result.to_dict('records')[0] if not result.empty else None
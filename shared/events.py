@@ -0,0 +1,104 @@
+"""
+Difusión de cambios del catálogo a clientes conectados (Server-Sent Events)
+"""
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, Optional, Set, Tuple
+
+from response_cache import encode_json
+
+
+def format_sse(event: str, payload: Dict, event_id: Optional[str] = None) -> bytes:
+    """Codificar un mensaje SSE (una sola vez para todos los clientes)"""
+    lines = [f"event: {event}"]
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {encode_json(payload).decode('utf-8')}")
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class ChangeBroadcaster:
+    """Pub/sub asíncrono de cambios del catálogo para conexiones SSE
+
+    Un solo poller por proceso busca cambios y cada mensaje se codifica una
+    vez; cada cliente conectado solo ocupa una cola acotada en el event loop.
+    Los clientes lentos cuya cola se llena reciben un evento "resync" y
+    recargan el catálogo completo.
+
+    poll_changes(watermark) -> (payload | None, nuevo_watermark) se ejecuta en
+    un hilo del executor porque consulta BigQuery de forma bloqueante.
+    """
+
+    def __init__(self, poll_changes: Callable[[Optional[datetime]], Tuple[Optional[Dict], Optional[datetime]]],
+                 poll_seconds: float, heartbeat_seconds: float, queue_size: int = 16):
+        self.poll_changes = poll_changes
+        self.poll_seconds = poll_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.queue_size = queue_size
+        self.watermark: Optional[datetime] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: str, payload: Dict, event_id: Optional[str] = None):
+        """Enviar un evento a todos los suscriptores (debe llamarse desde el event loop)"""
+        message = format_sse(event, payload, event_id)
+        resync = None
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Cliente atrasado: descartar lo pendiente y pedirle recarga completa
+                while not queue.empty():
+                    queue.get_nowait()
+                resync = resync or format_sse("resync", {})
+                queue.put_nowait(resync)
+
+    def wake(self):
+        """Forzar una búsqueda de cambios inmediata (seguro desde cualquier hilo)"""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def run(self):
+        """Loop del poller: busca cambios solo mientras haya clientes conectados"""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            if not self._subscribers and self.watermark is not None:
+                continue
+            try:
+                payload, watermark = await self._loop.run_in_executor(None, self.poll_changes, self.watermark)
+            except Exception as e:
+                print(f"⚠️  Error buscando cambios del catálogo: {e}")
+                continue
+
+            self.watermark = watermark
+            if payload is not None:
+                self.publish("works", payload, event_id=payload.get("watermark"))
+
+    async def stream(self, is_disconnected: Callable) -> AsyncIterator[bytes]:
+        """Generador SSE de un cliente: eventos de cambio + keepalive periódico"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    message = b": keepalive\n\n"
+                if await is_disconnected():
+                    break
+                yield message
+        finally:
+            self._subscribers.discard(queue)
@@ -0,0 +1,174 @@
+"""
+Pipeline de imágenes preview: validación por encabezado y miniaturas inmutables
+
+La validación lee solo los primeros bytes del archivo (firma del formato) y el
+encabezado que Pillow necesita para conocer las dimensiones; el archivo
+completo se decodifica una sola vez, al generar las miniaturas.
+
+Cada original se guarda por el hash de su contenido:
+    <output_dir>/<hash>/<ancho>.webp y <ancho>.jpg
+Una ruta nunca cambia de contenido, así que se sirve con caché inmutable.
+image_preview_url apunta a la miniatura WebP de la tarjeta; las demás
+variantes se derivan con thumbnail_url().
+"""
+import hashlib
+import io
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from config import IMAGE_CONFIG
+
+# Firmas de los formatos aceptados (primeros bytes del archivo)
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+HEADER_BYTES = 16
+OUTPUT_FORMATS = {"webp": "WEBP", "jpg": "JPEG"}
+IMAGE_PATH_PATTERN = re.compile(r"^[0-9a-f]{24}/[0-9]+\.(webp|jpg)$")
+# Cache-Control para las miniaturas: la ruta incluye el hash, nunca cambian
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def sniff_image_format(header: bytes) -> Optional[str]:
+    """Formato real según la firma del encabezado (None si no es una imagen aceptada)"""
+    for signature, image_format in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _stream_size(stream) -> int:
+    """Tamaño de un archivo abierto sin leerlo (seek al final)"""
+    position = stream.tell()
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(position)
+    return size
+
+
+def inspect_image(stream) -> Tuple[str, Tuple[int, int]]:
+    """Validar un archivo de imagen leyendo solo su encabezado
+
+    Retorna (formato, (ancho, alto)) o lanza ValueError con el motivo.
+    """
+    stream.seek(0)
+    size = _stream_size(stream)
+    if size > IMAGE_CONFIG["max_bytes"]:
+        raise ValueError(f"El archivo es muy grande. Máximo {IMAGE_CONFIG['max_bytes'] // (1024 * 1024)}MB")
+
+    image_format = sniff_image_format(stream.read(HEADER_BYTES))
+    stream.seek(0)
+    if image_format is None:
+        raise ValueError("El archivo no es una imagen JPEG, PNG, GIF o WebP válida")
+
+    # Image.open es perezoso: solo parsea el encabezado hasta que se piden píxeles
+    try:
+        with Image.open(stream) as image:
+            dimensions = image.size
+    except Exception as e:
+        raise ValueError(f"Encabezado de imagen inválido: {e}") from e
+    finally:
+        stream.seek(0)
+
+    if dimensions[0] * dimensions[1] > IMAGE_CONFIG["max_pixels"]:
+        raise ValueError(f"Imagen demasiado grande ({dimensions[0]}x{dimensions[1]} píxeles)")
+    return image_format, dimensions
+
+
+def _content_hash(stream) -> str:
+    """Hash del archivo leído en bloques (sin cargarlo entero en memoria)"""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for block in iter(lambda: stream.read(1024 * 1024), b""):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()[:24]
+
+
+def thumbnail_url(image_preview_url: str, width: Optional[int] = None, extension: str = "webp") -> str:
+    """URL de otra variante a partir de image_preview_url (width None = mismo ancho)"""
+    if not image_preview_url:
+        return ""
+    base, _, name = image_preview_url.rpartition("/")
+    return f"{base}/{width or name.split('.')[0]}.{extension}"
+
+
+class ImageStore:
+    """Miniaturas con hash de contenido en un directorio local (en lugar de un bucket)"""
+
+    def __init__(self, output_dir: Optional[str] = None, base_url: Optional[str] = None):
+        self.output_dir = os.path.abspath(output_dir or IMAGE_CONFIG["output_dir"])
+        self.base_url = (base_url if base_url is not None else IMAGE_CONFIG["base_url"]).rstrip("/")
+
+    def store(self, stream) -> Dict:
+        """Validar, generar las miniaturas y retornar sus URLs
+
+        Si el mismo original ya se procesó, no se vuelve a decodificar.
+        """
+        image_format, dimensions = inspect_image(stream)
+        digest = _content_hash(stream)
+        directory = os.path.join(self.output_dir, digest)
+        card_width = min(IMAGE_CONFIG["card_width"], dimensions[0])
+        widths = sorted({min(width, dimensions[0]) for width in IMAGE_CONFIG["widths"]} | {card_width})
+
+        if not all(os.path.exists(os.path.join(directory, f"{width}.{extension}"))
+                   for width in widths for extension in OUTPUT_FORMATS):
+            self._render(stream, image_format, directory, widths)
+
+        return {
+            "image_preview_url": f"{self.base_url}/{digest}/{card_width}.webp",
+            "variants": {
+                extension: {width: f"{self.base_url}/{digest}/{width}.{extension}" for width in widths}
+                for extension in OUTPUT_FORMATS
+            },
+            "source_format": image_format,
+            "dimensions": dimensions,
+        }
+
+    def _render(self, stream, image_format: str, directory: str, widths):
+        with Image.open(stream) as image:
+            if image_format == "jpeg":
+                # Decodificar JPEG directamente a escala reducida (mucho más rápido)
+                image.draft("RGB", (max(widths), max(widths) * image.height // max(image.width, 1)))
+            image = ImageOps.exif_transpose(image)
+            has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+            for width in sorted(widths, reverse=True):
+                resized = image.copy()
+                resized.thumbnail((width, image.height), Image.LANCZOS)
+                for extension, pil_format in OUTPUT_FORMATS.items():
+                    frame = resized
+                    if pil_format == "JPEG" and frame.mode != "RGB":
+                        # JPEG no tiene transparencia: componer sobre fondo blanco
+                        background = Image.new("RGB", frame.size, (255, 255, 255))
+                        background.paste(frame, mask=frame.getchannel("A"))
+                        frame = background
+                    body = io.BytesIO()
+                    frame.save(body, pil_format, quality=IMAGE_CONFIG["quality"], optimize=True)
+                    self._write_atomic(os.path.join(directory, f"{width}.{extension}"), body.getvalue())
+        stream.seek(0)
+
+    def _write_atomic(self, path: str, body: bytes):
+        """Escribir a un temporal y renombrar: nunca se sirve una miniatura a medias"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def resolve(self, relative_path: str) -> Optional[str]:
+        """Ruta en disco de una miniatura (None si la ruta no es válida o no existe)"""
+        if not IMAGE_PATH_PATTERN.match(relative_path):
+            return None
+        path = os.path.join(self.output_dir, relative_path)
+        return path if os.path.exists(path) else None
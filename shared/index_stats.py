@@ -0,0 +1,227 @@
+"""
+Estadísticas del índice de trabajos
+
+Una sola consulta trae la clave (categoría, estado, versión) y los meses de
+activación, creación y archivado de cada trabajo vigente, más los últimos
+trabajos modificados, sin descargar el resto del catálogo. Los conteos y las
+series mensuales se derivan de esas filas y después se mantienen en memoria
+con los eventos de escritura de WorksDatabase (create_work / update_work /
+delete_work): como se conoce la clave de todos los trabajos, cada evento
+mueve el trabajo de un contador a otro. Solo un trabajo que no estaba en la carga (p.ej. creado por otro
+proceso) marca los contadores como desactualizados y se recargan con la
+misma consulta en la siguiente lectura.
+"""
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+from google.cloud import bigquery
+
+from config import DATABASE_CONFIG
+from database import WorksDatabase, add_write_listener
+
+# Campos que determinan en qué contador está un trabajo
+COUNTER_FIELDS = ("category", "status", "version")
+
+
+def _month(value) -> Optional[str]:
+    if value is None or pd.isna(value):
+        return None
+    return pd.Timestamp(value).strftime("%Y-%m")
+
+
+def _activation_month(status, activated_month, created_month) -> Optional[str]:
+    """Mes de activación de un trabajo (None si nunca se activó)
+
+    Solo cuenta activated_date; los trabajos activos anteriores a esa columna
+    (activated_date NULL) se cuentan en su mes de creación.
+    """
+    if pd.notna(activated_month):
+        return activated_month
+    if status == "active" and pd.notna(created_month):
+        return created_month
+    return None
+
+
+class WorksStatistics:
+    """Contadores del índice cargados con una consulta y mantenidos por eventos"""
+
+    def __init__(self, db: WorksDatabase, recent_limit: Optional[int] = None):
+        self.db = db
+        self.recent_limit = recent_limit or DATABASE_CONFIG["stats_recent_limit"]
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+        self._activations: Counter = Counter()
+        self._archivals: Counter = Counter()
+        self._recent: deque = deque(maxlen=self.recent_limit)
+        # Clave (category, status, version) de cada trabajo vigente
+        self._keys: Dict[str, Tuple] = {}
+        self._loaded_at: Optional[float] = None
+        self._stale = True
+
+    def load(self):
+        """Recargar todos los contadores con una única consulta"""
+        query = f"""
+        WITH works AS (
+            SELECT work_id, work_name, category, status, version,
+                   created_date, updated_date, activated_date, archived_date
+            FROM {self.db.latest_works}
+        )
+        SELECT 'key' AS kind, work_id, category, status, version,
+               FORMAT_TIMESTAMP('%Y-%m', activated_date) AS activated_month,
+               FORMAT_TIMESTAMP('%Y-%m', created_date) AS created_month,
+               FORMAT_TIMESTAMP('%Y-%m', archived_date) AS archived_month,
+               CAST(NULL AS STRING) AS work_name, CAST(NULL AS TIMESTAMP) AS changed_at
+        FROM works
+        UNION ALL
+        SELECT * FROM (
+            SELECT 'recent', work_id, category, status, version, NULL, NULL, NULL, work_name, updated_date
+            FROM works
+            ORDER BY updated_date DESC
+            LIMIT @recent_limit
+        )
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("recent_limit", "INT64", self.recent_limit)
+            ]
+        )
+        result = self.db.run_query(query, job_config=job_config)
+
+        activations, archivals = Counter(), Counter()
+        recent, keys = [], {}
+        for row in result.itertuples(index=False):
+            if row.kind == "key":
+                keys[row.work_id] = (row.category, row.status, row.version)
+                month = _activation_month(row.status, row.activated_month, row.created_month)
+                if month:
+                    activations[month] += 1
+                if pd.notna(row.archived_month):
+                    archivals[row.archived_month] += 1
+            elif row.kind == "recent":
+                recent.append({
+                    "work_id": row.work_id,
+                    "work_name": row.work_name,
+                    "status": row.status,
+                    "changed_at": row.changed_at.isoformat() if pd.notna(row.changed_at) else None,
+                })
+        recent.sort(key=lambda work: work["changed_at"] or "", reverse=True)
+        counts = Counter(keys.values())
+
+        with self._lock:
+            self._counts, self._activations, self._archivals = counts, activations, archivals
+            self._recent = deque(recent, maxlen=self.recent_limit)
+            self._keys = keys
+            self._loaded_at = time.monotonic()
+            self._stale = False
+
+    def apply_write(self, event: str, work_id: str, data: Dict):
+        """Ajustar los contadores con un evento de escritura (listener de WorksDatabase)"""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            previous = self._keys.get(work_id)
+
+            if event == "created":
+                key = tuple(data.get(field) for field in COUNTER_FIELDS)
+                self._counts[key] += 1
+                if data.get("status") == "active":
+                    self._activations[_month(data.get("activated_date") or now)] += 1
+            elif previous is None and (event == "archived" or any(field in data for field in COUNTER_FIELDS)):
+                # Trabajo fuera de la última carga: recargar en la próxima lectura
+                self._stale = True
+                key = None
+            else:
+                key = previous
+                if previous is not None:
+                    key = tuple(data.get(field, old) for field, old in zip(COUNTER_FIELDS, previous))
+                    self._move(previous, key)
+                if event == "archived":
+                    self._archivals[_month(now)] += 1
+                elif previous is not None and previous[1] != "active" and key[1] == "active":
+                    self._activations[_month(now)] += 1
+
+            if key is not None:
+                self._keys[work_id] = key
+            previous_entry = next((work for work in self._recent if work["work_id"] == work_id), {})
+            self._recent = deque(
+                [work for work in self._recent if work["work_id"] != work_id],
+                maxlen=self.recent_limit
+            )
+            self._recent.appendleft({
+                "work_id": work_id,
+                "work_name": data.get("work_name") or previous_entry.get("work_name"),
+                "status": key[1] if key else data.get("status"),
+                "changed_at": now.isoformat(),
+            })
+
+    def _move(self, previous: Tuple, key: Tuple):
+        if previous == key:
+            return
+        self._counts[previous] -= 1
+        if self._counts[previous] <= 0:
+            del self._counts[previous]
+        self._counts[key] += 1
+
+    def snapshot(self, max_age: Optional[float] = None) -> Dict:
+        """Estadísticas actuales; recarga si están desactualizadas o más viejas que max_age"""
+        max_age = max_age if max_age is not None else DATABASE_CONFIG["stats_refresh_seconds"]
+        with self._lock:
+            expired = self._loaded_at is None or time.monotonic() - self._loaded_at > max_age
+            needs_load = self._stale or expired
+        if needs_load:
+            self.load()
+
+        with self._lock:
+            return self._build_snapshot()
+
+    def _build_snapshot(self) -> Dict:
+        by_category, by_status, by_version = Counter(), Counter(), Counter()
+        for (category, status, version), count in self._counts.items():
+            by_category[category] += count
+            by_status[status] += count
+            by_version[version] += count
+
+        # Serie mensual: activaciones, archivados y tasa de archivado acumulada
+        timeline = []
+        activated_total = archived_total = 0
+        for month in sorted(set(self._activations) | set(self._archivals)):
+            activated_total += self._activations.get(month, 0)
+            archived_total += self._archivals.get(month, 0)
+            timeline.append({
+                "month": month,
+                "activated": self._activations.get(month, 0),
+                "archived": self._archivals.get(month, 0),
+                "archival_rate": round(archived_total / activated_total, 4) if activated_total else 0.0,
+            })
+
+        total = sum(self._counts.values())
+        return {
+            "total": total,
+            "active": by_status.get("active", 0),
+            "by_category": dict(by_category.most_common()),
+            "by_status": dict(by_status.most_common()),
+            "by_version": dict(sorted(by_version.items(), key=lambda item: str(item[0]))),
+            "timeline": timeline,
+            "recent": list(self._recent),
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+
+_statistics: Dict[str, WorksStatistics] = {}
+_statistics_lock = threading.Lock()
+
+
+def get_statistics(db: Optional[WorksDatabase] = None) -> WorksStatistics:
+    """Estadísticas compartidas por proceso (se suscriben a las escrituras una sola vez)"""
+    db = db or WorksDatabase()
+    with _statistics_lock:
+        if db.project_id not in _statistics:
+            statistics = WorksStatistics(db)
+            add_write_listener(statistics.apply_write)
+            _statistics[db.project_id] = statistics
+        return _statistics[db.project_id]
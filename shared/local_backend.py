@@ -0,0 +1,61 @@
+"""
+Backend local de works_index sobre un archivo Parquet
+
+Reemplazo de WorksDatabase para desarrollo y pruebas sin BigQuery: implementa
+las operaciones de filas de versión que usa la promoción entre ambientes
+(get_version_rows / merge_version_rows) con las mismas semánticas, guardando
+cada ambiente en su propio archivo.
+"""
+import os
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from database import VERSION_COLUMN_TYPES
+
+
+class LocalWorksBackend:
+    """works_index de un ambiente guardado en <directorio>/<ambiente>.parquet"""
+
+    def __init__(self, path: str, project_id: Optional[str] = None):
+        self.path = path
+        self.project_id = project_id or os.path.splitext(os.path.basename(path))[0]
+        self.table_ref = f"local:{self.path}"
+
+    def _load(self) -> pd.DataFrame:
+        if not os.path.exists(self.path):
+            return pd.DataFrame(columns=list(VERSION_COLUMN_TYPES))
+        return pd.read_parquet(self.path).reindex(columns=list(VERSION_COLUMN_TYPES))
+
+    def get_version_rows(self, work_ids: Optional[List[str]] = None) -> pd.DataFrame:
+        """Todas las filas de versión del ambiente (una lectura del archivo)"""
+        rows = self._load()
+        if work_ids:
+            rows = rows[rows["work_id"].isin(list(work_ids))]
+        return rows.reset_index(drop=True)
+
+    def merge_version_rows(self, rows: List[Dict]) -> int:
+        """Mismo contrato que WorksDatabase.merge_version_rows (clave work_id + version,
+        updated_date de escritura y desmarcado de otras versiones vigentes)"""
+        if not rows:
+            return 0
+        now = pd.Timestamp.now(tz="UTC")
+        incoming = pd.DataFrame(rows).reindex(columns=list(VERSION_COLUMN_TYPES))
+        incoming["updated_date"] = now
+        current = self._load()
+        incoming_keys = pd.MultiIndex.from_frame(incoming[["work_id", "version"]])
+        current_keys = pd.MultiIndex.from_frame(current[["work_id", "version"]])
+        kept = current[~current_keys.isin(incoming_keys)].copy()
+
+        # Otras versiones vigentes de trabajos que llegan con una versión vigente
+        promoted_latest = set(incoming.loc[incoming["is_latest"].fillna(False).astype(bool), "work_id"])
+        demoted = kept["is_latest"].fillna(False).astype(bool) & kept["work_id"].isin(promoted_latest)
+        kept.loc[demoted, "is_latest"] = False
+        kept.loc[demoted, "updated_date"] = now
+        merged = pd.concat([kept, incoming], ignore_index=True)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp-{os.getpid()}"
+        merged.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+        return len(rows)
@@ -0,0 +1,101 @@
+"""
+Renderizado del shell del frontend con el catálogo inicial embebido
+
+Toma frontend/index.html como plantilla, embebe /works y /categories como
+JSON (los mismos bytes que sirve la API) y pre-renderiza la primera pantalla
+de la lista de trabajos, para que el primer paint no espere dos requests.
+"""
+import html
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+# Plantilla: junto al repo (desarrollo) o copiada dentro del contenedor de la API
+TEMPLATE_PATHS = [
+    os.getenv("DSI_FRONTEND_TEMPLATE", ""),
+    os.path.join(os.path.dirname(__file__), '..', 'frontend', 'index.html'),
+    os.path.join(os.path.dirname(__file__), 'frontend', 'index.html'),
+]
+
+INITIAL_CATALOG_MARKER = "<!--initial-catalog-->"
+WORKS_LIST_PATTERN = re.compile(r"<!--works-list:start-->.*?<!--works-list:end-->", re.DOTALL)
+CATEGORIES_CONTAINER = '<div class="category-filter" id="categories"></div>'
+STATS_PLACEHOLDER = '<span id="stats-text">Cargando...</span>'
+
+_template_cache: Dict[str, str] = {}
+
+
+def load_template() -> str:
+    """Leer (una vez por proceso) la plantilla index.html del frontend"""
+    for path in TEMPLATE_PATHS:
+        if path and os.path.exists(path):
+            if path not in _template_cache:
+                with open(path, "r", encoding="utf-8") as f:
+                    _template_cache[path] = f.read()
+            return _template_cache[path]
+    raise FileNotFoundError("No se encontró frontend/index.html para renderizar el shell")
+
+
+def _script_safe(json_text: str) -> str:
+    """Evitar que el JSON cierre el <script> o rompa el parser de JavaScript"""
+    return (json_text.replace("</", "<\\/")
+            .replace("\u2028", "\\u2028")
+            .replace("\u2029", "\\u2029"))
+
+
+def _render_work_item(work: Dict) -> str:
+    """Mismo markup que renderWorksList() en index.html"""
+    title = work.get("title") or work.get("work_name") or "Sin título"
+    category = work.get("category_name") or work.get("category") or ""
+    status = (work.get("status") or "active").lower()
+    return f"""
+                    <div class="work-item"
+                         data-work-id="{html.escape(work.get("work_id", ""))}"
+                         data-work-url="{html.escape(work.get("url") or work.get("work_url") or "")}"
+                         data-work-title="{html.escape(title)}"
+                         data-work-category="{html.escape(category)}"
+                         role="button"
+                         tabindex="0">
+                        <div class="work-item-content">
+                            <div class="work-item-title">{html.escape(title)}</div>
+                            <div class="work-item-meta">
+                                <span>{html.escape(category)}</span>
+                                <span>•</span>
+                                <span class="work-item-status {html.escape(status)}">{html.escape(status)}</span>
+                            </div>
+                        </div>
+                    </div>"""
+
+
+def _render_categories(categories: List[Dict]) -> str:
+    buttons = ['<button class="category-btn active">Todos</button>']
+    buttons += [f'<button class="category-btn">{html.escape(cat.get("name", ""))}</button>' for cat in categories]
+    return f'<div class="category-filter" id="categories">{"".join(buttons)}</div>'
+
+
+def render_page_shell(works_json: bytes, categories_json: bytes, works: List[Dict],
+                      categories: List[Dict], api_url: Optional[str] = None,
+                      first_screen: int = 50) -> str:
+    """Renderizar index.html con el catálogo embebido y la primera pantalla pre-renderizada"""
+    page = load_template()
+
+    initial_script = (
+        "<script>\n"
+        f"        window.__INITIAL_CATALOG__ = {{\"works\": {_script_safe(works_json.decode('utf-8'))}, "
+        f"\"categories\": {_script_safe(categories_json.decode('utf-8'))}}};\n"
+    )
+    if api_url:
+        initial_script += f"        window.API_URL = {_script_safe(json.dumps(api_url))};\n"
+    initial_script += "    </script>"
+    page = page.replace(INITIAL_CATALOG_MARKER, initial_script, 1)
+
+    items = "".join(_render_work_item(work) for work in works[:first_screen])
+    page = WORKS_LIST_PATTERN.sub(lambda _: items, page, count=1)
+    page = page.replace(CATEGORIES_CONTAINER, _render_categories(categories), 1)
+    page = page.replace(
+        STATS_PLACEHOLDER,
+        f'<span id="stats-text">{len(works)} de {len(works)} trabajos</span>',
+        1
+    )
+    return page
@@ -0,0 +1,141 @@
+"""
+Diff y promoción del catálogo entre ambientes (des -> qua -> pro)
+
+Lee las filas de versión de ambos ambientes en paralelo (una consulta por
+lado, sin importar el tamaño del catálogo), las compara por work_id + version
+con un hash de contenido por fila y aplica solo las diferencias al destino
+en un único MERGE. Las filas que existen solo en el destino se reportan pero
+no se borran; si el origen promueve otra versión vigente de ese trabajo, se
+desmarcan (is_latest = FALSE) para que quede una sola vigente.
+
+updated_date no entra en el hash: el destino lo fija al momento de la
+promoción (para que sus watermarks vean el cambio), así que difiere del
+origen aunque el contenido sea el mismo.
+
+Uso:
+    python shared/promotion.py des qua                    # dry run
+    python shared/promotion.py des qua --execute          # aplicar
+    python shared/promotion.py des qua --work-id mi-trabajo-20240101
+    python shared/promotion.py des qua --local-dir data/envs   # backend local (Parquet)
+"""
+import argparse
+import concurrent.futures
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import ENVIRONMENT_PROJECTS, PROMOTION_PATH
+from database import WorksDatabase, VERSION_COLUMN_TYPES
+
+KEY_COLUMNS = ["work_id", "version"]
+# Columnas comparadas en el diff (updated_date es propio de cada ambiente)
+HASH_COLUMNS = [column for column in VERSION_COLUMN_TYPES if column != "updated_date"]
+
+
+def _column_text(values: pd.Series) -> pd.Series:
+    """Texto canónico de una columna (listas unidas, timestamps ISO, nulos vacíos)"""
+    def to_text(value):
+        if isinstance(value, (list, tuple, np.ndarray)):
+            return "\x1f".join(str(item) for item in list(value))
+        if value is None or pd.isna(value):
+            return ""
+        if isinstance(value, pd.Timestamp):
+            return value.tz_convert("UTC").isoformat() if value.tzinfo else value.isoformat()
+        return str(value)
+
+    return values.map(to_text)
+
+
+def row_hashes(rows: pd.DataFrame) -> pd.Series:
+    """Hash de contenido por fila sobre las columnas de versión (sin updated_date)"""
+    if rows.empty:
+        return pd.Series(dtype="uint64", index=rows.index)
+    columns = [
+        _column_text(rows[column] if column in rows else pd.Series(None, index=rows.index))
+        for column in HASH_COLUMNS
+    ]
+    text = columns[0].str.cat(columns[1:], sep="\x1e")
+    return pd.util.hash_pandas_object(text, index=False)
+
+
+def diff_catalogs(source: pd.DataFrame, target: pd.DataFrame) -> pd.DataFrame:
+    """Diff por work_id + version: insert, update, same o target_only"""
+    left = source[KEY_COLUMNS].assign(source_hash=row_hashes(source).values, work_name=source["work_name"].values)
+    right = target[KEY_COLUMNS].assign(target_hash=row_hashes(target).values)
+    merged = left.merge(right, on=KEY_COLUMNS, how="outer", indicator=True)
+
+    merged["action"] = "same"
+    merged.loc[merged["_merge"] == "left_only", "action"] = "insert"
+    merged.loc[merged["_merge"] == "right_only", "action"] = "target_only"
+    changed = (merged["_merge"] == "both") & (merged["source_hash"] != merged["target_hash"])
+    merged.loc[changed, "action"] = "update"
+    return merged[KEY_COLUMNS + ["work_name", "action"]].sort_values(KEY_COLUMNS).reset_index(drop=True)
+
+
+def open_environment(environment: str, local_dir: Optional[str] = None):
+    """Backend de un ambiente: BigQuery por defecto o el archivo local si se indica local_dir"""
+    if environment not in ENVIRONMENT_PROJECTS:
+        raise ValueError(f"Ambiente desconocido: {environment} (use {', '.join(ENVIRONMENT_PROJECTS)})")
+    if local_dir:
+        from local_backend import LocalWorksBackend
+        return LocalWorksBackend(os.path.join(local_dir, f"{environment}.parquet"), ENVIRONMENT_PROJECTS[environment])
+    return WorksDatabase(project_id=ENVIRONMENT_PROJECTS[environment])
+
+
+def promote(source, target, work_ids: Optional[List[str]] = None, execute: bool = False) -> Dict:
+    """Comparar source contra target y, si execute, escribir las diferencias en target
+
+    source y target son WorksDatabase o LocalWorksBackend (cualquier objeto
+    con get_version_rows / merge_version_rows).
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        source_future = executor.submit(source.get_version_rows, work_ids)
+        target_future = executor.submit(target.get_version_rows, work_ids)
+        source_rows, target_rows = source_future.result(), target_future.result()
+
+    diff = diff_catalogs(source_rows, target_rows)
+    result = {"diff": diff, "summary": diff["action"].value_counts().to_dict(), "applied": None}
+
+    if execute:
+        pending = diff[diff["action"].isin(["insert", "update"])]
+        keys = pd.MultiIndex.from_frame(pending[KEY_COLUMNS])
+        selected = source_rows[pd.MultiIndex.from_frame(source_rows[KEY_COLUMNS]).isin(keys)]
+        result["applied"] = target.merge_version_rows(selected.to_dict("records"))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Promoción del catálogo entre ambientes")
+    parser.add_argument("source", choices=list(ENVIRONMENT_PROJECTS))
+    parser.add_argument("target", choices=list(ENVIRONMENT_PROJECTS))
+    parser.add_argument("--work-id", action="append", dest="work_ids", help="Limitar a estos trabajos (repetible)")
+    parser.add_argument("--execute", action="store_true", help="Aplicar los cambios (por defecto solo diff)")
+    parser.add_argument("--local-dir", help="Usar archivos Parquet locales (<dir>/<ambiente>.parquet) en vez de BigQuery")
+    parser.add_argument("--force", action="store_true", help="Permitir promociones fuera de des -> qua -> pro")
+    args = parser.parse_args()
+
+    if PROMOTION_PATH.get(args.source) != args.target and not args.force:
+        parser.error(f"Promoción {args.source} -> {args.target} fuera del orden permitido (use --force)")
+
+    result = promote(
+        open_environment(args.source, args.local_dir),
+        open_environment(args.target, args.local_dir),
+        work_ids=args.work_ids,
+        execute=args.execute
+    )
+    changes = result["diff"][result["diff"]["action"] != "same"]
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(changes.to_string(index=False) if not changes.empty else "Sin diferencias")
+    print(f"\nResumen {args.source} -> {args.target}: {result['summary']}")
+    if result["applied"] is not None:
+        print(f"✅ {result['applied']} filas escritas en {args.target}")
+    else:
+        print("ℹ️  Dry run: use --execute para aplicar")
+    if result["summary"].get("target_only"):
+        print(f"⚠️  {result['summary']['target_only']} versiones existen solo en {args.target} (se conservan; las vigentes se desmarcan si el origen promueve otra versión)")
+
+
+if __name__ == "__main__":
+    main()
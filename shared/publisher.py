@@ -0,0 +1,143 @@
+"""
+Publicación del catálogo como artefactos JSON estáticos
+
+Genera works.json, categories.json y un archivo por categoría, cada uno con
+el hash de su contenido en el nombre (inmutables, cacheables para siempre),
+más un manifest.json corto que apunta a la versión vigente. Un directorio
+local hace las veces de bucket; el frontend lo sirve bajo /catalog.
+
+Uso:
+    python shared/publisher.py [directorio_salida]
+"""
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from config import STATIC_CATALOG_CONFIG
+from database import WorksDatabase, add_write_listener
+from response_cache import encode_json
+from serialization import load_serialized_catalog, build_categories_payload
+
+MANIFEST_NAME = "manifest.json"
+
+
+class CatalogPublisher:
+    """Renderiza el catálogo de WorksDatabase a archivos estáticos versionados"""
+
+    def __init__(self, db: Optional[WorksDatabase] = None, output_dir: Optional[str] = None):
+        self.db = db or WorksDatabase()
+        self.output_dir = os.path.abspath(output_dir or STATIC_CATALOG_CONFIG["output_dir"])
+        self._lock = threading.Lock()
+        self._pending = False
+        self._running = False
+
+    def publish(self) -> Dict:
+        """Publicar el catálogo actual y retornar el manifest escrito"""
+        catalog = load_serialized_catalog(self.db)
+        categories = build_categories_payload(self.db)
+        watermark = catalog["watermark"].isoformat() if catalog["watermark"] else None
+
+        works = catalog["works"]
+        by_category: Dict[str, list] = {}
+        for work in works:
+            by_category.setdefault(work["category"], []).append(work)
+
+        manifest = {
+            "works": self._write_artifact("works", {"works": works, "count": len(works), "watermark": watermark}),
+            "categories": self._write_artifact("categories", categories),
+            "by_category": {
+                category: self._write_artifact(
+                    f"works/{self._safe_name(category)}",
+                    {"works": category_works, "count": len(category_works), "category": category}
+                )
+                for category, category_works in by_category.items()
+            },
+            "watermark": watermark,
+            "published_at": datetime.now(timezone.utc).isoformat(),
+        }
+        # La versión depende solo del contenido publicado (no de la hora)
+        content_key = encode_json([manifest["works"], manifest["categories"], sorted(manifest["by_category"].items())])
+        manifest["version"] = hashlib.sha256(content_key).hexdigest()[:16]
+
+        self._write_atomic(os.path.join(self.output_dir, MANIFEST_NAME), encode_json(manifest))
+        self._prune(manifest)
+        print(f"✅ Catálogo publicado ({len(works)} trabajos, versión {manifest['version']}) en {self.output_dir}")
+        return manifest
+
+    def publish_async(self):
+        """Publicar en segundo plano; escrituras seguidas se agrupan en una sola publicación"""
+        with self._lock:
+            self._pending = True
+            if self._running:
+                return
+            self._running = True
+        threading.Thread(target=self._publish_loop, name="catalog-publisher", daemon=True).start()
+
+    def _publish_loop(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._running = False
+                    return
+                self._pending = False
+            try:
+                self.publish()
+            except Exception as e:
+                print(f"⚠️  Error publicando catálogo estático: {e}")
+
+    def _write_artifact(self, base_name: str, payload: Dict) -> str:
+        """Escribir un artefacto con hash de contenido en el nombre y retornar su ruta relativa"""
+        body = encode_json(payload)
+        digest = hashlib.sha256(body).hexdigest()[:12]
+        relative_path = f"{base_name}.{digest}.json"
+        path = os.path.join(self.output_dir, relative_path)
+        if not os.path.exists(path):
+            self._write_atomic(path, body)
+        return relative_path
+
+    def _write_atomic(self, path: str, body: bytes):
+        """Escribir a un temporal y renombrar: los lectores nunca ven archivos a medias"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def _prune(self, manifest: Dict):
+        """Eliminar artefactos no referenciados y más viejos que retention_seconds"""
+        referenced = {manifest["works"], manifest["categories"], *manifest["by_category"].values(), MANIFEST_NAME}
+        cutoff = time.time() - STATIC_CATALOG_CONFIG["retention_seconds"]
+        for root, _, files in os.walk(self.output_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                relative_path = os.path.relpath(path, self.output_dir).replace(os.sep, "/")
+                if relative_path not in referenced and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+
+    @staticmethod
+    def _safe_name(name: str) -> str:
+        return re.sub(r'[^a-zA-Z0-9_-]', '_', name) or "_"
+
+
+_publish_on_write_enabled = False
+
+
+def enable_publish_on_write(publisher: Optional[CatalogPublisher] = None):
+    """Republicar el catálogo tras cada escritura de WorksDatabase (una vez por proceso)"""
+    global _publish_on_write_enabled
+    if _publish_on_write_enabled:
+        return
+    _publish_on_write_enabled = True
+    publisher = publisher or CatalogPublisher()
+    add_write_listener(lambda event, work_id, data: publisher.publish_async())
+
+
+if __name__ == "__main__":
+    CatalogPublisher(output_dir=sys.argv[1] if len(sys.argv) > 1 else None).publish()
@@ -0,0 +1,177 @@
+"""
+Caché en disco de resultados de consultas analíticas (Parquet, LRU por bytes)
+
+Pensada para las consultas pesadas de los dashboards de categorías, separada
+del catálogo de trabajos. La clave combina el SQL normalizado, los parámetros
+y la fecha de modificación de las tablas de origen: mientras los datos no
+cambien, cada consulta se paga una sola vez para todos los usuarios. Los
+resultados se leen de vuelta con memory map.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+from google.cloud import bigquery
+
+from config import QUERY_CACHE_CONFIG
+
+# Referencias `proyecto.dataset.tabla` entre backticks en cualquier parte del SQL
+QUOTED_TABLE_PATTERN = re.compile(r"`([\w-]+(?:\.[\w$-]+){1,2})`")
+# Tablas tras FROM/JOIN sin backticks: proyecto.dataset.tabla o dataset.tabla
+# (un solo nombre es un CTE o alias, no una tabla)
+UNQUOTED_TABLE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][\w-]*(?:\.[\w$-]+){1,2})\b", re.IGNORECASE)
+
+
+def normalize_sql(query: str) -> str:
+    """SQL sin comentarios, espacios redundantes ni ';' final (los literales no se tocan)"""
+    query = re.sub(r"--[^\n]*", " ", query)
+    query = re.sub(r"/\*.*?\*/", " ", query, flags=re.DOTALL)
+    return re.sub(r"\s+", " ", query).strip().rstrip(";").strip()
+
+
+def referenced_tables(query: str, default_project: Optional[str] = None) -> List[str]:
+    """Tablas de origen del SQL como proyecto.dataset.tabla
+    
+    Las referencias dataset.tabla se completan con default_project (el
+    proyecto por defecto del cliente, igual que hace BigQuery); sin proyecto
+    por defecto no se pueden resolver y se lanza ValueError.
+    """
+    query = normalize_sql(query)
+    tables = set()
+    for reference in QUOTED_TABLE_PATTERN.findall(query) + UNQUOTED_TABLE_PATTERN.findall(query):
+        parts = reference.split(".")
+        if len(parts) == 2:
+            if not default_project:
+                raise ValueError(f"No se puede resolver el proyecto de la tabla {reference}")
+            parts = [default_project] + parts
+        tables.add(".".join(parts))
+    return sorted(tables)
+
+
+def _parameters_key(job_config: Optional[bigquery.QueryJobConfig]) -> List:
+    if job_config is None:
+        return []
+    params = [param.to_api_repr() for param in job_config.query_parameters or []]
+    return sorted(params, key=lambda param: json.dumps(param, sort_keys=True, default=str))
+
+
+class QueryResultCache:
+    """Resultados de consultas como archivos Parquet en disco, con LRU acotado por bytes
+
+    La fecha de uso de cada archivo es su mtime (se actualiza en cada hit), así
+    que varias réplicas/procesos pueden compartir el mismo directorio.
+    """
+
+    def __init__(self, client: bigquery.Client, cache_dir: Optional[str] = None,
+                 max_bytes: Optional[int] = None):
+        self.client = client
+        self.cache_dir = os.path.abspath(cache_dir or QUERY_CACHE_CONFIG["cache_dir"])
+        self.max_bytes = max_bytes or QUERY_CACHE_CONFIG["max_bytes"]
+        self._table_modified: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def table_modified(self, table_ref: str) -> str:
+        """Fecha de modificación de una tabla (metadato cacheado unos segundos)"""
+        ttl = QUERY_CACHE_CONFIG["metadata_ttl_seconds"]
+        with self._lock:
+            cached = self._table_modified.get(table_ref)
+            if cached and time.monotonic() - cached[1] < ttl:
+                return cached[0]
+        modified = self.client.get_table(table_ref).modified
+        value = modified.isoformat() if modified else ""
+        with self._lock:
+            self._table_modified[table_ref] = (value, time.monotonic())
+        return value
+
+    def cache_key(self, query: str, job_config: Optional[bigquery.QueryJobConfig] = None,
+                  tables: Optional[List[str]] = None) -> str:
+        """Hash de SQL normalizado + parámetros + modificación de las tablas de origen"""
+        tables = tables if tables is not None else referenced_tables(query, self.client.project)
+        key = {
+            "sql": normalize_sql(query),
+            "params": _parameters_key(job_config),
+            "tables": {table: self.table_modified(table) for table in sorted(tables)},
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.parquet")
+
+    def get_or_run(self, query: str, run: Callable[[], pd.DataFrame],
+                   job_config: Optional[bigquery.QueryJobConfig] = None,
+                   tables: Optional[List[str]] = None,
+                   columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Resultado cacheado de la consulta; run() solo se ejecuta si no está en disco"""
+        try:
+            path = self._path(self.cache_key(query, job_config, tables))
+        except Exception as e:
+            # Sin metadatos de las tablas no hay clave confiable: consultar sin caché
+            print(f"⚠️  No se pudo calcular la clave de caché: {e}")
+            result = run()
+            return result[columns] if columns else result
+        if os.path.exists(path):
+            try:
+                result = pd.read_parquet(path, columns=columns, memory_map=True)
+                os.utime(path)
+                return result
+            except (OSError, ValueError) as e:
+                # Archivo borrado por otra réplica o corrupto: recalcular
+                print(f"⚠️  Entrada de caché inválida {path}: {e}")
+
+        result = run()
+        self._store(path, result)
+        return result[columns] if columns else result
+
+    def _store(self, path: str, result: pd.DataFrame):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            result.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            # Tipos no serializables a Parquet: se sirve el resultado sin cachear
+            print(f"⚠️  No se pudo cachear el resultado de la consulta: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.evict()
+
+    def entries(self) -> List[tuple]:
+        """(mtime, bytes, ruta) de cada resultado en disco"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".parquet"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """Borrar los resultados menos usados hasta quedar bajo max_bytes"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
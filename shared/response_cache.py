@@ -0,0 +1,56 @@
+"""
+Cache de cuerpos de respuesta pre-serializados (bytes JSON) por versión del catálogo
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+try:
+    import orjson
+except ImportError:
+    # Sin orjson se usa json estándar (más lento, mismo resultado)
+    orjson = None
+
+
+def encode_json(payload: Any) -> bytes:
+    """Serializar a bytes JSON con el encoder más rápido disponible"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=str)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class EncodedResponseCache:
+    """Cuerpos JSON ya codificados, uno por clave (endpoint/categoría/proyección)
+
+    Cada entrada guarda la versión del catálogo con la que se construyó; si la
+    versión cambia se reconstruye en el siguiente pedido. Las respuestas
+    calientes se sirven sin volver a codificar. Acotado con LRU a max_entries.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: Hashable, version: str, build: Callable[[], Any],
+                     encode: Callable[[Any], bytes] = encode_json) -> bytes:
+        """Obtener el cuerpo codificado para key, construyéndolo si la versión cambió"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        body = encode(build())
+
+        with self._lock:
+            self._entries[key] = (version, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
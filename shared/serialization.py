@@ -0,0 +1,164 @@
+"""
+Serialización del catálogo al formato JSON público (API y artefactos estáticos)
+"""
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from config import CATEGORIES
+from database import PERMISSION_ERRORS, compute_watermark
+
+# Funciones de utilidad (sin dependencia de Streamlit)
+def format_date(date_input) -> str:
+    """Formatear fecha para mostrar en la interfaz"""
+    if not date_input:
+        return "N/A"
+    
+    try:
+        # Si es un Timestamp de pandas
+        if hasattr(date_input, 'strftime'):
+            return date_input.strftime("%d/%m/%Y %H:%M")
+        
+        # Si es un string
+        if isinstance(date_input, str):
+            date_obj = datetime.fromisoformat(date_input.replace('Z', '+00:00'))
+            return date_obj.strftime("%d/%m/%Y %H:%M")
+        
+        # Si es otro tipo, convertir a string
+        return str(date_input)
+    except:
+        return str(date_input) if date_input else "N/A"
+
+def get_status_badge(status: str) -> str:
+    """Obtener emoji para el estado del trabajo"""
+    status_emojis = {
+        "active": "🟢",
+        "paused": "⏸️", 
+        "archived": "📁",
+        "maintenance": "🔧"
+    }
+    return status_emojis.get(status, "❓")
+
+def get_category_icon(category: str) -> str:
+    """Obtener emoji para la categoría del trabajo"""
+    category_icons = {
+        "calls_analysis": "📞",
+        "marketing_analysis": "📈",
+        "climate_analysis": "🌡️",
+        "accounting_analysis": "💰",
+        "workforce_analysis": "👥"
+    }
+    return category_icons.get(category, "📊")
+
+# Campos de un trabajo serializado (los permitidos en ?fields=)
+WORK_FIELDS = (
+    "work_id", "title", "work_name", "description", "short_description", "category",
+    "category_name", "url", "work_url", "version", "created_date", "status",
+    "status_badge", "category_icon", "notes", "subcategory", "tags"
+)
+
+
+def _tag_values(value) -> List[str]:
+    """Tags como lista de strings (BigQuery los entrega como array de numpy)"""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [str(tag) for tag in value if tag is not None]
+    return []
+
+
+def serialize_work(row, category_map: Dict[str, Dict]) -> Dict:
+    """Convertir una fila de works_index al formato JSON de la API"""
+    category_id = str(row.get("category", ""))
+    
+    # Obtener nombre e icono de categoría
+    if category_id in category_map:
+        category_name = category_map[category_id]["name"]
+        category_icon = category_map[category_id]["icon"]
+    else:
+        # Fallback a config.py
+        category_name = CATEGORIES.get(category_id, category_id)
+        category_icon = get_category_icon(category_id)
+    
+    return {
+        "work_id": str(row.get("work_id", "")),
+        "title": str(row.get("work_name", "")),  # Usar work_name de BigQuery
+        "work_name": str(row.get("work_name", "")),  # Mantener ambos para compatibilidad
+        "description": str(row.get("description", "")),
+        "short_description": str(row.get("short_description", "")),
+        "category": category_id,
+        "category_name": category_name,
+        "url": str(row.get("work_url", "")),  # Usar work_url de BigQuery
+        "work_url": str(row.get("work_url", "")),  # Mantener ambos para compatibilidad
+        "version": str(row.get("version", "")),
+        "created_date": format_date(row.get("created_date")) if pd.notna(row.get("created_date", pd.NaT)) else "",
+        "status": str(row.get("status", "active")),
+        "status_badge": get_status_badge(str(row.get("status", "active"))),
+        "category_icon": category_icon,
+        "notes": str(row.get("notes", "")),
+        "subcategory": str(row.get("subcategory") or ""),
+        "tags": _tag_values(row.get("tags")),
+    }
+
+
+def load_serialized_catalog(db) -> Dict:
+    """Trabajos activos serializados, mapeo de categorías y watermark (consultas en paralelo)"""
+    results = db.fetch_concurrently(
+        works=db.get_all_works,
+        category_map=db.get_category_map,
+        watermark=db.get_change_watermark
+    )
+    category_map = results["category_map"]
+    return {
+        "works": [serialize_work(row, category_map) for _, row in results["works"].iterrows()],
+        "category_map": category_map,
+        # Sobre todos los trabajos vigentes (archivados incluidos), no solo los activos
+        "watermark": results["watermark"] or compute_watermark(results["works"])
+    }
+
+
+def serialize_category(row) -> Dict:
+    """Convertir una fila de works_categories al formato JSON de la API"""
+    return {
+        "id": str(row.get("category_id", "")),
+        "name": str(row.get("category_name", "")),
+        "icon": str(row.get("category_icon", "📊")),
+        "description": str(row.get("description", "")),
+        "display_order": int(row.get("display_order", 0)) if pd.notna(row.get("display_order")) else 0
+    }
+
+
+def build_categories_payload(db) -> Dict:
+    """Categorías desde works_categories, o desde config.py si no hay acceso"""
+    # Intentar obtener categorías desde BigQuery (solo si el probe confirmó acceso)
+    if db.has_works_categories():
+        try:
+            query = f"""
+            SELECT category_id, category_name, category_icon, description, display_order
+            FROM `{db.categories_table_ref}`
+            WHERE is_active = true
+            ORDER BY display_order, category_name
+            """
+            result = db.run_query(query)
+            
+            if not result.empty:
+                categories_list = [serialize_category(row) for _, row in result.iterrows()]
+                return {"categories": categories_list, "count": len(categories_list)}
+        except Exception as bq_error:
+            # Fallback: usar CATEGORIES de config.py
+            print(f"⚠️  No se pudo acceder a works_categories, usando fallback: {bq_error}")
+            if isinstance(bq_error, PERMISSION_ERRORS):
+                db.mark_unavailable("works_categories")
+    
+    # Fallback a config.py
+    categories_list = []
+    for cat_id, cat_name in CATEGORIES.items():
+        categories_list.append({
+            "id": cat_id,
+            "name": cat_name,
+            "icon": get_category_icon(cat_id),
+            "description": "",
+            "display_order": 0
+        })
+    
+    return {"categories": categories_list, "count": len(categories_list)}
@@ -0,0 +1,177 @@
+"""
+Índice invertido de tags y subcategorías del catálogo
+
+Mapea cada tag y cada subcategoría al conjunto de work_id que la tienen, de
+modo que los filtros (AND/OR de tags, OR de subcategorías) y los conteos por
+faceta son operaciones de conjuntos en memoria, sin UNNEST(tags) en
+BigQuery por request. Se construye desde el catálogo ya cargado (solo
+trabajos activos) y se mantiene con los eventos de escritura de
+WorksDatabase. Los valores se comparan sin distinguir mayúsculas ni espacios
+extremos; se conserva la primera forma vista para mostrarla.
+"""
+import threading
+import weakref
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from database import add_write_listener
+
+FACETS = ("tag", "subcategory")
+
+
+def _normalize(value) -> str:
+    return str(value).strip().lower() if value is not None else ""
+
+
+def _tag_values(value) -> List[str]:
+    """Tags de una fila: lista, tupla, array o texto separado por comas"""
+    if isinstance(value, str):
+        value = value.split(",")
+    elif not isinstance(value, (list, tuple, np.ndarray)):
+        return []
+    return [str(tag).strip() for tag in value if tag is not None and str(tag).strip()]
+
+
+class TagIndex:
+    """tag/subcategoría -> conjunto de work_id, con filtros y conteos por faceta"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, Set[str]]] = {facet: defaultdict(set) for facet in FACETS}
+        self._labels: Dict[str, Dict[str, str]] = {facet: {} for facet in FACETS}
+        # Valores normalizados de cada trabajo, para poder quitarlo al actualizarlo
+        self._work_values: Dict[str, Dict[str, Set[str]]] = {}
+        # Cambia con cada escritura aplicada (para invalidar respuestas cacheadas)
+        self.version = 0
+
+    @classmethod
+    def from_records(cls, records: Iterable) -> "TagIndex":
+        """Construir desde trabajos tipo diccionario (work_id, tags, subcategory)"""
+        index = cls()
+        for record in records:
+            index._add(record["work_id"], record.get("tags"), record.get("subcategory"))
+        return index
+
+    def __len__(self) -> int:
+        return len(self._work_values)
+
+    def _add(self, work_id: str, tags, subcategory):
+        values = {"tag": set(), "subcategory": set()}
+        raw_values = {"tag": _tag_values(tags), "subcategory": [subcategory] if subcategory else []}
+        for facet, raw in raw_values.items():
+            for value in raw:
+                key = _normalize(value)
+                if not key:
+                    continue
+                self._postings[facet][key].add(work_id)
+                self._labels[facet].setdefault(key, str(value).strip())
+                values[facet].add(key)
+        self._work_values[work_id] = values
+
+    def _remove(self, work_id: str) -> Optional[Dict[str, Set[str]]]:
+        values = self._work_values.pop(work_id, None)
+        if values is None:
+            return None
+        for facet, keys in values.items():
+            for key in keys:
+                postings = self._postings[facet].get(key)
+                if postings is None:
+                    continue
+                postings.discard(work_id)
+                if not postings:
+                    del self._postings[facet][key]
+                    self._labels[facet].pop(key, None)
+        return values
+
+    def apply_write(self, event: str, work_id: str, data: Dict):
+        """Mantener el índice con un evento de escritura (listener de WorksDatabase)
+
+        Solo indexa trabajos activos: archivar o cambiar a otro estado los
+        quita. Las actualizaciones que no traen tags/subcategoría conservan
+        los valores ya indexados.
+        """
+        with self._lock:
+            status = data.get("status")
+            if event == "archived" or (status is not None and status != "active"):
+                self._remove(work_id)
+            elif event == "created" or work_id in self._work_values:
+                previous = self._remove(work_id) or {"tag": set(), "subcategory": set()}
+                labels = {facet: [self._labels_or_key(facet, key) for key in keys] for facet, keys in previous.items()}
+                tags = data["tags"] if "tags" in data else labels["tag"]
+                subcategory = data["subcategory"] if "subcategory" in data else next(iter(labels["subcategory"]), None)
+                self._add(work_id, tags, subcategory)
+            else:
+                # Trabajo reactivado cuyos valores no se conocen: llega con la próxima recarga
+                return
+            self.version += 1
+
+    def _labels_or_key(self, facet: str, key: str) -> str:
+        return self._labels[facet].get(key, key)
+
+    def match(self, tags: Optional[List[str]] = None, subcategories: Optional[List[str]] = None,
+              tag_mode: str = "all") -> Optional[Set[str]]:
+        """work_id que cumplen los filtros (None = sin filtros, todos)
+
+        tag_mode "all" exige todos los tags (AND) y "any" alguno (OR); las
+        subcategorías se combinan con OR y ambas facetas entre sí con AND.
+        """
+        if tag_mode not in ("all", "any"):
+            raise ValueError(f"tag_mode inválido: {tag_mode} (use 'all' o 'any')")
+        tag_keys = [key for key in map(_normalize, tags or []) if key]
+        subcategory_keys = [key for key in map(_normalize, subcategories or []) if key]
+        if not tag_keys and not subcategory_keys:
+            return None
+
+        with self._lock:
+            result: Optional[Set[str]] = None
+            if tag_keys:
+                postings = sorted((self._postings["tag"].get(key, set()) for key in tag_keys), key=len)
+                if tag_mode == "all":
+                    # Intersectar desde el conjunto más chico
+                    result = set(postings[0]).intersection(*postings[1:])
+                else:
+                    result = set().union(*postings)
+            if subcategory_keys:
+                by_subcategory = set().union(*(self._postings["subcategory"].get(key, set()) for key in subcategory_keys))
+                result = by_subcategory if result is None else result & by_subcategory
+            return result
+
+    def facet_counts(self, work_ids: Optional[Set[str]] = None) -> Dict[str, Dict[str, int]]:
+        """Cantidad de trabajos por tag y por subcategoría (dentro de work_ids si se indica)"""
+        with self._lock:
+            counts = {}
+            for facet in FACETS:
+                facet_counts = {}
+                for key, postings in self._postings[facet].items():
+                    count = len(postings) if work_ids is None else len(postings & work_ids)
+                    if count:
+                        facet_counts[self._labels[facet][key]] = count
+                counts[facet] = dict(sorted(facet_counts.items(), key=lambda item: (-item[1], item[0].lower())))
+            return counts
+
+
+_tracked_indexes: "weakref.WeakSet[TagIndex]" = weakref.WeakSet()
+_tracking_lock = threading.Lock()
+_listener_registered = False
+
+
+def track_writes(index: TagIndex) -> TagIndex:
+    """Mantener index con las escrituras de este proceso
+
+    Un único listener reparte los eventos a los índices vivos; los que se
+    descartan al recargar el catálogo dejan de recibirlos solos.
+    """
+    global _listener_registered
+    with _tracking_lock:
+        _tracked_indexes.add(index)
+        if not _listener_registered:
+            add_write_listener(_dispatch_write)
+            _listener_registered = True
+    return index
+
+
+def _dispatch_write(event: str, work_id: str, data: Dict):
+    for index in list(_tracked_indexes):
+        index.apply_write(event, work_id, data)
@@ -5,6 +5,7 @@ import streamlit as st
 from datetime import datetime
 import hashlib
 import re
+import uuid
 
 def generate_work_id(name: str) -> str:
     """Generar ID único para un trabajo basado en el nombre"""
@@ -12,9 +13,9 @@ def generate_work_id(name: str) -> str:
     slug = re.sub(r'[^a-zA-Z0-9\s-]', '', name.lower())
     slug = re.sub(r'\s+', '-', slug.strip())
     
-    # Agregar timestamp para unicidad
+    # Timestamp + sufijo aleatorio: dos altas en el mismo segundo no chocan
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    return f"{slug}-{timestamp}"
+    return f"{slug or 'trabajo'}-{timestamp}-{uuid.uuid4().hex[:6]}"
 
 def format_date(date_input) -> str:
     """Formatear fecha para mostrar en la interfaz"""
@@ -58,21 +59,17 @@ def get_category_icon(category: str) -> str:
     return category_icons.get(category, "📊")
 
 def validate_image_file(file) -> tuple[bool, str]:
-    """Validar archivo de imagen"""
+    """Validar archivo de imagen por su encabezado real (no por el tipo declarado)"""
     if file is None:
         return False, "No se seleccionó archivo"
     
-    # Verificar tipo de archivo
-    allowed_types = ["image/jpeg", "image/png", "image/gif"]
-    if file.type not in allowed_types:
-        return False, f"Tipo de archivo no permitido. Use: {', '.join(allowed_types)}"
-    
-    # Verificar tamaño (5MB máximo)
-    max_size = 5 * 1024 * 1024  # 5MB
-    if file.size > max_size:
-        return False, "El archivo es muy grande. Máximo 5MB"
+    from images import inspect_image
+    try:
+        image_format, (width, height) = inspect_image(file)
+    except ValueError as e:
+        return False, str(e)
     
-    return True, "Archivo válido"
+    return True, f"Imagen {image_format.upper()} válida ({width}x{height})"
 
 def show_success_message(message: str):
     """Mostrar mensaje de éxito"""
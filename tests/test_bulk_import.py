@@ -0,0 +1,75 @@
+"""
+Pruebas de la importación masiva (shared/bulk_import.py)
+"""
+import io
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+from bulk_import import build_rows, diff_import, prepare_import, read_import_file
+
+
+def existing_catalog() -> pd.DataFrame:
+    return pd.DataFrame([{
+        "work_id": "churn-20240101", "work_name": "Churn", "work_slug": "churn-20240101",
+        "category": "calls_analysis", "subcategory": "retención", "status": "archived",
+        "version": "2.0", "is_latest": True, "description": "Modelo de churn",
+        "short_description": "Churn", "image_preview_url": "/images/abc/320.webp",
+        "created_date": pd.Timestamp("2024-01-01", tz="UTC"),
+        "updated_date": pd.Timestamp("2024-02-01", tz="UTC"),
+        "activated_date": pd.Timestamp("2024-01-02", tz="UTC"), "archived_date": pd.NaT,
+        "streamlit_page": "categories/calls_analysis/churn.py", "work_url": "https://example.com/churn",
+        "config_json": "{}", "notes": "Notas internas", "tags": ["churn", "ml"],
+    }])
+
+
+def read_csv(text: str) -> pd.DataFrame:
+    upload = io.BytesIO(text.encode("utf-8"))
+    upload.name = "works.csv"
+    return read_import_file(upload)
+
+
+def test_partial_update_keeps_columns_missing_from_file():
+    existing = existing_catalog()
+    frame = read_csv(
+        "work_name,category,streamlit_page,short_description\n"
+        "Churn,calls_analysis,categories/calls_analysis/churn_v2.py,Nuevo resumen\n"
+    )
+
+    prepared = prepare_import(frame, existing)
+    assert prepared["action"].tolist() == ["update"]
+    diff = diff_import(prepared, existing)
+    assert diff["changes"].iloc[0] == "short_description, streamlit_page"
+
+    (row,) = build_rows(prepared, existing, frame.columns)
+    assert row["work_id"] == "churn-20240101"
+    assert row["short_description"] == "Nuevo resumen"
+    assert row["streamlit_page"] == "categories/calls_analysis/churn_v2.py"
+    # Columnas ausentes del archivo: valor vigente, sin DEFAULTS ni vacíos
+    assert row["version"] == "2.0"
+    assert row["status"] == "archived"
+    assert row["description"] == "Modelo de churn"
+    assert row["notes"] == "Notas internas"
+    assert list(row["tags"]) == ["churn", "ml"]
+    assert row["work_url"] == "https://example.com/churn"
+    assert row["image_preview_url"] == "/images/abc/320.webp"
+    assert row["created_date"] == pd.Timestamp("2024-01-01", tz="UTC")
+
+
+def test_new_rows_get_defaults_and_unique_ids():
+    frame = read_csv(
+        "work_name,category,streamlit_page\n"
+        "Ventas,marketing_analysis,a.py\n"
+        "Ventas,climate_analysis,b.py\n"
+        "Sin categoría,otra,c.py\n"
+    )
+
+    prepared = prepare_import(frame, existing_catalog())
+    assert prepared["action"].tolist() == ["create", "create", "error"]
+    assert prepared["version"].tolist()[:2] == ["1.0", "1.0"]
+    assert prepared["status"].tolist()[:2] == ["active", "active"]
+    assert prepared["work_id"].iloc[0] != prepared["work_id"].iloc[1]
+    assert "categoría desconocida" in prepared["error"].iloc[2]
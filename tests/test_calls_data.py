@@ -0,0 +1,96 @@
+"""
+Pruebas de la capa de datos de llamadas (categories/calls_analysis/calls_data.py)
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'categories', 'calls_analysis'))
+
+from calls_data import BigQueryCallsSource, CallsRollupStore, ROLLUP_COLUMNS
+from config import QUERY_CACHE_CONFIG
+from database import WorksDatabase
+
+TABLE = "proyecto-llamadas.calls.records"
+MODIFIED = datetime(2024, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class StubClient:
+    """Cliente de BigQuery con solo los metadatos de tabla"""
+
+    def __init__(self, project: str):
+        self.project = project
+
+    def get_table(self, table_ref):
+        return SimpleNamespace(modified=MODIFIED)
+
+
+def stub_database(project: str) -> WorksDatabase:
+    db = WorksDatabase.__new__(WorksDatabase)
+    db.client = StubClient(project)
+    db.project_id = project
+    db.queries = []
+
+    def run_query(query, job_config=None, timeout=None, to_dataframe=True):
+        db.queries.append(query)
+        return pd.DataFrame({
+            "month": pd.to_datetime(["2024-02-01", "2024-01-01"], utc=True),
+            "company": ["Beta", "Acme"],
+            "calls": [5, 3],
+            "answered_calls": [4, 1],
+            "total_duration_seconds": [400, 90],
+        })
+
+    db.run_query = run_query
+    return db
+
+
+def test_version_is_table_modified_time(tmp_path, monkeypatch):
+    monkeypatch.setitem(QUERY_CACHE_CONFIG, "cache_dir", str(tmp_path))
+    source = BigQueryCallsSource(TABLE, db=stub_database("stub-version"))
+
+    assert source.version() == MODIFIED.isoformat()
+
+
+def test_load_rollup_is_served_from_query_cache(tmp_path, monkeypatch):
+    monkeypatch.setitem(QUERY_CACHE_CONFIG, "cache_dir", str(tmp_path))
+    db = stub_database("stub-rollup")
+    source = BigQueryCallsSource(TABLE, db=db)
+
+    rollup = source.load_rollup()
+    again = source.load_rollup()
+
+    assert len(db.queries) == 1
+    assert list(rollup.columns) == ROLLUP_COLUMNS
+    assert rollup["company"].tolist() == ["Acme", "Beta"]
+    assert rollup["month"].dt.tz is None
+    pd.testing.assert_frame_equal(rollup, again)
+
+
+def test_concurrent_refreshes_from_separate_stores_share_the_lock(tmp_path):
+    raw_dir, rollup_dir = tmp_path / "raw", tmp_path / "rollups"
+    raw_dir.mkdir()
+    for month in ("2024-01", "2024-02"):
+        pd.DataFrame({
+            "call_id": range(4),
+            "company": ["Acme", "Acme", "Beta", "Beta"],
+            "call_start": pd.to_datetime([f"{month}-05 10:00"] * 4, utc=True),
+            "duration_seconds": [60, 0, 30, 90],
+            "answered": [True, False, True, True],
+        }).to_parquet(raw_dir / f"calls_{month}.parquet", index=False)
+
+    # Un store nuevo por "sesión", como en los reruns de las páginas
+    stores = [CallsRollupStore(raw_dir=str(raw_dir), rollup_dir=str(rollup_dir)) for _ in range(4)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda store: store.refresh(), stores))
+
+    assert sorted(len(result["changed"]) for result in results) == [0, 0, 0, 2]
+    rollup = stores[0].load_rollup()
+    assert rollup["calls"].tolist() == [2, 2, 2, 2]
+    assert rollup["answered_calls"].sum() == 6
+    assert not [name for name in os.listdir(rollup_dir) if ".tmp" in name]
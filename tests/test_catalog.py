@@ -0,0 +1,66 @@
+"""
+Pruebas del catálogo compacto (shared/catalog.py)
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+from catalog import CompactCatalog
+
+
+def works_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "work_id": pd.Series(["llamadas-mensuales", "clima-diario"], dtype="str"),
+        "work_name": ["Llamadas Mensuales", "Clima Diario"],
+        "category": ["calls_analysis", "climate_analysis"],
+        "status": ["active", "archived"],
+        "version": ["1.0", "2.1"],
+        "is_latest": [True, True],
+        "created_date": pd.to_datetime(["2024-01-01 10:00", "2024-02-01 08:30"], utc=True),
+        "archived_date": pd.to_datetime([None, "2024-05-01 00:00"], utc=True),
+        # Tags como arrays <U (numpy.str_), como llegan desde Parquet/pyarrow
+        "tags": [np.array(["llamadas", "mensual"]), np.array(["clima"])],
+        "description": ["Análisis de llamadas", "Series de clima"],
+    })
+
+
+def test_round_trip_keeps_values_and_utc_dates():
+    df = works_frame()
+    catalog = CompactCatalog(df)
+
+    result = catalog.to_dataframe(include_text=True)
+
+    pd.testing.assert_series_equal(result["created_date"], df["created_date"], check_dtype=False)
+    assert pd.isna(result["archived_date"][0])
+    assert result["archived_date"][1] == pd.Timestamp("2024-05-01", tz="UTC")
+    assert result["tags"].tolist() == [("llamadas", "mensual"), ("clima",)]
+    assert result["description"].tolist() == df["description"].tolist()
+    assert result["category"].tolist() == df["category"].tolist()
+
+
+def test_dates_are_stored_as_datetime64_and_read_back_in_utc():
+    catalog = CompactCatalog(works_frame())
+
+    assert catalog._columns["created_date"].dtype.kind == "M"
+    assert catalog.get("clima-diario")["created_date"] == pd.Timestamp("2024-02-01 08:30", tz="UTC")
+    assert catalog.get("llamadas-mensuales")["archived_date"] is None
+
+
+def test_strings_are_interned_including_numpy_and_str_dtype_columns():
+    first = CompactCatalog(works_frame())
+    second = CompactCatalog(works_frame())
+
+    assert first.get("clima-diario")["tags"][0] is second.get("clima-diario")["tags"][0]
+    assert type(first.get("clima-diario")["tags"][0]) is str
+    assert first._columns["work_id"][0] is second._columns["work_id"][0]
+
+
+def test_mask_filters_categoricals_by_code():
+    catalog = CompactCatalog(works_frame())
+
+    assert catalog.mask(status="active").tolist() == [True, False]
+    assert catalog.mask(category="desconocida").tolist() == [False, False]
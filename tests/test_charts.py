@@ -0,0 +1,56 @@
+"""
+Pruebas de la reducción de puntos de los gráficos (shared/charts.py)
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+from charts import downsample, lttb_indices, minmax_indices
+
+
+def test_lttb_keeps_endpoints_budget_and_spike():
+    x = np.arange(10_000)
+    y = np.sin(x / 500.0)
+    y[4_321] = 50.0
+
+    indices = lttb_indices(x, y, 200)
+
+    assert len(indices) == 200
+    assert indices[0] == 0 and indices[-1] == len(y) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert 4_321 in indices
+
+
+def test_lttb_accepts_tz_aware_dates_and_short_series():
+    x = pd.date_range("2024-01-01", periods=1_000, freq="min", tz="UTC")
+    y = np.random.default_rng(0).normal(size=1_000)
+
+    assert len(lttb_indices(x, y, 100)) == 100
+    assert lttb_indices(x[:50], y[:50], 100).tolist() == list(range(50))
+
+
+def test_minmax_keeps_each_block_extremes():
+    y = np.zeros(1_000)
+    y[123], y[876] = -9.0, 9.0
+
+    indices = minmax_indices(y, 20)
+
+    assert len(indices) <= 20
+    assert {123, 876} <= set(indices.tolist())
+    assert np.all(np.diff(indices) > 0)
+    assert minmax_indices(y[:10], 20).tolist() == list(range(10))
+
+
+def test_downsample_returns_aligned_series():
+    x = pd.date_range("2024-01-01", periods=5_000, freq="s")
+    y = np.arange(5_000, dtype=float)
+
+    sampled_x, sampled_y = downsample(x, y, max_points=50, method="minmax")
+
+    assert len(sampled_x) == len(sampled_y) <= 50
+    # y es la posición de cada punto: x e y siguen alineados tras reducir
+    assert (sampled_x - x[0]).dt.total_seconds().tolist() == sampled_y.tolist()
@@ -0,0 +1,91 @@
+"""
+Pruebas del probe de capacidades de BigQuery (shared/database.py)
+"""
+import os
+import sys
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+import database
+from config import DATABASE_CONFIG
+from database import WorksDatabase
+
+
+class ProbeClient:
+    """Cliente que responde los dry runs según la tabla consultada"""
+
+    def __init__(self, errors=None):
+        self.errors = errors or {}
+        self.probes = []
+
+    def query(self, query, job_config=None, timeout=None):
+        assert job_config.dry_run
+        table = query.split("`")[1].rsplit(".", 1)[1]
+        self.probes.append(table)
+        if table in self.errors:
+            raise self.errors[table]
+
+
+def stub_database(client, project="proyecto-probe") -> WorksDatabase:
+    db = WorksDatabase.__new__(WorksDatabase)
+    db.client = client
+    db.project_id = project
+    db.table_ref = f"{project}.works.works_index"
+    db.categories_table_ref = f"{project}.works.works_categories"
+    return db
+
+
+@pytest.fixture(autouse=True)
+def empty_capabilities_cache(monkeypatch):
+    monkeypatch.setattr(database, "_capabilities_cache", {})
+
+
+def test_probe_runs_once_per_ttl():
+    client = ProbeClient()
+    db = stub_database(client)
+
+    assert db.get_capabilities() == {"works_index": True, "works_categories": True}
+    assert db.has_works_categories()
+    # Otra instancia del mismo proyecto reutiliza el resultado del proceso
+    assert stub_database(client).get_capabilities()["works_index"]
+    assert client.probes == ["works_index", "works_categories"]
+
+    db.get_capabilities(force_refresh=True)
+    assert len(client.probes) == 4
+
+
+def test_probe_is_repeated_after_ttl(monkeypatch):
+    monkeypatch.setitem(DATABASE_CONFIG, "capability_ttl_seconds", 0)
+    client = ProbeClient()
+    db = stub_database(client)
+
+    db.get_capabilities()
+    db.get_capabilities()
+
+    assert len(client.probes) == 4
+
+
+def test_permission_error_disables_table_but_transient_error_does_not():
+    client = ProbeClient(errors={
+        "works_categories": google_exceptions.Forbidden("sin permisos"),
+        "works_index": google_exceptions.ServiceUnavailable("reintentar"),
+    })
+    db = stub_database(client)
+
+    assert db.get_capabilities() == {"works_index": True, "works_categories": False}
+    assert db.get_category_map() == {}
+    assert len(client.probes) == 2
+
+
+def test_mark_unavailable_is_cached_until_next_probe():
+    client = ProbeClient()
+    db = stub_database(client)
+
+    db.mark_unavailable("works_categories")
+    assert not db.has_works_categories()
+    assert client.probes == []
+
+    assert db.get_capabilities(force_refresh=True)["works_categories"]
@@ -0,0 +1,38 @@
+"""
+Pruebas del fan-out de lecturas independientes (shared/database.py)
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+from database import WorksDatabase
+
+
+def test_calls_run_at_the_same_time():
+    db = WorksDatabase.__new__(WorksDatabase)
+    # Cada llamada espera a las otras: en serie la barrera vencería por timeout
+    barrier = threading.Barrier(3, timeout=5)
+
+    def call(value):
+        def run():
+            barrier.wait()
+            return value
+        return run
+
+    results = db.fetch_concurrently(categories=call(["a"]), works=call(2), texts=call({}))
+
+    assert results == {"categories": ["a"], "works": 2, "texts": {}}
+
+
+def test_failing_call_propagates_its_exception():
+    db = WorksDatabase.__new__(WorksDatabase)
+
+    def fail():
+        raise RuntimeError("consulta fallida")
+
+    with pytest.raises(RuntimeError, match="consulta fallida"):
+        db.fetch_concurrently(works=lambda: 1, categories=fail)
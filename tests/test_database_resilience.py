@@ -0,0 +1,103 @@
+"""
+Pruebas del deadline y el circuit breaker de WorksDatabase.run_query (shared/database.py)
+"""
+import concurrent.futures
+import os
+import sys
+import time
+
+import pandas as pd
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+from database import BackendUnavailableError, CircuitBreaker, WorksDatabase
+
+
+class StubJob:
+    def __init__(self, outcome):
+        self.outcome = outcome
+        self.cancelled = False
+        self.result_timeout = None
+
+    def result(self, timeout=None):
+        self.result_timeout = timeout
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self
+
+    def to_dataframe(self):
+        return self.outcome
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class StubClient:
+    """Cliente que responde cada consulta con el siguiente resultado de la lista"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.jobs = []
+
+    def query(self, query, job_config=None, timeout=None):
+        job = StubJob(self.outcomes.pop(0))
+        self.jobs.append(job)
+        return job
+
+
+def stub_database(*outcomes, threshold=2, reset_seconds=60.0) -> WorksDatabase:
+    db = WorksDatabase.__new__(WorksDatabase)
+    db.client = StubClient(*outcomes)
+    db.project_id = "stub"
+    db.circuit_breaker = CircuitBreaker(threshold, reset_seconds)
+    return db
+
+
+def test_deadline_cancels_job_and_raises_backend_unavailable():
+    db = stub_database(concurrent.futures.TimeoutError())
+
+    with pytest.raises(BackendUnavailableError, match="plazo de 5s"):
+        db.run_query("SELECT 1", timeout=5)
+
+    job = db.client.jobs[0]
+    assert job.cancelled
+    assert 0 < job.result_timeout <= 5
+
+
+def test_circuit_opens_after_consecutive_failures_and_fails_fast():
+    db = stub_database(RuntimeError("caído"), RuntimeError("caído"), pd.DataFrame({"a": [1]}))
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            db.run_query("SELECT 1")
+    assert db.circuit_breaker.is_open
+
+    with pytest.raises(BackendUnavailableError, match="Circuito abierto"):
+        db.run_query("SELECT 1")
+    assert len(db.client.jobs) == 2
+
+
+def test_permission_and_syntax_errors_do_not_open_the_circuit():
+    db = stub_database(google_exceptions.Forbidden("sin acceso"), google_exceptions.BadRequest("sintaxis"),
+                       threshold=1)
+
+    with pytest.raises(google_exceptions.Forbidden):
+        db.run_query("SELECT 1")
+    with pytest.raises(google_exceptions.BadRequest):
+        db.run_query("SELECT 1")
+    assert not db.circuit_breaker.is_open
+
+
+def test_half_open_probe_closes_circuit_on_success():
+    db = stub_database(RuntimeError("caído"), pd.DataFrame({"a": [1]}), threshold=1, reset_seconds=0.05)
+    with pytest.raises(RuntimeError):
+        db.run_query("SELECT 1")
+    assert db.circuit_breaker.is_open
+
+    time.sleep(0.06)
+    result = db.run_query("SELECT 1")
+
+    assert result["a"].tolist() == [1]
+    assert not db.circuit_breaker.is_open
@@ -0,0 +1,69 @@
+"""
+Pruebas de la difusión SSE de cambios del catálogo (shared/events.py)
+"""
+import asyncio
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+from events import ChangeBroadcaster, format_sse
+
+
+async def connected():
+    return False
+
+
+def parse_message(message: bytes) -> dict:
+    fields = dict(line.split(": ", 1) for line in message.decode("utf-8").strip().split("\n"))
+    if "data" in fields:
+        fields["data"] = json.loads(fields["data"])
+    return fields
+
+
+def test_format_sse_encodes_event_id_and_data():
+    message = format_sse("works", {"count": 1, "name": "Análisis"}, event_id="2024-01-01T00:00:00")
+
+    assert message.endswith(b"\n\n")
+    assert parse_message(message) == {
+        "event": "works",
+        "id": "2024-01-01T00:00:00",
+        "data": {"count": 1, "name": "Análisis"},
+    }
+    assert b"id:" not in format_sse("resync", {})
+
+
+def test_publish_reaches_every_subscriber():
+    async def scenario():
+        broadcaster = ChangeBroadcaster(lambda watermark: (None, watermark), 60, 60)
+        streams = [broadcaster.stream(connected) for _ in range(2)]
+        for stream in streams:
+            assert await stream.__anext__() == b"retry: 5000\n\n"
+        assert broadcaster.subscriber_count == 2
+
+        broadcaster.publish("works", {"count": 3}, event_id="w1")
+        messages = [await stream.__anext__() for stream in streams]
+        for stream in streams:
+            await stream.aclose()
+        return messages, broadcaster.subscriber_count
+
+    messages, remaining = asyncio.run(scenario())
+
+    assert messages[0] is messages[1]
+    assert parse_message(messages[0])["data"] == {"count": 3}
+    assert remaining == 0
+
+
+def test_slow_subscriber_gets_resync_instead_of_backlog():
+    async def scenario():
+        broadcaster = ChangeBroadcaster(lambda watermark: (None, watermark), 60, 60, queue_size=2)
+        stream = broadcaster.stream(connected)
+        await stream.__anext__()
+        for i in range(3):
+            broadcaster.publish("works", {"count": i})
+        message = await stream.__anext__()
+        await stream.aclose()
+        return message
+
+    assert parse_message(asyncio.run(scenario()))["event"] == "resync"
@@ -0,0 +1,70 @@
+"""
+Pruebas de las búsquedas filtradas en SQL de WorksDatabase (shared/database.py)
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+from database import INDEX_COLUMNS, LIST_COLUMNS, WorksDatabase
+
+
+def stub_database() -> WorksDatabase:
+    db = WorksDatabase.__new__(WorksDatabase)
+    db.latest_works = "(SELECT * FROM `p.d.works_index` WHERE is_latest)"
+    db.calls = []
+
+    def run_query(query, job_config=None):
+        parameters = {p.name: p.value for p in job_config.query_parameters}
+        db.calls.append((query, parameters))
+        return pd.DataFrame()
+
+    db.run_query = run_query
+    return db
+
+
+def selected_columns(query):
+    return [column.strip() for column in query.split("SELECT", 1)[1].split("FROM", 1)[0].split(",")]
+
+
+def test_filters_are_query_parameters():
+    db = stub_database()
+
+    db.find_works(category="calls_analysis", status="active")
+
+    query, parameters = db.calls[0]
+    assert "category = @category AND status = @status" in query
+    assert parameters == {"category": "calls_analysis", "status": "active"}
+    assert selected_columns(query) == list(LIST_COLUMNS)
+
+
+def test_without_filters_archived_works_are_included():
+    db = stub_database()
+
+    db.find_works()
+
+    query, parameters = db.calls[0]
+    # Solo el WHERE is_latest de la vista: ningún filtro por estado
+    assert query.count("WHERE") == 1
+    assert parameters == {}
+
+
+def test_work_index_selects_only_slim_columns():
+    db = stub_database()
+
+    db.get_work_index(status="paused")
+
+    query, parameters = db.calls[0]
+    assert selected_columns(query) == list(INDEX_COLUMNS)
+    assert parameters == {"status": "paused"}
+
+
+def test_unknown_columns_are_rejected_before_querying():
+    db = stub_database()
+
+    with pytest.raises(ValueError, match="1; DROP"):
+        db.find_works(columns=["work_id", "1; DROP TABLE works_index"])
+    assert db.calls == []
@@ -0,0 +1,201 @@
+"""
+Pruebas de la lista virtualizada y el pool de visores del frontend (frontend/index.html)
+
+Las funciones se extraen del <script> de index.html y se ejecutan en Node
+sobre un DOM mínimo; sin Node las pruebas se omiten.
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+INDEX_HTML = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'index.html')
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="requiere Node.js")
+
+STATE = [
+    "allWorks", "currentCategoryFilter", "currentSearchQuery", "currentWorkId", "WORKS_OVERSCAN",
+    "workRowHeight", "filteredWorksCache", "renderedWorkItems", "VIEWER_POOL_SIZE", "viewerPool",
+    "prefetchedWorkUrls", "preconnectedOrigins",
+]
+FUNCTIONS = [
+    "prepareWorks", "getFilteredWorks", "fillWorkItem", "createWorkItem", "renderVisibleWorks",
+    "escapeHtml", "getViewer", "showViewer", "discardViewer", "warmWork", "addHint",
+]
+
+FAKE_DOM = """
+class FakeElement {
+    constructor(tagName) {
+        this.tagName = tagName;
+        this.children = [];
+        this.parent = null;
+        this.attributes = {};
+        this.style = {};
+        this.className = '';
+        this.classes = new Set();
+        this.innerHTML = '';
+        this.scrollTop = 0;
+        this.clientHeight = 0;
+    }
+    set textContent(text) {
+        this.innerHTML = String(text).replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+    }
+    get classList() {
+        const classes = this.classes;
+        return { toggle: (name, force) => force ? classes.add(name) : classes.delete(name) };
+    }
+    setAttribute(name, value) { this.attributes[name] = String(value); }
+    getAttribute(name) { return name in this.attributes ? this.attributes[name] : null; }
+    appendChild(child) { child.parent = this; this.children.push(child); return child; }
+    remove() {
+        if (!this.parent) return;
+        this.parent.children = this.parent.children.filter(child => child !== this);
+        this.parent = null;
+    }
+    querySelector(selector) {
+        return this.children.find(child => '.' + child.className === selector) || null;
+    }
+    cloneNode() { return new FakeElement(this.tagName); }
+}
+const elements = {
+    'works-list': new FakeElement('div'),
+    'work-iframe-template': Object.assign(new FakeElement('template'), {
+        content: { firstElementChild: new FakeElement('iframe') }
+    }),
+};
+const iframeContainer = new FakeElement('div');
+const document = {
+    head: new FakeElement('head'),
+    getElementById: id => elements[id],
+    createElement: tagName => new FakeElement(tagName),
+    querySelector: selector => selector === '.content-iframe-container' ? iframeContainer : null,
+};
+const window = { location: { href: 'https://indice.example/' } };
+"""
+
+
+def extract_script(names, kind):
+    """Fuente de las declaraciones o funciones pedidas, tal como están en index.html"""
+    with open(INDEX_HTML, encoding="utf-8") as f:
+        source = f.read()
+    parts = []
+    for name in names:
+        if kind == "state":
+            match = re.search(rf"^\s*(?:let|const) {name} = .*;$", source, re.MULTILINE)
+            assert match, f"declaración {name} no encontrada"
+            parts.append(match.group(0).strip())
+            continue
+        start = source.index(f"function {name}(")
+        depth, end = 0, source.index("{", start)
+        for end in range(end, len(source)):
+            depth += {"{": 1, "}": -1}.get(source[end], 0)
+            if depth == 0:
+                break
+        parts.append(source[start:end + 1])
+    return "\n".join(parts)
+
+
+def run_frontend(body: str):
+    """Ejecutar body en Node con el estado y las funciones del frontend; retorna su JSON"""
+    script = "\n".join([
+        FAKE_DOM, extract_script(STATE, "state"), extract_script(FUNCTIONS, "function"),
+        f"const result = (() => {{ {body} }})();",
+        "console.log(JSON.stringify(result));",
+    ])
+    completed = subprocess.run(["node"], input=script, capture_output=True, text=True, timeout=30)
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout)
+
+
+WORKS = """
+allWorks = prepareWorks(Array.from({ length: 1000 }, (_, i) => ({
+    work_id: `w${i}`,
+    title: `Trabajo ${i}`,
+    category: i % 2 ? 'calls' : 'clima',
+    category_name: i % 2 ? 'Llamadas' : 'Clima',
+    description: i === 7 ? 'Ventas MENSUALES' : '',
+})));
+"""
+
+
+def test_filtered_works_use_search_text_and_are_memoized():
+    result = run_frontend(WORKS + """
+        currentCategoryFilter = 'calls';
+        const calls = getFilteredWorks();
+        const memoized = getFilteredWorks() === calls;
+        currentSearchQuery = 'Mensuales';
+        const searched = getFilteredWorks().map(work => work.work_id);
+        // Un catálogo nuevo invalida el resultado memoizado
+        allWorks = prepareWorks(allWorks.slice(0, 5));
+        return { calls: calls.length, memoized, searched, afterReload: getFilteredWorks().length };
+    """)
+
+    assert result == {"calls": 500, "memoized": True, "searched": ["w7"], "afterReload": 0}
+
+
+def test_only_visible_rows_are_rendered_and_reused_by_work_id():
+    result = run_frontend(WORKS + """
+        const container = document.getElementById('works-list');
+        const spacer = container.appendChild(Object.assign(new FakeElement('div'), { className: 'works-list-spacer' }));
+        container.clientHeight = 720;
+        workRowHeight = 72;
+
+        renderVisibleWorks();
+        const firstWindow = spacer.children.map(item => item.getAttribute('data-work-id'));
+        const row = renderedWorkItems.get('w10');
+
+        container.scrollTop = 720;
+        renderVisibleWorks();
+        return {
+            firstWindow,
+            secondWindow: spacer.children.length,
+            reused: renderedWorkItems.get('w10') === row,
+            removed: !renderedWorkItems.has('w0') && row.parent === spacer,
+            transform: row.style.transform,
+        };
+    """)
+
+    # 10 filas visibles + WORKS_OVERSCAN (8) por debajo; al desplazar, también por encima
+    assert result["firstWindow"] == [f"w{i}" for i in range(18)]
+    assert result["secondWindow"] == 26
+    assert result["reused"] and result["removed"]
+    assert result["transform"] == "translateY(720px)"
+
+
+def test_viewer_pool_keeps_most_recent_iframes():
+    result = run_frontend("""
+        const urls = [1, 2, 3, 4].map(i => `https://trabajos.example/${i}`);
+        const viewers = urls.map(getViewer);
+        const reopened = getViewer(urls[0]) === viewers[0];
+        getViewer('https://trabajos.example/5');
+        showViewer(viewers[0]);
+        discardViewer(urls[2]);
+        return {
+            reopened,
+            pooled: [...viewerPool.keys()].map(url => url.split('/').pop()),
+            mounted: iframeContainer.children.length,
+            evictedRemoved: viewers[1].parent === null,
+            visible: [...viewerPool.values()].filter(iframe => iframe.classes.has('visible')).length,
+        };
+    """)
+
+    assert result == {"reopened": True, "pooled": ["4", "1", "5"], "mounted": 3,
+                      "evictedRemoved": True, "visible": 1}
+
+
+def test_warm_work_preconnects_once_per_origin_and_skips_open_viewers():
+    result = run_frontend("""
+        getViewer('https://abierto.example/x');
+        ['https://trabajos.example/a', 'https://trabajos.example/b', 'https://trabajos.example/a',
+         '#', '', 'https://abierto.example/x'].forEach(warmWork);
+        return document.head.children.map(link => `${link.rel} ${link.href}`);
+    """)
+
+    assert result == [
+        "preconnect https://trabajos.example",
+        "prefetch https://trabajos.example/a",
+        "prefetch https://trabajos.example/b",
+    ]
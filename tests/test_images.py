@@ -0,0 +1,73 @@
+"""
+Pruebas del pipeline de imágenes preview (shared/images.py)
+"""
+import io
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+from config import IMAGE_CONFIG
+from images import ImageStore, inspect_image, sniff_image_format, thumbnail_url
+
+
+def image_bytes(image_format: str, size=(800, 400), mode="RGB") -> io.BytesIO:
+    stream = io.BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128) if mode == "RGBA" else (200, 30, 30)).save(stream, image_format)
+    stream.seek(0)
+    return stream
+
+
+@pytest.mark.parametrize("image_format, expected", [
+    ("JPEG", "jpeg"), ("PNG", "png"), ("GIF", "gif"), ("WEBP", "webp"),
+])
+def test_inspect_image_reads_format_and_dimensions(image_format, expected):
+    stream = image_bytes(image_format)
+
+    assert inspect_image(stream) == (expected, (800, 400))
+    assert stream.tell() == 0
+
+
+def test_inspect_image_rejects_by_signature_size_and_pixels(monkeypatch):
+    with pytest.raises(ValueError, match="no es una imagen"):
+        inspect_image(io.BytesIO(b"<svg xmlns='http://www.w3.org/2000/svg'/>"))
+    with pytest.raises(ValueError, match="Encabezado"):
+        inspect_image(io.BytesIO(b"\x89PNG\r\n\x1a\n" + b"\x00" * 32))
+
+    monkeypatch.setitem(IMAGE_CONFIG, "max_pixels", 1000)
+    with pytest.raises(ValueError, match="demasiado grande"):
+        inspect_image(image_bytes("PNG"))
+
+    monkeypatch.setitem(IMAGE_CONFIG, "max_bytes", 10)
+    with pytest.raises(ValueError, match="muy grande"):
+        inspect_image(image_bytes("PNG"))
+
+
+def test_sniff_image_format_needs_webp_marker():
+    assert sniff_image_format(b"RIFF\x00\x00\x00\x00WAVEfmt ") is None
+    assert sniff_image_format(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "webp"
+
+
+def test_store_writes_content_addressed_variants_once(tmp_path):
+    store = ImageStore(output_dir=str(tmp_path), base_url="/images/")
+
+    result = store.store(image_bytes("PNG", mode="RGBA"))
+    digest = result["image_preview_url"].split("/")[2]
+
+    assert result["image_preview_url"] == f"/images/{digest}/{IMAGE_CONFIG['card_width']}.webp"
+    for extension, variants in result["variants"].items():
+        for width, url in variants.items():
+            path = store.resolve(url[len("/images/"):])
+            with Image.open(path) as thumbnail:
+                assert thumbnail.width == width
+                assert thumbnail.mode == ("RGB" if extension == "jpg" else "RGBA")
+
+    mtime = os.path.getmtime(store.resolve(f"{digest}/160.webp"))
+    assert store.store(image_bytes("PNG", mode="RGBA"))["image_preview_url"] == result["image_preview_url"]
+    assert os.path.getmtime(store.resolve(f"{digest}/160.webp")) == mtime
+
+    assert store.resolve("../secreto.webp") is None
+    assert thumbnail_url(result["image_preview_url"], 640, "jpg") == f"/images/{digest}/640.jpg"
@@ -0,0 +1,75 @@
+"""
+Pruebas de los contadores del índice mantenidos por eventos (shared/index_stats.py)
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+from index_stats import WorksStatistics
+
+COLUMNS = ["kind", "work_id", "category", "status", "version", "activated_month",
+           "created_month", "archived_month", "work_name", "changed_at"]
+
+
+class FakeDatabase:
+    """Responde la consulta de WorksStatistics.load con filas fijas"""
+
+    latest_works = "works"
+
+    def __init__(self, works):
+        self.works = works
+        self.queries = 0
+
+    def run_query(self, query, job_config=None):
+        self.queries += 1
+        rows = [{"kind": "key", **work} for work in self.works]
+        rows += [
+            {"kind": "recent", "work_id": work["work_id"], "category": work["category"],
+             "status": work["status"], "version": work["version"], "work_name": work["work_id"],
+             "changed_at": pd.Timestamp("2024-01-01", tz="UTC")}
+            for work in self.works[:2]
+        ]
+        return pd.DataFrame(rows).reindex(columns=COLUMNS)
+
+
+def work(work_id, status="active", activated_month=None, created_month="2024-01", archived_month=None):
+    return {"work_id": work_id, "category": "calls_analysis", "status": status, "version": "1.0",
+            "activated_month": activated_month, "created_month": created_month,
+            "archived_month": archived_month}
+
+
+def test_write_to_work_outside_recent_moves_counters_without_reload():
+    db = FakeDatabase([work(f"work-{i}", activated_month="2024-01") for i in range(20)])
+    statistics = WorksStatistics(db, recent_limit=2)
+    statistics.load()
+
+    statistics.apply_write("updated", "work-15", {"status": "inactive"})
+    statistics.apply_write("archived", "work-16", {"status": "archived"})
+    snapshot = statistics.snapshot(max_age=3600)
+
+    assert db.queries == 1
+    assert snapshot["by_status"] == {"active": 18, "inactive": 1, "archived": 1}
+    assert snapshot["total"] == 20
+
+
+def test_never_activated_works_are_not_counted_as_activations():
+    db = FakeDatabase([
+        work("activado", activated_month="2024-02"),
+        work("borrador", status="draft", created_month="2024-03"),
+        work("archivado-sin-activar", status="archived", created_month="2024-03", archived_month="2024-04"),
+        # Activo anterior a activated_date: cuenta en su mes de creación
+        work("activo-legado", created_month="2023-12"),
+    ])
+    statistics = WorksStatistics(db)
+    statistics.load()
+
+    timeline = {month["month"]: month for month in statistics.snapshot(max_age=3600)["timeline"]}
+
+    # 2024-03 (creación del borrador y del archivado) no aparece: no hubo activaciones
+    assert {month: entry["activated"] for month, entry in timeline.items()} == {
+        "2023-12": 1, "2024-02": 1, "2024-04": 0
+    }
+    assert timeline["2024-04"]["archived"] == 1
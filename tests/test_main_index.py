@@ -0,0 +1,130 @@
+"""
+Pruebas de los filtros y las tarjetas del índice principal (index/main_index.py)
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'index'))
+
+import main_index
+from catalog import CompactCatalog
+from config import APP_CONFIG
+from main_index import filter_works, load_index_catalog, render_work_card_html, show_work_cards
+
+CATEGORY_MAP = {
+    "calls_analysis": {"name": "Llamadas", "icon": "📞", "description": "Análisis de llamadas"},
+}
+
+
+class FakeDatabase:
+    """Catálogo fijo en lugar de BigQuery"""
+
+    text_requests = []
+
+    def get_categories(self):
+        # Con works_categories se listan nombres visibles; sin ella, IDs
+        return ["Llamadas", "climate_analysis"]
+
+    def get_category_map(self):
+        return CATEGORY_MAP
+
+    def get_catalog(self):
+        return CompactCatalog(pd.DataFrame({
+            "work_id": ["llamadas", "clima", "ventas"],
+            "work_name": ["Llamadas", "Clima", "Ventas"],
+            "category": ["calls_analysis", "climate_analysis", "calls_analysis"],
+            "status": ["active", "active", "paused"],
+            "version": ["1.0", "2.0", "1.1"],
+            "created_date": pd.to_datetime(["2024-01-01", "2024-02-01", "2024-03-01"], utc=True),
+            "tags": [np.array(["mensual"]), np.array(["diario"]), np.array(["mensual"])],
+            "subcategory": ["Por compañía", None, None],
+        }), text_loader=self.get_work_texts)
+
+    def get_work_texts(self, work_ids):
+        self.text_requests.append(list(work_ids))
+        return {work_id: {"description": f"<b>{work_id}</b>", "notes": None} for work_id in work_ids}
+
+    def fetch_concurrently(self, **calls):
+        return {name: call() for name, call in calls.items()}
+
+
+@pytest.fixture
+def index(monkeypatch):
+    monkeypatch.setattr(main_index, "WorksDatabase", FakeDatabase)
+    FakeDatabase.text_requests.clear()
+    load_index_catalog.clear()
+    yield load_index_catalog()
+    load_index_catalog.clear()
+
+
+def work_ids(works):
+    return [work["work_id"] for work in works]
+
+
+def test_category_masks_accept_display_names_and_ids(index):
+    assert work_ids(filter_works(index, "Todas", "Todos")) == ["llamadas", "clima", "ventas"]
+    assert work_ids(filter_works(index, "Llamadas", "Todos")) == ["llamadas", "ventas"]
+    assert work_ids(filter_works(index, "climate_analysis", "Todos")) == ["clima"]
+    assert filter_works(index, "Inexistente", "Todos") == []
+
+
+def test_status_and_tag_filters_are_combined(index):
+    assert work_ids(filter_works(index, "Llamadas", "Activos")) == ["llamadas"]
+    assert work_ids(filter_works(index, "Todas", "Todos", tags=["mensual"])) == ["llamadas", "ventas"]
+    assert work_ids(filter_works(index, "Todas", "Pausados", tags=["mensual"])) == ["ventas"]
+    assert work_ids(filter_works(index, "Todas", "Todos", subcategories=["por compañía"])) == ["llamadas"]
+    assert filter_works(index, "Todas", "En Mantenimiento") == []
+
+
+class FakeStreamlit:
+    """Lo mínimo de streamlit que usa show_work_cards"""
+
+    def __init__(self, page=1):
+        self.session_state = {"index_cards_page": page}
+        self.blocks = []
+
+    def number_input(self, label, min_value, max_value, step, key):
+        return self.session_state[key]
+
+    def markdown(self, body, unsafe_allow_html=False):
+        self.blocks.append(body)
+
+    def caption(self, text):
+        pass
+
+
+def test_cards_page_is_one_block_and_loads_only_its_texts(index, monkeypatch):
+    monkeypatch.setitem(APP_CONFIG, "cards_page_size", 2)
+    fake_st = FakeStreamlit(page=2)
+    monkeypatch.setattr(main_index, "st", fake_st)
+    works = filter_works(index, "Todas", "Todos")
+
+    show_work_cards(works, index)
+    show_work_cards(works, index)
+
+    assert len(fake_st.blocks) == 2
+    assert fake_st.blocks[0].count('class="work-card"') == 1
+    assert FakeDatabase.text_requests == [["ventas"]]
+    assert set(index["card_html"]) == {"ventas"}
+
+
+def test_card_html_escapes_work_and_text_fields():
+    work = {
+        "work_id": "x", "work_name": "<script>alert(1)</script>", "category": "calls_analysis",
+        "status": "active", "version": "1.0", "created_date": pd.Timestamp("2024-01-01", tz="UTC"),
+        "work_url": 'https://example.com/"onclick="x', "description": "**negrita** <i>",
+    }
+
+    card = render_work_card_html(work, CATEGORY_MAP)
+
+    assert "<script>" not in card
+    assert "&lt;script&gt;" in card
+    assert 'https://example.com/&quot;onclick=&quot;x' in card
+    assert "**negrita** &lt;i&gt;" in card
+    assert "📞 Llamadas" in card
@@ -0,0 +1,56 @@
+"""
+Pruebas del layout de tablas y el reporte de escaneo (manage_tables.py)
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from manage_tables import LAYOUTS, QueryRecorder, current_layout, layout_sql, print_report
+
+
+def test_layout_sql_clauses():
+    assert layout_sql(LAYOUTS['works_index']) == "CLUSTER BY is_latest, status, category, work_id"
+    assert layout_sql({'partition_field': 'created_date', 'clustering_fields': ['category']}) == (
+        "PARTITION BY TIMESTAMP_TRUNC(created_date, MONTH)\nCLUSTER BY category"
+    )
+    assert layout_sql({'partition_field': None, 'clustering_fields': []}) == ""
+
+
+def test_current_layout_matches_desired_layout():
+    clustered = SimpleNamespace(time_partitioning=None, clustering_fields=['is_active', 'category_id'])
+    # Particionado por tiempo de ingesta: field es None
+    legacy = SimpleNamespace(time_partitioning=SimpleNamespace(field=None), clustering_fields=None)
+
+    assert current_layout(clustered) == LAYOUTS['works_categories']
+    assert current_layout(legacy) == {'partition_field': '_PARTITIONTIME', 'clustering_fields': []}
+
+
+def test_query_recorder_keeps_queries_when_post_processing_fails():
+    db = SimpleNamespace()
+    recorder = QueryRecorder(db)
+
+    def read_first_row():
+        db.run_query("SELECT 1", job_config="config")
+        return db.run_query("SELECT 2").iloc[0]
+
+    recorder.capture('read_first_row', read_first_row)
+
+    assert recorder.queries == [('read_first_row', "SELECT 1", "config"), ('read_first_row', "SELECT 2", None)]
+
+
+def test_print_report_compares_before_and_after(capsys):
+    before = {
+        'get_catalog': {'estimated_bytes': 4 * 1024 * 1024},
+        'get_work_by_id': {'estimated_bytes': 2048},
+        'get_category_map': {'error': 'Access Denied'},
+    }
+    after = {'get_catalog': {'estimated_bytes': 1024 * 1024}, 'get_work_by_id': {'estimated_bytes': 0}}
+
+    print_report(before, after)
+
+    lines = {line.split()[0]: line for line in capsys.readouterr().out.splitlines()[2:]}
+    assert lines['get_catalog'].split()[1:] == ['4.000', 'MB', '1.000', 'MB', '-75%']
+    assert lines['get_work_by_id'].split()[1:] == ['2.0', 'KB', '0.0', 'KB', '-100%']
+    assert '❌ Access Denied' in lines['get_category_map']
@@ -0,0 +1,54 @@
+"""
+Pruebas del shell del frontend con el catálogo embebido (shared/page_shell.py)
+"""
+import json
+import os
+import re
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+from page_shell import render_page_shell
+from response_cache import encode_json
+
+WORKS = [
+    {"work_id": "xss", "title": "</script><script>alert(1)</script>", "category_name": "Llamadas <b>",
+     "status": "active", "url": "https://example.com/?a=1&b=2"},
+    {"work_id": "clima", "title": "Clima \u2028 Diario", "category_name": "Clima", "status": "paused"},
+]
+CATEGORIES = [{"id": "calls_analysis", "name": "Llamadas <b>"}]
+
+
+def render(**kwargs) -> str:
+    works_json = encode_json({"works": WORKS, "count": len(WORKS)})
+    categories_json = encode_json({"categories": CATEGORIES, "count": 1})
+    return render_page_shell(works_json, categories_json, WORKS, CATEGORIES, **kwargs)
+
+
+def initial_catalog_script(page: str) -> str:
+    return re.search(r"window\.__INITIAL_CATALOG__ = (.*?);\n", page).group(1)
+
+
+def test_embedded_json_cannot_close_the_script_tag():
+    page = render(api_url="https://api.example.com/</script>")
+    script = initial_catalog_script(page)
+
+    assert "</script>" not in script
+    assert "\u2028" not in script
+    # Sigue siendo el mismo JSON una vez que JavaScript interpreta los escapes
+    catalog = json.loads(script.replace("<\\/", "</"))
+    assert catalog["works"]["works"][0]["title"] == WORKS[0]["title"]
+    assert catalog["categories"]["count"] == 1
+    assert 'window.API_URL = "https://api.example.com/<\\/script>";' in page
+
+
+def test_first_screen_is_prerendered_and_escaped():
+    page = render(first_screen=1)
+
+    assert "<!--initial-catalog-->" not in page
+    assert "<!--works-list:start-->" not in page
+    assert 'data-work-id="xss"' in page and 'data-work-id="clima"' not in page
+    assert "&lt;/script&gt;&lt;script&gt;alert(1)&lt;/script&gt;" in page
+    assert 'data-work-url="https://example.com/?a=1&amp;b=2"' in page
+    assert '<button class="category-btn">Llamadas &lt;b&gt;</button>' in page
+    assert '<span id="stats-text">2 de 2 trabajos</span>' in page
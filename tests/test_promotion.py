@@ -0,0 +1,59 @@
+"""
+Pruebas de la promoción entre ambientes con el backend local (shared/promotion.py)
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+from local_backend import LocalWorksBackend
+from promotion import promote
+
+OLD = pd.Timestamp("2024-01-01", tz="UTC")
+
+
+def version_row(work_id: str, version: str, is_latest: bool, **changes) -> dict:
+    row = {
+        "work_id": work_id, "work_name": work_id.title(), "work_slug": work_id,
+        "category": "calls_analysis", "subcategory": "", "status": "active",
+        "version": version, "is_latest": is_latest, "description": "", "short_description": "",
+        "image_preview_url": "", "created_date": OLD, "updated_date": OLD,
+        "activated_date": OLD, "archived_date": pd.NaT, "streamlit_page": "page.py",
+        "work_url": "", "config_json": "{}", "notes": "", "tags": ["calls"],
+    }
+    row.update(changes)
+    return row
+
+
+def backend(tmp_path, name: str, rows) -> LocalWorksBackend:
+    store = LocalWorksBackend(str(tmp_path / f"{name}.parquet"))
+    pd.DataFrame(rows).to_parquet(store.path, index=False)
+    return store
+
+
+def test_promotion_flips_latest_and_stamps_updated_date(tmp_path):
+    source = backend(tmp_path, "des", [
+        version_row("churn", "1.0", False),
+        version_row("churn", "2.0", True, description="Nueva versión"),
+    ])
+    target = backend(tmp_path, "qua", [
+        version_row("churn", "1.0", True),
+        version_row("churn", "0.9-hotfix", True),
+    ])
+
+    dry_run = promote(source, target)
+    assert dry_run["summary"] == {"update": 1, "insert": 1, "target_only": 1}
+    assert dry_run["applied"] is None
+
+    result = promote(source, target, execute=True)
+    assert result["applied"] == 2
+
+    rows = target.get_version_rows().set_index("version")
+    assert rows["is_latest"].astype(bool).to_dict() == {"1.0": False, "2.0": True, "0.9-hotfix": False}
+    # Las filas escritas (y la desmarcada) tienen fecha de la promoción, no la del origen
+    assert (pd.to_datetime(rows["updated_date"], utc=True) > OLD).all()
+
+    # Con el contenido ya copiado, updated_date no genera diferencias nuevas
+    assert promote(source, target)["summary"] == {"same": 2, "target_only": 1}
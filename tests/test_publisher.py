@@ -0,0 +1,81 @@
+"""
+Pruebas de la publicación del catálogo estático (shared/publisher.py)
+"""
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+import publisher
+from config import STATIC_CATALOG_CONFIG
+from publisher import CatalogPublisher, MANIFEST_NAME
+
+WATERMARK = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    """Catálogo fijo en lugar de las lecturas a BigQuery"""
+    works = [
+        {"work_id": "llamadas", "category": "calls_analysis"},
+        {"work_id": "clima", "category": "clima/diario"},
+    ]
+    monkeypatch.setattr(publisher, "load_serialized_catalog",
+                        lambda db: {"works": list(works), "watermark": WATERMARK})
+    monkeypatch.setattr(publisher, "build_categories_payload",
+                        lambda db: {"categories": [{"id": "calls_analysis"}]})
+    return works
+
+
+def read_json(output_dir, relative_path):
+    with open(os.path.join(output_dir, relative_path), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_publish_writes_content_hashed_artifacts(tmp_path, catalog):
+    manifest = CatalogPublisher(db=object(), output_dir=str(tmp_path)).publish()
+
+    assert read_json(tmp_path, MANIFEST_NAME) == manifest
+    assert manifest["watermark"] == WATERMARK.isoformat()
+    works = read_json(tmp_path, manifest["works"])
+    assert works["count"] == 2
+    assert set(manifest["by_category"]) == {"calls_analysis", "clima/diario"}
+    # Nombres de categoría saneados para usarse como ruta
+    assert manifest["by_category"]["clima/diario"].startswith("works/clima_diario.")
+    assert read_json(tmp_path, manifest["by_category"]["clima/diario"])["works"] == [catalog[1]]
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files if ".tmp" in name]
+
+
+def test_version_depends_only_on_content(tmp_path, catalog):
+    catalog_publisher = CatalogPublisher(db=object(), output_dir=str(tmp_path))
+
+    first = catalog_publisher.publish()
+    again = catalog_publisher.publish()
+    catalog.append({"work_id": "ventas", "category": "calls_analysis"})
+    changed = catalog_publisher.publish()
+
+    assert again["version"] == first["version"]
+    assert again["works"] == first["works"]
+    assert changed["version"] != first["version"]
+    assert changed["works"] != first["works"]
+    assert changed["by_category"]["clima/diario"] == first["by_category"]["clima/diario"]
+
+
+def test_unreferenced_artifacts_are_pruned_after_retention(tmp_path, catalog, monkeypatch):
+    catalog_publisher = CatalogPublisher(db=object(), output_dir=str(tmp_path))
+    first = catalog_publisher.publish()
+    catalog.pop()
+
+    # Dentro de la ventana de retención el artefacto viejo se conserva
+    catalog_publisher.publish()
+    assert os.path.exists(tmp_path / first["works"])
+
+    monkeypatch.setitem(STATIC_CATALOG_CONFIG, "retention_seconds", -1)
+    second = catalog_publisher.publish()
+    assert not os.path.exists(tmp_path / first["works"])
+    assert not os.path.exists(tmp_path / first["by_category"]["clima/diario"])
+    assert os.path.exists(tmp_path / second["works"])
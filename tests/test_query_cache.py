@@ -0,0 +1,95 @@
+"""
+Pruebas de la caché de resultados de consultas (shared/query_cache.py)
+"""
+import os
+import sys
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from google.cloud import bigquery
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+from query_cache import QueryResultCache, normalize_sql, referenced_tables
+
+
+class StubClient:
+    project = "proyecto-default"
+
+    def __init__(self):
+        self.modified = {}
+
+    def get_table(self, table_ref):
+        return SimpleNamespace(modified=self.modified.get(table_ref, datetime(2024, 1, 1, tzinfo=timezone.utc)))
+
+
+def test_normalize_sql_strips_comments_whitespace_and_semicolon():
+    query = """
+    SELECT a,  -- columna a
+           b /* columna
+           b */
+    FROM t ;
+    """
+
+    assert normalize_sql(query) == "SELECT a, b FROM t"
+
+
+def test_referenced_tables_quoted_unquoted_and_two_part():
+    query = """
+    WITH recientes AS (SELECT * FROM `p-1.ds.works` WHERE is_latest)
+    SELECT * FROM recientes
+    JOIN ds2.categories USING (category_id)
+    LEFT JOIN otro.ds3.tags ON TRUE, UNNEST(tags)
+    -- FROM ds.comentario
+    """
+
+    assert referenced_tables(query, "defecto") == [
+        "defecto.ds2.categories", "otro.ds3.tags", "p-1.ds.works"
+    ]
+
+
+def test_referenced_tables_two_part_needs_default_project():
+    with pytest.raises(ValueError):
+        referenced_tables("SELECT * FROM ds.tabla")
+    assert referenced_tables("SELECT * FROM `p.ds.tabla`") == ["p.ds.tabla"]
+
+
+def test_cache_key_ignores_formatting_and_tracks_params_and_table_changes(tmp_path):
+    client = StubClient()
+    cache = QueryResultCache(client, cache_dir=str(tmp_path))
+    query = "SELECT * FROM ds.works WHERE id = @id"
+
+    def params(value):
+        return bigquery.QueryJobConfig(query_parameters=[bigquery.ScalarQueryParameter("id", "STRING", value)])
+
+    key = cache.cache_key(query, params("a"))
+    assert cache.cache_key("SELECT *\n  FROM ds.works -- comentario\n WHERE id = @id;", params("a")) == key
+    assert cache.cache_key(query, params("b")) != key
+
+    cache._table_modified.clear()
+    client.modified["proyecto-default.ds.works"] = datetime(2024, 2, 1, tzinfo=timezone.utc)
+    assert cache.cache_key(query, params("a")) != key
+
+
+def test_get_or_run_runs_once_and_evicts_to_max_bytes(tmp_path):
+    cache = QueryResultCache(StubClient(), cache_dir=str(tmp_path), max_bytes=1)
+    calls = []
+
+    def run():
+        calls.append(1)
+        return pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+
+    # Con max_bytes=1 cada resultado se guarda y se desaloja enseguida
+    cache.get_or_run("SELECT a, b FROM `p.ds.t`", run)
+    cache.get_or_run("SELECT a, b FROM `p.ds.t`", run)
+    assert len(calls) == 2
+    assert cache.entries() == []
+
+    cache.max_bytes = 10 * 1024 * 1024
+    first = cache.get_or_run("SELECT a, b FROM `p.ds.t`", run, columns=["b"])
+    second = cache.get_or_run("SELECT a, b FROM `p.ds.t`", run, columns=["b"])
+    assert len(calls) == 3
+    assert first["b"].tolist() == second["b"].tolist() == ["x", "y"]
+    assert list(second.columns) == ["b"]
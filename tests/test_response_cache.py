@@ -0,0 +1,68 @@
+"""
+Pruebas del caché de cuerpos JSON pre-codificados (shared/response_cache.py)
+"""
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+from response_cache import EncodedResponseCache, encode_json
+
+
+class CountingBuild:
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.payload
+
+
+def test_same_version_reuses_encoded_body():
+    cache = EncodedResponseCache()
+    build = CountingBuild({"works": [1, 2]})
+
+    first = cache.get_or_build(("works", None), "v1", build)
+    second = cache.get_or_build(("works", None), "v1", build)
+
+    assert first is second
+    assert build.calls == 1
+    assert json.loads(first) == {"works": [1, 2]}
+
+
+def test_new_version_rebuilds_entry():
+    cache = EncodedResponseCache()
+    build = CountingBuild({"count": 1})
+    cache.get_or_build("works", "v1", build)
+
+    build.payload = {"count": 2}
+    body = cache.get_or_build("works", "v2", build)
+
+    assert build.calls == 2
+    assert json.loads(body) == {"count": 2}
+
+
+def test_lru_evicts_least_recently_used_key():
+    cache = EncodedResponseCache(max_entries=2)
+    builds = {key: CountingBuild({"key": key}) for key in "abc"}
+    cache.get_or_build("a", "v1", builds["a"])
+    cache.get_or_build("b", "v1", builds["b"])
+    cache.get_or_build("a", "v1", builds["a"])  # "a" pasa a ser la más reciente
+    cache.get_or_build("c", "v1", builds["c"])
+
+    cache.get_or_build("a", "v1", builds["a"])
+    cache.get_or_build("b", "v1", builds["b"])
+
+    assert builds["a"].calls == 1
+    assert builds["b"].calls == 2
+
+
+def test_encode_json_handles_dates_and_unicode():
+    body = encode_json({"name": "Análisis", "at": datetime(2024, 1, 1, tzinfo=timezone.utc)})
+
+    decoded = json.loads(body)
+    assert decoded["name"] == "Análisis"
+    assert decoded["at"].startswith("2024-01-01")
@@ -0,0 +1,71 @@
+"""
+Pruebas del índice invertido de tags y subcategorías (shared/tag_index.py)
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'shared'))
+
+from tag_index import TagIndex
+
+
+def build_index() -> TagIndex:
+    return TagIndex.from_records([
+        {"work_id": "llamadas", "tags": ["Llamadas", "mensual"], "subcategory": "Por compañía"},
+        {"work_id": "clima", "tags": np.array(["clima", "mensual"]), "subcategory": "Diario"},
+        {"work_id": "ventas", "tags": "ventas, Mensual ,", "subcategory": None},
+    ])
+
+
+def test_match_all_any_and_subcategories():
+    index = build_index()
+
+    assert index.match() is None
+    assert index.match(tags=["MENSUAL", " llamadas "]) == {"llamadas"}
+    assert index.match(tags=["llamadas", "clima"], tag_mode="any") == {"llamadas", "clima"}
+    assert index.match(tags=["mensual"], subcategories=["diario", "por compañía"]) == {"llamadas", "clima"}
+    assert index.match(tags=["inexistente"]) == set()
+    with pytest.raises(ValueError):
+        index.match(tags=["mensual"], tag_mode="some")
+
+
+def test_facet_counts_keep_first_label():
+    counts = build_index().facet_counts()
+
+    assert counts["tag"] == {"mensual": 3, "clima": 1, "Llamadas": 1, "ventas": 1}
+    assert counts["subcategory"] == {"Diario": 1, "Por compañía": 1}
+    assert build_index().facet_counts({"clima"})["tag"] == {"clima": 1, "mensual": 1}
+
+
+def test_apply_write_updates_keeps_and_removes_values():
+    index = build_index()
+    version = index.version
+
+    index.apply_write("updated", "clima", {"tags": ["lluvia"]})
+    assert index.match(tags=["lluvia"]) == {"clima"}
+    assert "clima" not in index.match(tags=["mensual"])
+    # La subcategoría no vino en el evento: se conserva
+    assert index.match(subcategories=["diario"]) == {"clima"}
+
+    index.apply_write("created", "nuevo", {"tags": ["lluvia"], "subcategory": "Diario", "status": "active"})
+    assert index.match(tags=["lluvia"], subcategories=["diario"]) == {"clima", "nuevo"}
+
+    index.apply_write("updated", "nuevo", {"status": "paused"})
+    index.apply_write("archived", "clima", {})
+    assert index.match(tags=["lluvia"]) == set()
+    assert "diario" not in {key.lower() for key in index.facet_counts()["subcategory"]}
+    assert len(index) == 2
+    assert index.version == version + 4
+
+
+def test_apply_write_ignores_unknown_reactivated_work():
+    index = build_index()
+    version = index.version
+
+    index.apply_write("updated", "desconocido", {"status": "active"})
+
+    assert len(index) == 3
+    assert index.version == version